@@ -0,0 +1,102 @@
+"""
+Concurrent MCP tool throughput: former blocking tools vs. async tools.
+
+The "blocking" run replays the former sync tools (a probe `GET {url}/`
+followed by the real request on a blocking `httpx.Client`, executed on the
+event loop), so concurrently issued tool calls are serialised. The "async"
+run dispatches the same call mix through `server.mcp.call_tool`.
+
+    python benchmarks/bench_async_tools.py --calls 40 --concurrency 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.mock_ivoryos import MockIvoryOS, serve_in_thread  # noqa: E402
+
+# (tool name, arguments, path used by the blocking replay)
+CALL_MIX = [
+    ("load-workflow-data", {"workflow_id": 1}, "/executions/records/1"),
+    ("execution-status", {}, "/executions/status"),
+    ("platform-info", {}, "/instruments"),
+    ("list-workflow-data", {"workflow_name": "workflow"}, "/executions/records"),
+]
+
+
+async def run_blocking(base_url: str, calls: int, concurrency: int) -> float:
+    client = httpx.Client(follow_redirects=True)
+    login_data = {"username": "admin", "password": "admin"}
+
+    async def tool(path):
+        # body of a former sync tool: nothing here yields to the event loop
+        if client.get(f"{base_url}/", follow_redirects=False).status_code != httpx.codes.OK:
+            client.post(f"{base_url}/auth/login", data=login_data)
+        return client.get(f"{base_url}{path}").json()
+
+    start = time.perf_counter()
+    await _gather(lambda i: tool(CALL_MIX[i % len(CALL_MIX)][2]), calls, concurrency)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+async def run_async(calls: int, concurrency: int) -> tuple:
+    import server
+
+    async def tool(i):
+        name, arguments, _ = CALL_MIX[i % len(CALL_MIX)]
+        return await server.mcp.call_tool(name, arguments)
+
+    start = time.perf_counter()
+    await _gather(tool, calls, concurrency)
+    return time.perf_counter() - start, server.decks.get().auth.stats()
+
+
+async def _gather(make_call, calls: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i):
+        async with semaphore:
+            await make_call(i)
+
+    await asyncio.gather(*(bounded(i) for i in range(calls)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.01, help="mock latency of fast endpoints (s)")
+    parser.add_argument("--slow-latency", type=float, default=0.2, help="mock latency of /executions/records/{id}")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    mock = MockIvoryOS(latency=args.latency, slow_latency=args.slow_latency)
+    uv_server, base_url = serve_in_thread(mock)
+    os.environ["IVORYOS_URL"] = base_url
+
+    blocking = asyncio.run(run_blocking(base_url, args.calls, args.concurrency))
+    blocking_requests = mock.request_count
+    concurrent, auth_stats = asyncio.run(run_async(args.calls, args.concurrency))
+    uv_server.should_exit = True
+
+    print(json.dumps({
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "blocking": {"seconds": round(blocking, 3), "calls_per_s": round(args.calls / blocking, 1),
+                     "http_requests": blocking_requests},
+        "async": {"seconds": round(concurrent, 3), "calls_per_s": round(args.calls / concurrent, 1),
+                  "http_requests": mock.request_count - blocking_requests, "auth": auth_stats},
+        "speedup": round(blocking / concurrent, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Cold start of the stdio MCP server, as an MCP client sees it.
+
+Spawns `python server.py` (with IVORYOS_URL pointing at the mock IvoryOS),
+speaks newline-delimited JSON-RPC on its stdin/stdout and times the
+`initialize` handshake, the first `tools/list` and the first `tools/call`.
+The import cost of the `mcp` framework itself is measured separately and
+subtracted to get the server's own overhead, which `--budget-ms` gates.
+
+    python benchmarks/bench_cold_start.py --runs 5 --budget-ms 200
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.mock_ivoryos import MockIvoryOS, serve_in_thread  # noqa: E402
+
+
+def import_ms(statement: str) -> float:
+    """Wall time of `python -c statement` in a fresh interpreter (ms)"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+class StdioClient:
+    def __init__(self, env):
+        self.proc = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self.next_id = 0
+
+    def send(self, method, params=None, notification=False):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notification:
+            self.next_id += 1
+            message["id"] = self.next_id
+        self.proc.stdin.write(json.dumps(message) + "\n")
+        self.proc.stdin.flush()
+
+    def request(self, method, params=None):
+        self.send(method, params)
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"server exited during {method}")
+            reply = json.loads(line)
+            if reply.get("id") == self.next_id:
+                if "error" in reply:
+                    raise RuntimeError(f"{method}: {reply['error']}")
+                return reply["result"]
+
+    def close(self):
+        self.proc.stdin.close()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def one_run(env) -> dict:
+    start = time.perf_counter()
+    client = StdioClient(env)
+    try:
+        client.request("initialize", {"protocolVersion": "2025-06-18", "capabilities": {},
+                                      "clientInfo": {"name": "bench", "version": "0"}})
+        initialized = time.perf_counter()
+        client.send("notifications/initialized", notification=True)
+        tools = client.request("tools/list")["tools"]
+        listed = time.perf_counter()
+        client.request("tools/call", {"name": "platform-info", "arguments": {}})
+        called = time.perf_counter()
+    finally:
+        client.close()
+    return {"initialize_ms": (initialized - start) * 1000, "tools_list_ms": (listed - initialized) * 1000,
+            "first_call_ms": (called - listed) * 1000, "tools": len(tools)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.01, help="mock latency of IvoryOS endpoints (s)")
+    parser.add_argument("--budget-ms", type=float, default=0,
+                        help="exit non-zero if the server's own import overhead (median) exceeds this")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    mock = MockIvoryOS(latency=args.latency)
+    uv_server, base_url = serve_in_thread(mock)
+    env = {**os.environ, "IVORYOS_URL": base_url}
+    os.environ["IVORYOS_URL"] = base_url
+
+    python = [import_ms("pass") for _ in range(args.runs)]
+    framework = [import_ms("import mcp.server.fastmcp") for _ in range(args.runs)]
+    server = [import_ms("import server") for _ in range(args.runs)]
+    runs = [one_run(env) for _ in range(args.runs)]
+    uv_server.should_exit = True
+
+    median = lambda values: round(statistics.median(values), 1)  # noqa: E731
+    overhead = median(server) - median(framework)
+    result = {
+        "runs": args.runs,
+        "python_startup_ms": median(python),
+        "import_framework_ms": median(framework),
+        "import_server_ms": median(server),
+        "server_overhead_ms": round(overhead, 1),
+        "initialize_ms": median([r["initialize_ms"] for r in runs]),
+        "tools_list_ms": median([r["tools_list_ms"] for r in runs]),
+        "first_call_ms": median([r["first_call_ms"] for r in runs]),
+        "tools": runs[0]["tools"],
+        "numpy_loaded_by_import": subprocess.run(
+            [sys.executable, "-c", "import sys, server; print('numpy' in sys.modules)"],
+            cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip() == "True",
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.budget_ms and overhead > args.budget_ms:
+        print(f"server import overhead {overhead:.1f} ms exceeds the {args.budget_ms} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
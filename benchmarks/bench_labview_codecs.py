@@ -0,0 +1,63 @@
+"""
+LabVIEW payload codec throughput on array messages (JSON vs binary float64).
+
+Each message carries one `points`-long float64 array plus a few scalars. Both
+directions are timed: encode + frame on the sending side, and split +
+decode on the receiving side (MessageFramer in length mode, as on the wire).
+
+    python benchmarks/bench_labview_codecs.py --points 10000 --messages 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fake_labview import LABVIEW_SRC  # noqa: E402,F401  (puts labview_server on sys.path)
+from labview_server import CODECS, MessageFramer  # noqa: E402
+
+
+def run(codec_name: str, points: int, messages: int) -> dict:
+    codec = CODECS[codec_name]()
+    spectrum = np.random.default_rng(0).random(points)
+    data = {"Spectrum": spectrum if codec.binary else spectrum.tolist(), "Power": 100.0, "Flow": 2.5}
+    sender = MessageFramer("length")
+
+    start = time.perf_counter()
+    stream = b"".join(sender.encode(codec.encode(data)) for _ in range(messages))
+    encode_seconds = time.perf_counter() - start
+
+    receiver = MessageFramer("length", buffer_size=len(stream))
+    receiver.feed(stream)
+    start = time.perf_counter()
+    decoded = [codec.decode(message) for message in receiver.messages()]
+    decode_seconds = time.perf_counter() - start
+
+    assert len(decoded) == messages and np.allclose(decoded[-1]["Spectrum"], spectrum)
+    return {
+        "codec": codec_name,
+        "points": points,
+        "message_bytes": len(stream) // messages,
+        "encode_messages_per_s": round(messages / encode_seconds),
+        "decode_messages_per_s": round(messages / decode_seconds),
+        "encode_mb_per_s": round(len(stream) / encode_seconds / 1e6, 1),
+        "decode_mb_per_s": round(len(stream) / decode_seconds / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+    results = [run(name, args.points, args.messages) for name in CODECS]
+    speedup = {"decode_speedup": round(results[1]["decode_messages_per_s"] / results[0]["decode_messages_per_s"], 1),
+               "encode_speedup": round(results[1]["encode_messages_per_s"] / results[0]["encode_messages_per_s"], 1)}
+    print(json.dumps(results + [speedup], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+LabVIEWServerDevice ingest throughput (messages/s and MB/s) per framing mode.
+
+A fake LabVIEW client streams JSON messages to a local LabVIEWServerDevice;
+the server's own message counter is used to check that every message was
+framed correctly. Server logs below WARNING are discarded.
+With --clients > 1 the server runs in multi-client (asyncio) mode and the
+messages are split across that many concurrent fake VIs.
+
+    python benchmarks/bench_labview_framing.py --messages 20000 --size 2048
+    python benchmarks/bench_labview_framing.py --clients 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fake_labview import FakeLabVIEWClient  # noqa: E402
+from benchmarks.mock_ivoryos import free_port  # noqa: E402
+from labview_server import LabVIEWServerDevice, configure_logging  # noqa: E402
+
+
+def run(framing: str, messages: int, size: int, clients: int = 1) -> dict:
+    port = free_port()
+    server = LabVIEWServerDevice(host="127.0.0.1", port=port, framing=framing, multi_client=clients > 1)
+    server.start_server()
+    fakes = [FakeLabVIEWClient("127.0.0.1", port, framing) for _ in range(clients)]
+    senders = [threading.Thread(target=fake.send_messages, args=(messages // clients, size)) for fake in fakes]
+    messages = messages // clients * clients
+    start = time.perf_counter()
+    for sender in senders:
+        sender.start()
+    while server.message_count < messages and time.perf_counter() - start < 60:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    bytes_received = sum(client.framer.bytes_received for client in server.clients.values())
+    for fake in fakes:
+        fake.close()
+    server.stop_server()
+    server.server_thread.join(timeout=1)
+
+    return {
+        "framing": framing,
+        "clients": clients,
+        "messages_sent": messages,
+        "messages_received": server.message_count,
+        "seconds": round(elapsed, 3),
+        "messages_per_s": round(server.message_count / elapsed),
+        "mb_per_s": round(bytes_received / elapsed / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=2048, help="approximate JSON message size in bytes")
+    parser.add_argument("--clients", type=int, default=1, help="concurrent LabVIEW clients (>1: multi-client mode)")
+    args = parser.parse_args()
+    configure_logging(logging.WARNING)
+    print(json.dumps([run(framing, args.messages, args.size, args.clients)
+                      for framing in ("newline", "length")], indent=2))
+
+
+if __name__ == "__main__":
+    main()
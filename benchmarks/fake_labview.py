@@ -0,0 +1,88 @@
+"""
+Fake LabVIEW VI for benchmarks: connects to a LabVIEWServerDevice and sends
+JSON messages of a configurable size, framing and rate (0 = as fast as possible).
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+LABVIEW_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "integrations", "llm-labview-integration", "src")
+sys.path.insert(0, LABVIEW_SRC)
+from labview_server import MessageFramer  # noqa: E402
+
+
+def make_message(index: int, size: int) -> bytes:
+    """JSON message of roughly `size` bytes, like a LabVIEW cluster flattened to JSON"""
+    message = {"Input": index, "Output": index * 0.5, "StringOutput": "", "Timestamp": time.time()}
+    padding = size - len(json.dumps(message))
+    if padding > 0:
+        message["StringOutput"] = "x" * padding
+    return json.dumps(message).encode("utf-8")
+
+
+def _reply(message: bytes) -> bytes:
+    """Acknowledgement of a JSON command with a RequestId (b"" for anything else)"""
+    try:
+        command = json.loads(message)
+    except ValueError:
+        return b""
+    if not isinstance(command, dict) or "RequestId" not in command:
+        return b""
+    return json.dumps({**command, "Status": "OK"}).encode("utf-8")
+
+
+class FakeLabVIEWClient:
+    """One TCP client that plays the LabVIEW side"""
+
+    def __init__(self, host: str, port: int, framing: str = "newline"):
+        self.framer = MessageFramer(framing)
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.received = []
+        self._reader = None
+
+    def send_messages(self, count: int, size: int = 256, rate: float = 0.0, batch: int = 64) -> float:
+        """Send `count` messages (optionally paced at `rate` msg/s), returns the seconds spent"""
+        start = time.perf_counter()
+        pending = []
+        for i in range(count):
+            pending.append(self.framer.encode(make_message(i, size)))
+            if rate:
+                self.sock.sendall(pending.pop())
+                delay = start + (i + 1) / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elif len(pending) >= batch:
+                self.sock.sendall(b"".join(pending))
+                pending.clear()
+        if pending:
+            self.sock.sendall(b"".join(pending))
+        return time.perf_counter() - start
+
+    def start_reader(self, echo: bool = False):
+        """Collect messages sent back by the server in a background thread; with `echo`,
+        answer every JSON command carrying a RequestId like a VI that acknowledges it"""
+        def read():
+            try:
+                while self.framer.recv_from(self.sock):
+                    messages = list(self.framer.messages())
+                    self.received.extend(messages)
+                    if echo:
+                        replies = [self.framer.encode(reply) for reply in map(_reply, messages) if reply]
+                        if replies:
+                            self.sock.sendall(b"".join(replies))
+            except OSError:
+                pass
+        self._reader = threading.Thread(target=read, daemon=True)
+        self._reader.start()
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
@@ -0,0 +1,256 @@
+"""
+Mock IvoryOS web app for benchmarks.
+
+Serves the JSON endpoints `server.py` talks to (`/instruments`, `/executions/*`,
+`/library/*`, `/draft/submit_python`) with a configurable per-request latency
+and payload sizes (deck size, docstring length, record steps, script length),
+including the Flask-Login style redirect to `/auth/login` for unknown sessions.
+`deck.chamber` stands in for the LabVIEW integration's LabVIEWServerDevice.
+Built on Starlette/uvicorn, which are already installed with `mcp[cli]`.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Route, Mount
+
+
+class MockIvoryOS:
+    """In-memory IvoryOS state plus the Starlette app serving it"""
+
+    def __init__(self, latency: float = 0.01, slow_latency: float = 0.2, components: int = 4,
+                 methods: int = 8, records: int = 20, steps_per_record: int = 50, run_time: float = 1.0,
+                 prefix: str = "/ivoryos", docstring_size: int = 0, script_lines: int = 1):
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.run_time = run_time
+        self.prefix = prefix
+        self.sessions = set()
+        self.request_count = 0
+        self.login_count = 0
+        self.run_started: Optional[float] = None
+        self.paused = False
+        self.snapshot = {
+            f"deck.instrument_{c}": {
+                f"method_{m}": {"signature": f"(x: float = 1.0, y: float = 2.0, n: int = {m})",
+                                "docstring": f"Method {m} of instrument {c}".ljust(docstring_size, ".")}
+                for m in range(methods)
+            }
+            for c in range(components)
+        }
+        self.snapshot["deck.chamber"] = {
+            name: {"signature": signature, "docstring": ""}
+            for name, signature in (("get_telemetry_summary", "(seconds: float = 10.0) -> dict"),
+                                    ("get_metrics", "() -> dict"))
+        }
+        self.records = {i: self._make_record(i, steps_per_record) for i in range(1, records + 1)}
+        self.scripts = {f"workflow_{i}": self._make_script(f"workflow_{i}", script_lines) for i in range(records)}
+        self.app = Starlette(routes=[Mount(prefix, routes=[
+            Route("/", self.home),
+            Route("/auth/login", self.login, methods=["GET", "POST"]),
+            Route("/instruments", self.instruments),
+            Route("/instruments/{component}", self.run_task, methods=["POST"]),
+            Route("/executions/status", self.status),
+            Route("/executions/config", self.run_workflow, methods=["POST"]),
+            Route("/executions/pause-resume", self.pause_resume, methods=["POST"]),
+            Route("/executions/abort/next-iteration", self.abort, methods=["POST"]),
+            Route("/executions/abort/next-task", self.abort, methods=["POST"]),
+            Route("/executions/records", self.list_records),
+            Route("/executions/records/{workflow_id:int}", self.load_record),
+            Route("/library", self.list_scripts),
+            Route("/library/{name}", self.load_script),
+            Route("/draft/submit_python", self.submit_script, methods=["POST"]),
+        ])])
+
+    # helpers
+    @staticmethod
+    def _make_record(workflow_id: int, steps: int) -> Dict[str, Any]:
+        script = {
+            str(i): [{
+                "id": i, "run_id": workflow_id, "name": "main", "repeat_index": i,
+                "parameters": {"x": i * 0.5, "y": (i % 7) * 1.5},
+                "outputs": {"yield": (i * 37 % 101) / 100.0, "purity": (i * 53 % 97) / 100.0},
+                "start_time": "2025-09-11 15:00:00", "end_time": "2025-09-11 15:00:01",
+                "steps": [{"id": i, "step_index": 0, "method_name": "deck.instrument_0.method_0",
+                           "run_error": False, "output": None}],
+            }]
+            for i in range(steps)
+        }
+        return {
+            "workflow_info": {"id": workflow_id, "name": f"workflow_{workflow_id % 5}", "platform": "mock",
+                              "start_time": "2025-09-11 15:00:00", "end_time": "2025-09-11 16:00:00",
+                              "repeat_mode": "sweep"},
+            "phases": {"prep": [], "script": script, "cleanup": []},
+        }
+
+    @staticmethod
+    def _make_script(name: str, lines: int = 1) -> Dict[str, Any]:
+        body = "".join(f"    results = deck.instrument_{i % 4}.method_{i % 8}(**{{'x': x, 'y': y}})\n"
+                       for i in range(max(lines, 1)))
+        return {
+            "script": {"name": name, "deck": "deck", "status": "editing", "author": "admin",
+                       "last_modified": "2025-09-11 15:00:00"},
+            "python_script": {"script": f"def {name}(x, y):\n{body}    return {{'results': results}}\n"},
+        }
+
+    async def _respond(self, request: Request, slow: bool = False) -> Optional[Response]:
+        """Apply latency and the login redirect, returns a response only when the session is unknown"""
+        self.request_count += 1
+        await asyncio.sleep(self.slow_latency if slow else self.latency)
+        if request.cookies.get("session") not in self.sessions:
+            return RedirectResponse(f"{self.prefix}/auth/login?next={request.url.path}", status_code=302)
+        return None
+
+    def _running(self) -> bool:
+        return self.run_started is not None and time.monotonic() - self.run_started < self.run_time
+
+    # routes
+    async def home(self, request: Request):
+        return await self._respond(request) or JSONResponse({"status": "ok"})
+
+    async def login(self, request: Request):
+        if request.method == "GET":
+            return Response("login form", media_type="text/html")
+        self.login_count += 1
+        token = uuid.uuid4().hex
+        self.sessions.add(token)
+        resp = RedirectResponse(f"{self.prefix}/", status_code=302)
+        resp.set_cookie("session", token, path="/")
+        return resp
+
+    async def instruments(self, request: Request):
+        return await self._respond(request) or JSONResponse(self.snapshot)
+
+    async def run_task(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        payload = await request.json()
+        component = request.path_params["component"]
+        method = payload.pop("hidden_name", None)
+        if method not in self.snapshot.get(component, {}):
+            return JSONResponse({"success": False, "error": f"Method {method} not found"}, status_code=404)
+        return JSONResponse({"success": True, "output": {"component": component, "method": method}})
+
+    async def status(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        busy = self._running()
+        return JSONResponse({
+            "busy": busy,
+            "workflow_status": {"workflow_info": {"id": len(self.records)},
+                                "runner_status": {"is_running": busy, "paused": self.paused,
+                                                  "stop_pending": False, "stop_current": False}},
+            "current_task": {"method_name": "deck.instrument_0.method_0"} if busy else {},
+        })
+
+    async def run_workflow(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        await request.json()
+        self.run_started = time.monotonic()
+        return JSONResponse({"status": "task started", "task_id": len(self.records)})
+
+    async def pause_resume(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        self.paused = not self.paused
+        return JSONResponse({"status": "ok", "pause_status": self.paused})
+
+    async def abort(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        self.run_started = None
+        return JSONResponse({"status": "ok"})
+
+    async def list_records(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        keyword = request.query_params.get("keyword", "")
+        return JSONResponse({"workflow_data": {
+            i: {"workflow_name": r["workflow_info"]["name"], "start_time": r["workflow_info"]["start_time"]}
+            for i, r in self.records.items() if keyword in r["workflow_info"]["name"]
+        }})
+
+    async def load_record(self, request: Request):
+        denied = await self._respond(request, slow=True)
+        if denied:
+            return denied
+        record = self.records.get(request.path_params["workflow_id"])
+        if record is None:
+            return JSONResponse({"error": "Workflow not found"}, status_code=404)
+        return JSONResponse(record)
+
+    async def list_scripts(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        keyword = request.query_params.get("keyword", "")
+        # newest first, like IvoryOS' default sort_by=modified&order=desc
+        names = sorted(self.scripts, key=lambda name: self.scripts[name]["script"]["last_modified"], reverse=True)
+        return JSONResponse({"workflows": [name for name in names if keyword in name]})
+
+    async def load_script(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        script = self.scripts.get(request.path_params["name"])
+        return JSONResponse(script if script else {"success": False})
+
+    async def submit_script(self, request: Request):
+        denied = await self._respond(request)
+        if denied:
+            return denied
+        payload = await request.json()
+        name = payload.pop("workflow_name")
+        self.scripts[name] = {"script": {"name": name, "deck": "deck", "status": "editing", "author": "admin",
+                                         "last_modified": time.strftime("%Y-%m-%d %H:%M:%S")},
+                              "python_script": payload}
+        return JSONResponse({"script": {k: "success" for k in payload}, "db": {"success": True}})
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(mock: MockIvoryOS, port: Optional[int] = None) -> tuple:
+    """Run the mock with uvicorn in a daemon thread, returns (uvicorn server, base url)"""
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(mock.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}{mock.prefix}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the mock IvoryOS on a local port")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--slow-latency", type=float, default=0.2, help="latency of /executions/records/<id>")
+    parser.add_argument("--components", type=int, default=4)
+    parser.add_argument("--methods", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--steps-per-record", type=int, default=50)
+    parser.add_argument("--docstring-size", type=int, default=0)
+    parser.add_argument("--script-lines", type=int, default=1)
+    args = parser.parse_args()
+    mock = MockIvoryOS(latency=args.latency, slow_latency=args.slow_latency, components=args.components,
+                       methods=args.methods, records=args.records, steps_per_record=args.steps_per_record,
+                       docstring_size=args.docstring_size, script_lines=args.script_lines)
+    uvicorn.run(mock.app, host="127.0.0.1", port=args.port)
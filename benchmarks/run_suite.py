@@ -0,0 +1,241 @@
+"""
+Load-test suite: every MCP tool of `server.py` against the mock IvoryOS, and
+LabVIEWServerDevice with concurrent fake LabVIEW clients.
+
+Each tool is called `--calls` times with up to `--concurrency` calls in
+flight (the run-workflow tools one at a time, waiting for each run); per-tool throughput and p50/p95/p99 latency plus the per-endpoint
+IvoryOS numbers from `server.metrics` are written as JSON. With --baseline
+a previous result file is compared and regressions beyond --tolerance make
+the run exit with status 1.
+
+    python benchmarks/run_suite.py --output results.json
+    python benchmarks/run_suite.py --baseline results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.fake_labview import FakeLabVIEWClient  # noqa: E402
+from benchmarks.mock_ivoryos import MockIvoryOS, serve_in_thread, free_port  # noqa: E402
+
+TASK = {"component": "deck.instrument_0", "method": "method_0", "kwargs": {"x": 1.0}}
+
+# arguments each tool is driven with; a tool missing here is reported as "untested"
+TOOL_ARGUMENTS: Dict[str, Dict[str, Any]] = {
+    "platform-info": {},
+    "refresh-platform-info": {},
+    "execution-status": {},
+    "await-execution": {"timeout": 5},
+    "list-decks": {},
+    "fleet-status": {},
+    "fleet-platform-info": {},
+    "execute-task": TASK,
+    "execute-task-batch": {"tasks": [TASK] * 4},
+    "list-workflow-scripts": {"search_key": "workflow"},
+    "search-workflow-scripts": {"query": "deck.instrument_1 x"},
+    "load-workflow-script": {"workflow_name": "workflow_1"},
+    "validate-workflow-script": {"main_script": "def bench(x):\n    deck.instrument_0.method_1(x=x, n=2)\n"},
+    "submit-workflow-script": {"workflow_name": "bench", "main_script": "def bench(x):\n    return x\n"},
+    "pause-and-resume": {},
+    "abort-pending-workflow": {},
+    "stop-current-workflow": {},
+    "run-workflow-repeat": {"repeat_time": 1, "wait": True},
+    "run-workflow-kwargs": {"kwargs_list": [{"x": 1.0, "y": 2.0}], "wait": True},
+    "sweep-status": {},
+    "run-workflow-campaign": {"parameters": [{"name": "x", "type": "range", "bounds": [0.0, 1.0]}],
+                              "objectives": [{"name": "yield", "minimize": False}], "repeat": 5,
+                              "parameter_constraints": ["x <= 0.8"], "batch_size": 2, "wait": True},
+    "campaign-status": {},
+    "enqueue-job": {"config": {"repeat": 1}, "priority": 1},
+    "job-queue": {},
+    "reorder-job": {"job_id": 1, "priority": 2},
+    "cancel-job": {"job_id": 1},
+    "list-workflow-data": {"workflow_name": "workflow"},
+    "load-workflow-data": {"workflow_id": 1, "limit": 10},
+    "analyze-workflow-data": {"workflow_id": 1, "objective": "yield", "group_by": "y"},
+    "labview-telemetry": {"seconds": 10},
+    "metrics": {},
+    "auth-stats": {},
+}
+
+
+RUN_TOOLS = ("run-workflow-repeat", "run-workflow-kwargs", "run-workflow-campaign")
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]  # noqa: E731
+    return {"p50_ms": round(pick(0.5) * 1000, 3), "p95_ms": round(pick(0.95) * 1000, 3),
+            "p99_ms": round(pick(0.99) * 1000, 3), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+def _is_error(result) -> bool:
+    blocks = result[0] if isinstance(result, tuple) else result
+    text = getattr(blocks[0], "text", "") if blocks else ""
+    return text.startswith(("Error", "Failed"))
+
+
+async def run_tools(server, calls: int, concurrency: int) -> Dict[str, Any]:
+    results = {}
+    for tool in await server.mcp.list_tools():
+        arguments = TOOL_ARGUMENTS.get(tool.name)
+        if arguments is None:
+            results[tool.name] = {"untested": True}
+            continue
+        # a deck runs one workflow at a time, the run tools refuse to start another one
+        semaphore = asyncio.Semaphore(1 if tool.name in RUN_TOOLS else concurrency)
+        latencies, errors = [], 0
+
+        async def call():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    errors += _is_error(await server.mcp.call_tool(tool.name, dict(arguments)))
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(calls)))
+        elapsed = time.perf_counter() - start
+        results[tool.name] = {"calls": calls, "errors": errors, "calls_per_s": round(calls / elapsed, 1),
+                              **percentiles(latencies)}
+    return results
+
+
+def run_labview(clients: int, messages: int, rate: float, requests: int) -> Dict[str, Any]:
+    from labview_server import LabVIEWServerDevice, configure_logging
+    configure_logging(logging.WARNING)
+    port = free_port()
+    device = LabVIEWServerDevice(host="127.0.0.1", port=port, multi_client=True)
+    device.start_server()
+    fakes = [FakeLabVIEWClient("127.0.0.1", port) for _ in range(clients)]
+    for fake in fakes:
+        fake.start_reader(echo=True)
+    while len(device.clients) < clients:
+        time.sleep(0.01)
+
+    # ingest: every client streams at `rate` msg/s (0: as fast as possible)
+    senders = [threading.Thread(target=fake.send_messages, args=(messages, 256, rate)) for fake in fakes]
+    start = time.perf_counter()
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    while device.message_count < clients * messages and time.perf_counter() - start < 60:
+        time.sleep(0.001)
+    ingest_seconds = time.perf_counter() - start
+    received = device.message_count
+
+    # request/reply: `requests` pipelined calls per client, all clients at once
+    start = time.perf_counter()
+    futures = [device.request({"Power": i}, client_id) for client_id in list(device.clients) for i in range(requests)]
+    replies = sum(1 for future in futures if future.result(timeout=30))
+    rpc_seconds = time.perf_counter() - start
+
+    metrics = device.get_metrics()
+    for fake in fakes:
+        fake.close()
+    device.stop_server()
+    device.server_thread.join(timeout=1)
+    return {
+        "clients": clients,
+        "messages_received": received,
+        "messages_per_s": round(received / ingest_seconds),
+        "receive": metrics["receive"],
+        "requests": replies,
+        "requests_per_s": round(replies / rpc_seconds),
+        "request": metrics["request"],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Throughput drops and p95 increases beyond `tolerance` (a fraction) between two result files"""
+    regressions = []
+    for name, now in current["tools"].items():
+        before = baseline.get("tools", {}).get(name)
+        if not before or now.get("untested") or before.get("untested"):
+            continue
+        if now["calls_per_s"] < before["calls_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {before['calls_per_s']} -> {now['calls_per_s']} calls/s")
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+    for key in ("messages_per_s", "requests_per_s"):
+        before, now = baseline.get("labview", {}).get(key), current.get("labview", {}).get(key)
+        if before and now and now < before * (1 - tolerance):
+            regressions.append(f"labview {key}: {before} -> {now}")
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005, help="mock IvoryOS latency per request (s)")
+    parser.add_argument("--slow-latency", type=float, default=0.05, help="mock latency of workflow records (s)")
+    parser.add_argument("--steps-per-record", type=int, default=200)
+    parser.add_argument("--docstring-size", type=int, default=200)
+    parser.add_argument("--labview-clients", type=int, default=4)
+    parser.add_argument("--labview-messages", type=int, default=2000, help="messages per LabVIEW client")
+    parser.add_argument("--labview-rate", type=float, default=0.0, help="msg/s per client (0: unpaced)")
+    parser.add_argument("--labview-requests", type=int, default=200, help="pipelined requests per client")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    mock = MockIvoryOS(latency=args.latency, slow_latency=args.slow_latency, run_time=0.2,
+                       steps_per_record=args.steps_per_record, docstring_size=args.docstring_size)
+    uvicorn_server, base_url = serve_in_thread(mock)
+    os.environ["IVORYOS_URL"] = base_url
+    os.environ.setdefault("IVORYOS_CACHE_DIR", tempfile.mkdtemp(prefix="ivoryos-bench-"))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    import server
+
+    results = {
+        "version": {"git": _git_revision(), "python": platform.python_version(), "time": time.time()},
+        "config": vars(args),
+        "tools": asyncio.run(run_tools(server, args.calls, args.concurrency)),
+        "upstream": server.metrics.snapshot().get("upstream", {}),
+        "labview": run_labview(args.labview_clients, args.labview_messages, args.labview_rate,
+                               args.labview_requests),
+    }
+    uvicorn_server.should_exit = True
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
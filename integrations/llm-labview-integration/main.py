@@ -26,11 +26,16 @@ class AbstractSDL(ABC):
         self.logger = logging.getLogger(f"logger_name")
 
     # @prefect.task
-    def control_power_and_rate(self, power:float, flow:float) -> bool:
+    def control_power_and_rate(self, power:float, flow:float, timeout:float=0.0) -> bool:
+        """timeout > 0 waits for LabVIEW to acknowledge (echo the RequestId of) the command"""
         param_dict = {
             "Power": power,
             "Flow": flow
         }
+        if timeout > 0:
+            reply = chamber.call(param_dict, timeout=timeout)
+            self.logger.info(f"Deposition parameters set, LabVIEW replied {reply}")
+            return True
         chamber.send_json_to_labview(param_dict)
         self.logger.info("Deposition parameters set")
         return None
@@ -1,30 +1,707 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import math
+import os
+import queue
 import socket
+import struct
+import sys
 import threading
 import time
 import json
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import quote
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("labview_server")
+
+# structured fields appended to log lines (pass them with `extra=`)
+LOG_FIELDS = ("client_id", "message_id", "request_id", "size", "latency_ms", "suppressed")
+_listener = None
+
+
+class StructuredFormatter(logging.Formatter):
+    """Default format plus the record's LOG_FIELDS as key=value"""
+
+    def format(self, record):
+        text = super().format(record)
+        fields = " ".join(f"{k}={getattr(record, k)}" for k in LOG_FIELDS if hasattr(record, k))
+        return f"{text} {fields}" if fields else text
+
+
+def configure_logging(level=logging.INFO, handler=None):
+    """
+    Route labview_server logs through a queue to `handler` (stderr by default,
+    so an MCP stdio stream stays clean). Records are only enqueued by the
+    socket threads; a QueueListener thread formats and writes them.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(StructuredFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    records = queue.SimpleQueue()
+    for old in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+        logger.removeHandler(old)
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(level)
+    logger.propagate = False
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+class _RateLimiter:
+    """At most `rate` events per second; the rest are counted as suppressed"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.window_start = 0.0
+        self.count = 0
+        self.suppressed = 0
+
+    def allow(self):
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self.window_start, self.count = now, 0
+        self.count += 1
+        if self.count <= self.rate:
+            return True
+        self.suppressed += 1
+        return False
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies: 16 sub-buckets per power of two microseconds (<= ~6% error)"""
+
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        mantissa, exponent = math.frexp(max(seconds * 1e6, 1.0))
+        index = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound (seconds) of the bucket holding the q-th fraction of samples"""
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= q * self.count:
+                exponent, sub = divmod(index, self.SUB_BUCKETS)
+                return min((0.5 + (sub + 1) / (2 * self.SUB_BUCKETS)) * 2.0 ** exponent / 1e6, self.max)
+        return self.max
+
+
+class PathMetrics:
+    """Count, errors, bytes and latency of one path (receive, send or request/reply)"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+
+    def record(self, seconds, nbytes=0, error=False):
+        self.count += 1
+        self.errors += error
+        self.bytes += nbytes
+        self.latency.record(seconds)
+
+    def as_dict(self):
+        latency = self.latency
+        return {"count": self.count, "errors": self.errors, "bytes": self.bytes,
+                "mean_ms": round(latency.total / latency.count * 1000, 3) if latency.count else 0.0,
+                **{f"p{q}_ms": round(latency.quantile(q / 100) * 1000, 3) for q in (50, 95, 99)},
+                "max_ms": round(latency.max * 1000, 3)}
+
+
+class MessageFramer:
+    """
+    Split a TCP byte stream into complete messages.
+
+    Received bytes go straight into one reusable bytearray (via `recv_into`
+    on a memoryview), so a message larger than one recv is reassembled and
+    several small messages in one recv are split apart.
+
+    modes:
+        "newline"   messages end with \n (\r\n is accepted), LabVIEW "CRLF" read mode
+        "length"    each message is prefixed with a big-endian uint32 byte count,
+                    like LabVIEW's TCP Write of a length-prefixed flattened string
+    """
+
+    HEADER_SIZE = 4
+
+    def __init__(self, mode="newline", buffer_size=65536, max_message_size=16 * 1024 * 1024):
+        if mode not in ("newline", "length"):
+            raise ValueError(f"Unknown framing mode: {mode}")
+        self.mode = mode
+        self.recv_size = buffer_size
+        self.max_message_size = max_message_size
+        self.buffer = bytearray(buffer_size)
+        self.start = 0  # first unconsumed byte
+        self.end = 0    # end of received data
+        self.bytes_received = 0
+
+    def _reserve(self, size):
+        """Make room for `size` more bytes at the end of the buffer"""
+        if len(self.buffer) - self.end >= size:
+            return
+        pending = self.end - self.start
+        if self.start:
+            # move the partial message to the front instead of growing
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.start, self.end = 0, pending
+        if len(self.buffer) - self.end < size:
+            self.buffer.extend(bytes(max(size, len(self.buffer))))
+
+    def get_buffer(self, size=-1):
+        """Writable memoryview over the free space (for recv_into / asyncio.BufferedProtocol)"""
+        self._reserve(size if size > 0 else self.recv_size)
+        return memoryview(self.buffer)[self.end:]
+
+    def buffer_updated(self, nbytes):
+        """Account for `nbytes` written into the view returned by get_buffer"""
+        self.end += nbytes
+        self.bytes_received += nbytes
+
+    def recv_from(self, conn):
+        """Receive once from `conn` into the buffer, returns the byte count (0 on EOF)"""
+        n = conn.recv_into(self.get_buffer(), self.recv_size)
+        self.buffer_updated(n)
+        return n
+
+    def feed(self, data):
+        """Append already received bytes (e.g. from an asyncio transport)"""
+        self._reserve(len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+        self.bytes_received += len(data)
+
+    def messages(self):
+        """Yield every complete message currently buffered, as bytes"""
+        if self.mode == "newline":
+            yield from self._newline_messages()
+        else:
+            yield from self._length_messages()
+        if self.start == self.end:
+            self.start = self.end = 0
+
+    def _copy(self, start, end):
+        """buffer[start:end] as bytes, copied once (slicing the bytearray would copy twice)"""
+        with memoryview(self.buffer) as view:
+            return bytes(view[start:end])
+
+    def _newline_messages(self):
+        while True:
+            newline = self.buffer.find(b"\n", self.start, self.end)
+            if newline < 0:
+                if self.end - self.start > self.max_message_size:
+                    raise ValueError(f"Message exceeds {self.max_message_size} bytes without a newline")
+                return
+            end = newline - 1 if newline > self.start and self.buffer[newline - 1] == 13 else newline  # \r\n
+            message = self._copy(self.start, end)
+            self.start = newline + 1
+            if message:
+                yield message
+
+    def _length_messages(self):
+        while self.end - self.start >= self.HEADER_SIZE:
+            size = int.from_bytes(self.buffer[self.start:self.start + self.HEADER_SIZE], "big")
+            if size > self.max_message_size:
+                raise ValueError(f"Message of {size} bytes exceeds {self.max_message_size} bytes")
+            body = self.start + self.HEADER_SIZE
+            if self.end - body < size:
+                return
+            message = self._copy(body, body + size)
+            self.start = body + size
+            yield message
+
+    def encode(self, payload):
+        """Frame an outgoing payload (bytes) for the configured mode"""
+        if self.mode == "newline":
+            return payload if payload.endswith(b"\n") else payload + b"\n"
+        return len(payload).to_bytes(self.HEADER_SIZE, "big") + payload
+
+
+class JsonCodec:
+    """UTF-8 JSON objects (the default)"""
+
+    name = "json"
+    binary = False
+
+    def decode(self, message):
+        return json.loads(message)
+
+    def encode(self, data):
+        return json.dumps(data).encode("utf-8")
+
+    def describe(self, payload):
+        return payload.decode("utf-8").rstrip("\n")
+
+
+class BinaryCodec:
+    """
+    Named float64 arrays in the layout LabVIEW's Flatten To String produces
+    for an array of clusters {String name, 1D DBL array values} with
+    "prepend array or string size" set:
+
+        int32 field count, then per field:
+        int32 name length, UTF-8 name, int32 value count, float64 values
+
+    byte_order "<" matches Flatten To String with byte order "little-endian"
+    (the default here), ">" its default big-endian order. Arrays are
+    numpy.frombuffer views of the received message (no parsing, no copy
+    beyond the framer's one copy of each message);
+    single-value arrays decode as floats so scalars such as a RequestId work
+    as with JSON. Needs length-prefixed framing.
+    """
+
+    name = "binary"
+    binary = True
+
+    def __init__(self, byte_order="<"):
+        if np is None:
+            raise ImportError("The binary codec needs numpy")
+        self.int32 = struct.Struct(byte_order + "i")
+        self.float64 = np.dtype(byte_order + "f8")
+
+    def decode(self, message):
+        unpack = self.int32.unpack_from
+        size = self.int32.size
+        (count,), pos = unpack(message, 0), size
+        data = {}
+        for _ in range(count):
+            (length,), pos = unpack(message, pos), pos + size
+            name, pos = bytes(message[pos:pos + length]).decode("utf-8"), pos + length
+            (n,), pos = unpack(message, pos), pos + size
+            if n < 0 or pos + 8 * n > len(message):
+                raise ValueError(f"Truncated array {name!r} in binary message")
+            values = np.frombuffer(message, dtype=self.float64, count=n, offset=pos)
+            data[name] = float(values[0]) if n == 1 else values
+            pos += 8 * n
+        return data
+
+    def encode(self, data):
+        parts = [self.int32.pack(len(data))]
+        for name, value in data.items():
+            values = np.asarray(value, dtype=self.float64).ravel()
+            encoded = str(name).encode("utf-8")
+            parts += [self.int32.pack(len(encoded)), encoded, self.int32.pack(len(values)), values.tobytes()]
+        return b"".join(parts)
+
+    def describe(self, payload):
+        return f"<{len(payload)} bytes binary>"
+
+
+CODECS = {"json": JsonCodec, "binary": BinaryCodec}
+
+
+class TelemetryBuffer:
+    """
+    Time series of every numeric field received from LabVIEW.
+
+    One preallocated NumPy ring buffer per field (plus one of timestamps) holds
+    the last `capacity` samples; a field missing from a message is NaN for that
+    sample. With `path`, samples are also appended to raw float64 files
+    (`time.f64`, `<field>.f64`) in that directory, readable with history().
+    """
+
+    def __init__(self, capacity=100_000, path=None, max_fields=64, flush_every=256):
+        self.capacity = capacity
+        self.max_fields = max_fields
+        self.times = np.full(capacity, np.nan)
+        self.fields = {}
+        self.count = 0
+        self.lock = threading.Lock()
+        self.path = path
+        self.flush_every = flush_every
+        self._unflushed = 0
+        self._persisted = 0
+        if path:
+            os.makedirs(path, exist_ok=True)
+            time_file = os.path.join(path, "time.f64")
+            self._persisted = os.path.getsize(time_file) // 8 if os.path.exists(time_file) else 0
+
+    def append(self, data, timestamp=None):
+        """Store the numeric values of one parsed message"""
+        values = {k: v for k, v in data.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        if not values:
+            return
+        with self.lock:
+            i = self.count % self.capacity
+            self.times[i] = time.time() if timestamp is None else timestamp
+            for name, column in self.fields.items():
+                column[i] = values.pop(name, np.nan)
+            for name, value in values.items():
+                if len(self.fields) >= self.max_fields:
+                    break
+                column = self.fields[name] = np.full(self.capacity, np.nan)
+                column[i] = value
+            self.count += 1
+            self._unflushed += 1
+            if self.path and (self._unflushed >= self.flush_every or self._unflushed >= self.capacity):
+                self._flush()
+
+    def _segments(self):
+        """Index ranges of the ring in chronological order"""
+        if self.count <= self.capacity:
+            return [(0, self.count)]
+        head = self.count % self.capacity
+        return [(head, self.capacity), (0, head)]
+
+    def window(self, seconds=None, start=None, end=None, fields=None):
+        """(times, {field: values}) of the samples with start <= time <= end, oldest first"""
+        if seconds is not None:
+            end = time.time() if end is None else end
+            start = end - seconds
+        with self.lock:
+            names = [f for f in (fields or self.fields) if f in self.fields]
+            parts = []
+            for lo, hi in self._segments():
+                t = self.times[lo:hi]
+                a = lo + (np.searchsorted(t, start, "left") if start is not None else 0)
+                b = lo + (np.searchsorted(t, end, "right") if end is not None else hi - lo)
+                parts.append((a, b))
+            times = np.concatenate([self.times[a:b] for a, b in parts])
+            columns = {name: np.concatenate([self.fields[name][a:b] for a, b in parts]) for name in names}
+        return times, columns
+
+    def downsample(self, seconds=60.0, points=100, fields=None):
+        """Mean of each field over `points` equal time bins of the last `seconds`"""
+        end = time.time()
+        times, columns = self.window(seconds, end=end, fields=fields)
+        edges = np.linspace(end - seconds, end, points + 1)
+        bins = np.clip(np.searchsorted(edges, times, "right") - 1, 0, points - 1)
+        result = {"time": ((edges[:-1] + edges[1:]) / 2)}
+        for name, values in columns.items():
+            valid = ~np.isnan(values)
+            counts = np.bincount(bins[valid], minlength=points)
+            sums = np.bincount(bins[valid], weights=values[valid], minlength=points)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result[name] = sums / counts
+        return result
+
+    def summary(self, seconds=10.0, fields=None):
+        """count/last/mean/std/min/max per field over the last `seconds`"""
+        times, columns = self.window(seconds, fields=fields)
+        stats = {}
+        for name, values in columns.items():
+            values = values[~np.isnan(values)]
+            if len(values):
+                stats[name] = {"count": int(len(values)), "last": float(values[-1]),
+                               "mean": float(values.mean()), "std": float(values.std()),
+                               "min": float(values.min()), "max": float(values.max())}
+        span = float(times[-1] - times[0]) if len(times) > 1 else 0.0
+        return {"seconds": seconds, "samples": int(len(times)),
+                "rate_hz": round((len(times) - 1) / span, 2) if span else 0.0, "fields": stats}
+
+    def _flush(self):
+        """Append the samples not yet on disk (caller holds the lock)"""
+        n = min(self._unflushed, self.capacity)
+        index = (np.arange(self.count - n, self.count)) % self.capacity
+        with open(os.path.join(self.path, "time.f64"), "ab") as f:
+            f.write(self.times[index].tobytes())
+        for name, column in self.fields.items():
+            file = self._file(name)
+            with open(file, "ab") as f:
+                missing = self._persisted - (os.path.getsize(file) // 8 if os.path.exists(file) else 0)
+                if missing > 0:  # field first seen after earlier flushes
+                    f.write(np.full(missing, np.nan).tobytes())
+                f.write(column[index].tobytes())
+        self._persisted += n
+        self._unflushed = 0
+
+    def _file(self, field):
+        return os.path.join(self.path, quote(field, safe="") + ".f64")
+
+    def flush(self):
+        if self.path:
+            with self.lock:
+                if self._unflushed:
+                    self._flush()
+
+    def history(self, field):
+        """(times, values) of every persisted sample, memory-mapped from disk"""
+        self.flush()
+        times = np.memmap(os.path.join(self.path, "time.f64"), dtype=np.float64, mode="r")
+        file = self._file(field)
+        values = np.memmap(file, dtype=np.float64, mode="r") if os.path.exists(file) else np.empty(0)
+        return times[:len(values)], values
+
+
+class MessageDeduplicator:
+    """
+    Skip messages already seen among the last `window` distinct ones.
+
+    keys: JSON fields that make two messages equal (None: the whole message),
+        so e.g. a changing "Timestamp" does not defeat dedup
+    window: number of recent digests (LRU) a message is compared against;
+        1 only drops repeats of the previous message
+    max_age: seconds after which a repeated message is processed again
+    Digests are 128-bit blake2b; replies carrying a RequestId always pass.
+    """
+
+    def __init__(self, keys=None, window=1, max_age=None):
+        self.keys = tuple(keys) if keys else None
+        self.window = max(int(window), 1)
+        self.max_age = max_age
+        self.recent = OrderedDict()  # digest -> time it was last processed
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, message, data=None):
+        if self.keys is not None and isinstance(data, dict):
+            message = json.dumps([data.get(k) for k in self.keys], separators=(",", ":"),
+                                 default=lambda v: v.tolist() if hasattr(v, "tolist") else str(v)).encode()
+        return hashlib.blake2b(message, digest_size=16).digest()
+
+    def is_duplicate(self, message, data=None):
+        """True if `message` (bytes, `data` its parsed JSON when keys are set) was seen recently"""
+        if isinstance(data, dict) and "RequestId" in data:
+            self.misses += 1
+            return False
+        key = self.digest(message, data)
+        now = time.monotonic()
+        seen = self.recent.get(key)
+        if seen is not None and (self.max_age is None or now - seen <= self.max_age):
+            self.recent.move_to_end(key)
+            self.hits += 1
+            return True
+        self.recent[key] = now
+        self.recent.move_to_end(key)
+        if len(self.recent) > self.window:
+            self.recent.popitem(last=False)
+        self.misses += 1
+        return False
+
+
+class LabVIEWClient:
+    """State of one connected LabVIEW VI"""
+
+    def __init__(self, client_id, address, framer, send, dedup):
+        self.client_id = client_id
+        self.address = address
+        self.framer = framer
+        self.send = send  # callable writing framed bytes to this client
+        self.dedup = dedup
+        self.transport = None
+        self.connected_at = time.time()
+        self.message_count = 0
+        self.unique_message_count = 0
+        self.last_received_parameters = ""
+        self.state = {}  # latest value of every field this client sent (replies to requests excluded)
+        self.last_message = {}  # fields of the last message this client sent (replies excluded)
+
+    def info(self):
+        return {
+            "client_id": self.client_id,
+            "address": f"{self.address[0]}:{self.address[1]}",
+            "connected_for": round(time.time() - self.connected_at, 1),
+            "messages": self.message_count,
+            "unique_messages": self.unique_message_count,
+        }
+
+
+class SendQueue:
+    """
+    Bounded queue of framed outgoing messages for one destination (a client id,
+    or None for "the only connected client"; once several are connected, the
+    one connected longest).
+
+    Entries are (framed bytes, enqueue time, RequestId or None); the flusher
+    writes everything queued for a destination with one send() call and puts
+    the batch back in front of the queue if that fails, so it is resent once
+    the VI reconnects (at least once: a partly written batch is sent again).
+    Messages count as sent, and their flush latency is taken, once the write
+    completed.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.requeued = 0
+        self.flushes = 0
+        self.max_depth = 0
+        self.flush_latency = LatencyHistogram()  # enqueue -> written
+
+    def full(self):
+        return len(self.items) >= self.maxsize
+
+    def stats(self):
+        latency = self.flush_latency
+        return {"depth": len(self.items), "max_depth": self.max_depth, "enqueued": self.enqueued,
+                "sent": self.sent, "dropped": self.dropped, "requeued": self.requeued, "flushes": self.flushes,
+                "messages_per_flush": round(self.sent / self.flushes, 2) if self.flushes else 0.0,
+                **{f"flush_p{q}_ms": round(latency.quantile(q / 100) * 1000, 3) for q in (50, 95, 99)}}
+
+
+class _LabVIEWProtocol(asyncio.BufferedProtocol):
+    """
+    asyncio protocol feeding one client's framer; the kernel copies straight into its buffer.
+
+    Writes use asyncio flow control with a zero high-water mark: a write the
+    socket does not take at once pauses the protocol, and write() returns
+    only after resume_writing (the transport buffer drained into the kernel),
+    so the flusher moves on at the VI's pace and a full queue pushes back on
+    senders. write() raises ConnectionError if the connection is lost first.
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.client = None
+        self.closed = False
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def connection_made(self, transport):
+        transport.set_write_buffer_limits(high=0, low=0)
+        self.client = self.device._register_async_client(transport, self)
+
+    def pause_writing(self):
+        self.writable.clear()
+
+    def resume_writing(self):
+        self.writable.set()
+
+    async def write(self, data):
+        if self.closed or self.client.transport.is_closing():
+            raise ConnectionError(f"LabVIEW {self.client.client_id} disconnected")
+        self.client.transport.write(data)
+        await self.writable.wait()
+        if self.closed:
+            raise ConnectionError(f"LabVIEW {self.client.client_id} disconnected before the data was written")
+
+    def get_buffer(self, sizehint):
+        return self.client.framer.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.client.framer.buffer_updated(nbytes)
+        try:
+            for message in self.client.framer.messages():
+                self.device._handle_message(message, self.client)
+        except Exception as e:
+            logger.error("❌ Connection error: %s", e, extra={"client_id": self.client.client_id})
+            self.client.transport.close()
+
+    def connection_lost(self, exc):
+        self.closed = True
+        self.writable.set()  # wake a pending write(), which then fails
+        self.device._unregister_client(self.client)
+        self.device._fail_pending(self.client)
+
 
 class LabVIEWServerDevice:
     """
     TCP Server with duplicate detection and JSON handling
+
+    framing: "newline" (default) or "length", see MessageFramer
+    multi_client: serve many LabVIEW VIs on one port from a single asyncio
+        event loop thread; outgoing messages are routed by client id
+        ("host:port", or the "ClientId" a VI sends in its JSON)
+
+    Commands sent with request()/call() carry a "RequestId"; a VI that echoes
+    it in its reply resolves the matching pending request, so many commands
+    can be in flight on one connection.
+
+    Numeric fields of received JSON are kept in a TelemetryBuffer of
+    `telemetry_capacity` samples (needs numpy; persisted to `telemetry_path`
+    if given).
+
+    dedup_keys/dedup_window/dedup_max_age configure the MessageDeduplicator
+    of each connection (default: drop exact repeats of the previous message).
+
+    codec: "json" (default), "binary" (see BinaryCodec) or an object with
+    decode/encode/describe and a `binary` flag.
+
+    Logs go to the "labview_server" logger (see configure_logging); per-message
+    DEBUG logs are limited to `debug_rate` per second.
+
+    Outgoing messages go through a SendQueue per destination holding up to
+    `send_queue_size` messages; a flusher thread coalesces them into one write
+    per destination. When a queue is full, send_policy="block" waits up to
+    `send_timeout` seconds for room and "drop" discards the oldest message.
+    Messages queued while LabVIEW is disconnected are sent after it reconnects.
+    With multi_client, writes wait for the VI's socket (asyncio flow control,
+    see _LabVIEWProtocol), so a slow VI pushes back on senders.
     """
     
-    def __init__(self, host='localhost', port=9999, buffer_size=1024):
+    def __init__(self, host='localhost', port=9999, buffer_size=65536, framing="newline", multi_client=False,
+                 telemetry_capacity=100_000, telemetry_path=None, dedup_keys=None, dedup_window=1,
+                 dedup_max_age=None, codec="json", debug_rate=20, send_queue_size=1024, send_policy="block",
+                 send_timeout=5.0, max_batch_bytes=1 << 20):
         self.host = host
         self.port = port
         self.buffer_size = buffer_size
+        self.framing = framing
+        self.multi_client = multi_client
+        self.dedup_keys = dedup_keys
+        self.dedup_window = dedup_window
+        self.dedup_max_age = dedup_max_age
+        self.codec = CODECS[codec]() if isinstance(codec, str) else codec
+        if self.codec.binary and framing != "length":
+            raise ValueError(f"The {self.codec.name} codec needs framing='length'")
+        self.framer = None
         self.server_socket = None
         self.connection = None
         self.connected = False
         self.listening = False
         self.server_thread = None
+        self.clients = {}
+        self.loop = None
+        self.async_server = None
         self.last_received_parameters = ""
         self.last_sent_parameters = ""
-        self.last_data_hash = None  # Track duplicate data
+        self.state = {}  # latest value of every field received from LabVIEW (replies to requests excluded)
+        self.last_message = {}  # fields of the last message received from LabVIEW (replies excluded)
+        self.pending = {}  # RequestId -> (Future, LabVIEWClient)
+        self._request_ids = itertools.count(1)
+        self.telemetry = TelemetryBuffer(telemetry_capacity, telemetry_path) if np is not None else None
+        self._debug_limiter = _RateLimiter(debug_rate)
+        # receive: handling time per message, send: time in send() per flush, request: request() to reply
+        self.metrics = {"receive": PathMetrics(), "send": PathMetrics(), "request": PathMetrics()}
+        if send_policy not in ("block", "drop"):
+            raise ValueError(f"Unknown send_policy {send_policy!r}, use 'block' or 'drop'")
+        self.send_queue_size = send_queue_size
+        self.send_policy = send_policy
+        self.send_timeout = send_timeout
+        self.max_batch_bytes = max_batch_bytes
+        self.send_queues = {}  # destination client id (None: the only client) -> SendQueue
+        self._send_framer = MessageFramer(framing)
+        self._send_condition = threading.Condition()
+        self._flusher = None
+        self._drop_limiter = _RateLimiter(1)
         self.message_count = 0
         self.unique_message_count = 0
         
     def start_server(self):
         """Start the TCP server to listen for LabVIEW connections"""
+        if not logger.handlers:
+            configure_logging()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        if self.multi_client:
+            return self._start_async_server()
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -32,7 +709,7 @@ class LabVIEWServerDevice:
             self.server_socket.listen(1)
             self.listening = True
             
-            print(f"✅ Server listening on {self.host}:{self.port}")
+            logger.info("✅ Server listening on %s:%s", self.host, self.port)
             
             self.server_thread = threading.Thread(target=self._server_loop)
             self.server_thread.daemon = True
@@ -41,69 +718,211 @@ class LabVIEWServerDevice:
             return True
             
         except Exception as e:
-            print(f"❌ Failed to start server: {e}")
+            logger.error("❌ Failed to start server: %s", e)
             return False
+
+    def _start_async_server(self):
+        """Run an asyncio server for many clients in one background thread"""
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        self.server_thread = threading.Thread(target=self._run_event_loop, args=(ready,))
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        ready.wait(timeout=5)
+        return self.listening
+
+    def _run_event_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.async_server = self.loop.run_until_complete(self.loop.create_server(
+                lambda: _LabVIEWProtocol(self), self.host, self.port, reuse_address=True))
+            self.listening = True
+            logger.info("✅ Server listening on %s:%s (multi-client)", self.host, self.port)
+        except Exception as e:
+            logger.error("❌ Failed to start server: %s", e)
+            return
+        finally:
+            ready.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            # let connection_lost callbacks of the closed transports run
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+
+    def _register_async_client(self, transport, protocol):
+        address = transport.get_extra_info("peername")[:2]
+        loop = self.loop
+
+        def send(data):
+            """Hand `data` to the event loop; the returned future completes once it was written (or failed)"""
+            return asyncio.run_coroutine_threadsafe(protocol.write(data), loop)
+
+        client = self._new_client(address, send)
+        client.transport = transport
+        self.clients[client.client_id] = client
+        self.connected = True
+        logger.info("🔌 LabVIEW connected from %s", address, extra={"client_id": client.client_id})
+        self._wake_flusher()
+        return client
+
+    def _new_client(self, address, send):
+        return LabVIEWClient(f"{address[0]}:{address[1]}", address, MessageFramer(self.framing, self.buffer_size),
+                             send, MessageDeduplicator(self.dedup_keys, self.dedup_window, self.dedup_max_age))
+
+    def _unregister_client(self, client):
+        if self.clients.get(client.client_id) is client:
+            del self.clients[client.client_id]
+        self.connected = bool(self.clients)
+        logger.info("🔌 LabVIEW disconnected", extra={"client_id": client.client_id})
+
+    def _rename_client(self, client, client_id):
+        """Register a client under the id it announced (a reconnecting VI replaces its old entry)"""
+        if client.client_id == client_id:
+            return
+        with self._send_condition:
+            old_id = client.client_id
+            if self.clients.get(old_id) is client:
+                del self.clients[old_id]
+            client.client_id = client_id
+            self.clients[client_id] = client
+            # messages queued for the address the client connected from follow it to its new id
+            q = self.send_queues.pop(old_id, None)
+            if q is not None:
+                self._merge_queue(client_id, q)
+            self._send_condition.notify_all()
+
+    def _merge_queue(self, client_id, q):
+        """Move the messages and counters of `q` into the queue of `client_id` (in enqueue order); holds _send_condition"""
+        target = self.send_queues.get(client_id)
+        if target is None:
+            self.send_queues[client_id] = q
+            return
+        target.items = deque(sorted([*target.items, *q.items], key=lambda entry: entry[1]))
+        for counter in ("enqueued", "sent", "dropped", "requeued", "flushes"):
+            setattr(target, counter, getattr(target, counter) + getattr(q, counter))
+        target.max_depth = max(target.max_depth, q.max_depth, len(target.items))
+        q.items.clear()
     
     def _server_loop(self):
         """Main server loop - handles LabVIEW connections"""
         while self.listening:
             try:
-                print("🔄 Waiting for LabVIEW connection...")
+                logger.info("🔄 Waiting for LabVIEW connection...")
                 conn, addr = self.server_socket.accept()
+                client = self._new_client(addr, conn.sendall)
+                self.clients = {client.client_id: client}
+                self.framer = client.framer
                 self.connection = conn
                 self.connected = True
-                print(f"🔌 LabVIEW connected from {addr}")
+                logger.info("🔌 LabVIEW connected from %s", addr, extra={"client_id": client.client_id})
+                self._wake_flusher()
                 
-                self._handle_connection(conn)
+                self._handle_connection(conn, client)
                 
             except Exception as e:
                 if self.listening:
-                    print(f"⚠️ Server error: {e}")
+                    logger.warning("⚠️ Server error: %s", e)
                 break
     
-    def _handle_connection(self, conn):
+    def _handle_connection(self, conn, client):
         """Handle commands from LabVIEW with duplicate detection"""
         try:
             while self.connected and self.listening:
-                data = conn.recv(self.buffer_size)
-                if not data:
+                if not client.framer.recv_from(conn):
                     break
-                    
-                raw_message = data.decode("utf-8").strip()
-                self.message_count += 1
-                
-                # Check for duplicates
-                current_hash = hash(raw_message)
-                is_duplicate = (current_hash == self.last_data_hash)
-                
-                if not is_duplicate:
-                    self.unique_message_count += 1
-                    self.last_data_hash = current_hash
-                    self.last_received_parameters = raw_message
-                    
-                    print(f"📨 Message #{self.message_count} (Unique #{self.unique_message_count}): {raw_message[:100]}...")
-                    
-                    # Process the new message
-                    response = self._process_message(raw_message)
-                    if response:
-                        self.last_sent_parameters = response
-                        print(f"📤 Response sent: {response}")
-                else:
-                    # Just acknowledge duplicate without processing
-                    print(f"🔄 Duplicate message #{self.message_count} (ignoring)")
+                for message in client.framer.messages():
+                    self._handle_message(message, client)
                 
         except Exception as e:
-            print(f"❌ Connection error: {e}")
+            logger.error("❌ Connection error: %s", e, extra={"client_id": client.client_id})
         finally:
             conn.close()
+            self.clients = {}
             self.connected = False
-            print("🔌 LabVIEW disconnected")
+            self._fail_pending(client)
+            logger.info("🔌 LabVIEW disconnected", extra={"client_id": client.client_id})
+
+    def _handle_message(self, message, client):
+        """Handle one complete (framed) message from LabVIEW"""
+        start = time.perf_counter()
+        self.message_count += 1
+        client.message_count += 1
+
+        data = None
+        if self.codec.binary:
+            try:
+                data = self.codec.decode(message)
+            except (ValueError, struct.error) as e:
+                logger.error("❌ Invalid %s message: %s", self.codec.name, e,
+                             extra={"client_id": client.client_id, "message_id": self.message_count,
+                                    "size": len(message)})
+                self.metrics["receive"].record(time.perf_counter() - start, len(message), error=True)
+                return
+            raw_message = f"{self.codec.describe(message)} {list(data)}"
+        else:
+            message = message.strip()
+            raw_message = message.decode("utf-8")
+            # key projection needs the parsed message
+            if self.dedup_keys:
+                try:
+                    data = self.codec.decode(raw_message)
+                except ValueError:
+                    pass
+
+        # Check for duplicates (per connection)
+        is_duplicate = client.dedup.is_duplicate(message, data)
+
+        if not is_duplicate:
+            self.unique_message_count += 1
+            client.unique_message_count += 1
+            client.last_received_parameters = raw_message
+            self.last_received_parameters = raw_message
+
+            # Process the new message
+            response = self._process_message(raw_message, client, data)
+            if response:
+                self.last_sent_parameters = response
+            self._debug("📨 Message (unique #%d): %.100s", self.unique_message_count, raw_message,
+                        client_id=client.client_id, message_id=self.message_count, size=len(message),
+                        latency_ms=round((time.perf_counter() - start) * 1000, 3))
+        else:
+            # Just acknowledge duplicate without processing
+            self._debug("🔄 Duplicate message (ignoring)", client_id=client.client_id,
+                        message_id=self.message_count, size=len(message))
+        self.metrics["receive"].record(time.perf_counter() - start, len(message))
+
+    def _debug(self, msg, *args, **fields):
+        """Per-message debug log: skipped unless DEBUG is enabled, and rate-limited"""
+        if logger.isEnabledFor(logging.DEBUG) and self._debug_limiter.allow():
+            if self._debug_limiter.suppressed:
+                fields["suppressed"], self._debug_limiter.suppressed = self._debug_limiter.suppressed, 0
+            logger.debug(msg, *args, extra=fields)
     
-    def _process_message(self, message):
+    def _process_message(self, message, client=None, data=None):
         """Process new (non-duplicate) messages"""
         try:
             # Try to parse as JSON first
-            data = json.loads(message.strip())
+            if data is None:
+                data = self.codec.decode(message.strip())
+            if isinstance(data, dict):
+                request_id = data.pop("RequestId", None)
+                if client is not None and "ClientId" in data:
+                    self._rename_client(client, str(data["ClientId"]))
+                if request_id is not None:
+                    # a reply goes to its caller only, its fields are not the VI's state
+                    self._resolve(request_id, data)
+                    return None
+                self.state.update(data)
+                self.last_message = data
+                if self.telemetry is not None:
+                    self.telemetry.append(data)
+                if client is not None:
+                    client.state.update(data)
+                    client.last_message = data
+            if self.codec.binary:
+                return None
             return self._process_json_data(data)
         except json.JSONDecodeError:
             # Not JSON, just echo back
@@ -134,13 +953,63 @@ class LabVIEWServerDevice:
         return {
             "total_messages": self.message_count,
             "unique_messages": self.unique_message_count,
-            "duplicate_messages": self.message_count - self.unique_message_count
+            "duplicate_messages": self.message_count - self.unique_message_count,
+            "dedup_hit_rate": round((self.message_count - self.unique_message_count) / self.message_count, 4)
+            if self.message_count else 0.0,
+            "dedup": {"keys": list(self.dedup_keys or []), "window": self.dedup_window,
+                      "max_age": self.dedup_max_age},
+            "clients": len(self.clients),
+            "pending_requests": len(self.pending),
+            "queued_messages": sum(len(q.items) for q in list(self.send_queues.values()))
         }
+
+    def get_metrics(self) -> dict:
+        """Count, errors, bytes and p50/p95/p99 latency of the receive, send and request/reply paths"""
+        return {**{path: metrics.as_dict() for path, metrics in self.metrics.items()},
+                "send_queues": self.get_send_queue_stats()}
+
+    def get_send_queue_stats(self) -> dict:
+        """Depth, drops, resends, messages per flush and enqueue-to-write latency of every send queue"""
+        with self._send_condition:
+            return {str(key) if key is not None else "default": q.stats() for key, q in self.send_queues.items()}
+
+    def get_clients(self):
+        """Connected LabVIEW clients and their message counts"""
+        return [client.info() for client in list(self.clients.values())]
+
+    def _find_client(self, client_id=None):
+        """Destination of a send queue: the client `client_id`, or for None the client connected longest
+        (messages queued while at most one VI was connected are not held back by a second one)"""
+        clients = list(self.clients.values())
+        if client_id is not None:
+            return self.clients.get(client_id)
+        return min(clients, key=lambda client: client.connected_at, default=None)
+
+    def _get_client(self, client_id=None):
+        """Client addressed by `client_id`, or the only connected one"""
+        clients = dict(self.clients)
+        if client_id is not None:
+            client = clients.get(client_id)
+            if client is None:
+                logger.error("❌ Unknown LabVIEW client %s, connected: %s", client_id, list(clients))
+            return client
+        if not clients:
+            logger.error("❌ Not connected to LabVIEW")
+            return None
+        if len(clients) > 1:
+            logger.error("❌ %d LabVIEW clients connected, pass client_id (one of %s)", len(clients), list(clients))
+            return None
+        return next(iter(clients.values()))
     
     def stop_server(self):
         """Stop the TCP server"""
         self.listening = False
         self.connected = False
+        self._flusher = None
+        self._wake_flusher()
+
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._shutdown_async_server)
         
         if self.connection:
             try:
@@ -153,8 +1022,17 @@ class LabVIEWServerDevice:
                 self.server_socket.close()
             except:
                 pass
+
+        if self.telemetry is not None:
+            self.telemetry.flush()
                 
-        print("🛑 Server stopped")
+        logger.info("🛑 Server stopped")
+
+    def _shutdown_async_server(self):
+        self.async_server.close()
+        for client in list(self.clients.values()):
+            client.transport.close()
+        self.loop.stop()
     
     def is_connected(self):
         return self.connected
@@ -168,83 +1046,264 @@ class LabVIEWServerDevice:
     def get_last_sent_command(self):
         return self.last_sent_parameters
     
-    def _get_dict_from_last_received_parameters(self) -> dict:
-        """Convert last command JSON to dict"""
-        try:
-            data = json.loads(self.last_received_parameters.rstrip("\\n").strip())
-            return data
-        except:
-            return None
+    def _get_last_message(self, client_id=None) -> dict:
+        """Fields of the last received message (of one client, if given), parsed once on arrival"""
+        if client_id is None:
+            return self.last_message
+        client = self.clients.get(client_id)
+        return client.last_message if client else None
         
-    def read_value_from_labview(self, value_type="command"):
-        """Read a value/command from LabVIEW"""
-        if not self.connected or not self.connection:
-            print("❌ Not connected to LabVIEW")
+    def read_value_from_labview(self, value_type="command", client_id=None):
+        """Read a value/command from LabVIEW (latest message of any client unless client_id is given)"""
+        if not self.connected:
+            logger.error("❌ Not connected to LabVIEW")
             return None
         
         try:
-            data = self._get_dict_from_last_received_parameters()
+            data = self._get_last_message(client_id)
             entry = data.get(value_type, None) if data else None
             if entry is not None:
-                print(f"📥 Read from LabVIEW: {entry}")
+                logger.debug("📥 Read from LabVIEW: %s=%s", value_type, entry)
                 return entry
             else:
-                print(f"⚠️ No 'Entry' found in last command, data was: {data}")
+                logger.warning("⚠️ No %r found in the last message: %s", value_type, data)
             
         except Exception as e:
-            print(f"❌ Failed to read from LabVIEW: {e}")
+            logger.error("❌ Failed to read from LabVIEW: %s", e)
             self.connected = False
             return None
         
-    def _send_to_labview(self, text: str) -> bool:
-        """Low-level: send a newline-terminated UTF-8 message to LabVIEW."""
-        if not self.connected or not self.connection:
-            print("❌ Not connected to LabVIEW")
+    def _send_to_labview(self, text, client_id=None, request_id=None) -> bool:
+        """Low-level: queue a UTF-8 message or encoded payload for LabVIEW, framed (newline-terminated or length-prefixed).
+        Returns False only when it could not be queued (ambiguous destination, or no room within send_timeout)."""
+        if client_id is None and len(self.clients) > 1:
+            self._get_client(client_id)  # logs the ambiguity
             return False
+        payload = self._send_framer.encode(text.encode("utf-8") if isinstance(text, str) else text)
+        with self._send_condition:
+            q = self.send_queues.get(client_id)
+            if q is None:
+                q = self.send_queues[client_id] = SendQueue(self.send_queue_size)
+            if q.full():
+                if self.send_policy == "block":
+                    # the event loop thread must not wait: the flusher needs it to write
+                    on_loop = self.multi_client and threading.current_thread() is self.server_thread
+                    if on_loop or not self._send_condition.wait_for(lambda: not q.full(), self.send_timeout):
+                        self.metrics["send"].record(self.send_timeout, error=True)
+                        logger.error("❌ Send queue full for %.1fs, message not sent", self.send_timeout,
+                                     extra={"client_id": client_id})
+                        return False
+                else:
+                    q.items.popleft()
+                    q.dropped += 1
+                    if self._drop_limiter.allow():
+                        logger.warning("⚠️ Send queue full, dropped the oldest message",
+                                       extra={"client_id": client_id, "suppressed": self._drop_limiter.suppressed})
+            q.items.append((payload, time.perf_counter(), request_id))
+            q.enqueued += 1
+            q.max_depth = max(q.max_depth, len(q.items))
+            self._send_condition.notify_all()
+        self.last_sent_parameters = text.rstrip("\n") if isinstance(text, str) else self.codec.describe(text)
+        self._debug("📤 Queued for LabVIEW: %.100s", self.last_sent_parameters, client_id=client_id)
+        return True
+
+    def _wake_flusher(self):
+        with self._send_condition:
+            self._send_condition.notify_all()
+
+    def _take_batches(self):
+        """(client, queue, entries) for every queue whose destination is connected"""
+        batches = []
+        for key, q in self.send_queues.items():
+            if not q.items:
+                continue
+            client = self._find_client(key)
+            if client is None or (client.transport is not None and client.transport.is_closing()):
+                continue
+            entries, size = [], 0
+            while q.items and (not entries or size + len(q.items[0][0]) <= self.max_batch_bytes):
+                entry = q.items.popleft()
+                entries.append(entry)
+                size += len(entry[0])
+            batches.append((client, q, entries))
+        return batches
+
+    def _flush_loop(self):
+        """Write queued messages, coalescing everything queued for one client into one send()"""
+        me = threading.current_thread()
+        retry = False
+        while True:
+            with self._send_condition:
+                if retry:  # after a failed write, until a (re)connection or 0.5 s
+                    self._send_condition.wait(0.5)
+                if self._flusher is not me:
+                    return
+                batches = self._take_batches()
+                if not batches:
+                    # woken by new messages, (re)connections and stop_server
+                    self._send_condition.wait(0.5)
+                    retry = False
+                    continue
+                self._send_condition.notify_all()  # room for blocked senders
+            retry = False
+            writes = []
+            for client, q, entries in batches:
+                # requests that already failed or timed out are not sent
+                entries = [e for e in entries if e[2] is None or e[2] in self.pending]
+                if not entries:
+                    continue
+                data = b"".join(e[0] for e in entries)
+                start = time.perf_counter()
+                try:
+                    # a Future for asyncio clients (written concurrently), None once a blocking send returned
+                    writes.append((client, q, entries, len(data), start, client.send(data)))
+                except Exception as e:
+                    self._requeue(client, q, entries, start, e)
+                    retry = True
+            for client, q, entries, size, start, pending in writes:
+                try:
+                    while pending is not None and not self._wait_written(pending, me):
+                        pass
+                except Exception as e:
+                    self._requeue(client, q, entries, start, e)
+                    retry = True
+                    continue
+                now = time.perf_counter()
+                self.metrics["send"].record(now - start, size)
+                with self._send_condition:
+                    q.sent += len(entries)
+                    q.flushes += 1
+                    for entry in entries:
+                        q.flush_latency.record(now - entry[1])
+
+    def _wait_written(self, pending, me):
+        """Wait up to 0.5 s for an asyncio write; raises once stop_server replaced the flusher"""
         try:
-            if not text.endswith("\n"):
-                text += "\n"
-            self.connection.sendall(text.encode("utf-8"))
-            self.last_sent_parameters = text.rstrip("\n")
-            print(f"📤 Sent to LabVIEW: {self.last_sent_parameters}")
+            pending.result(timeout=0.5)
             return True
-        except Exception as e:
-            print(f"❌ Failed to send to LabVIEW: {e}")
-            self.connected = False
+        except FutureTimeoutError:
+            if self._flusher is not me:
+                raise ConnectionError("Server stopped before the data was written")
             return False
-        
-    def send_json_to_labview(self, data: dict) -> bool:
-        """Send a JSON message to LabVIEW."""
+
+    def _requeue(self, client, q, entries, start, error):
+        """Put a batch that could not be written back in front of its queue"""
+        self.metrics["send"].record(time.perf_counter() - start, error=True)
+        logger.error("❌ Failed to send to LabVIEW, %d messages kept for resend: %s", len(entries), error,
+                     extra={"client_id": client.client_id})
+        with self._send_condition:
+            if all(queue is not q for queue in self.send_queues.values()):
+                # the client was renamed while the batch was in flight
+                q = self.send_queues.setdefault(client.client_id, SendQueue(self.send_queue_size))
+            q.items.extendleft(reversed(entries))
+            q.requeued += len(entries)
+        if not self.multi_client:
+            self.connected = False
+
+    def send_json_to_labview(self, data: dict, client_id: str = None) -> bool:
+        """Send a JSON (or, with codec="binary", binary) message to LabVIEW (client_id selects the VI when several are connected)."""
         try:
-            json_text = json.dumps(data)
-            return self._send_to_labview(json_text)
+            return self._send_to_labview(self.codec.encode(data), client_id)
         except Exception as e:
-            print(f"❌ send_json_to_labview failed: {e}")
+            logger.error("❌ send_json_to_labview failed: %s", e)
             return False
         
-    def write_value_to_labview(self, value_type: str, value: float, merge_last_command: bool = True) -> bool:
+    def get_telemetry_summary(self, seconds: float = 10.0) -> dict:
+        """count, last, mean, std, min and max of every numeric LabVIEW field over the last `seconds`"""
+        if self.telemetry is None:
+            return {"error": "Telemetry needs numpy"}
+        return self.telemetry.summary(seconds)
+
+    def get_telemetry(self, field: str, seconds: float = 60.0, points: int = 100) -> dict:
+        """One numeric LabVIEW field over the last `seconds`, averaged into `points` time bins"""
+        if self.telemetry is None:
+            return {"error": "Telemetry needs numpy"}
+        series = self.telemetry.downsample(seconds, points, [field])
+        return {name: [None if v != v else round(float(v), 6) for v in values] for name, values in series.items()}
+
+    def request(self, cmd: dict, client_id: str = None) -> Future:
+        """Send `cmd` tagged with a new RequestId, the returned future resolves with LabVIEW's reply"""
+        future = Future()
+        client = self._get_client(client_id)
+        if client is None:
+            future.set_exception(ConnectionError("Not connected to LabVIEW"))
+            return future
+
+        future.request_id = next(self._request_ids)
+        future.sent_at = time.perf_counter()
+        self.pending[future.request_id] = (future, client)
+        if not self._send_to_labview(self.codec.encode({**cmd, "RequestId": future.request_id}), client_id,
+                                     future.request_id):
+            self.pending.pop(future.request_id, None)
+            future.set_exception(ConnectionError("Failed to send to LabVIEW"))
+        return future
+
+    def call(self, cmd: dict, timeout: float = 10.0, client_id: str = None) -> dict:
+        """Send `cmd` and block until LabVIEW replies with the same RequestId (not from the server thread)"""
+        future = self.request(cmd, client_id)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self.metrics["request"].record(timeout, error=True)
+            raise TimeoutError(f"No reply from LabVIEW within {timeout}s") from None
+        finally:
+            self.pending.pop(getattr(future, "request_id", None), None)
+
+    async def call_async(self, cmd: dict, timeout: float = 10.0, client_id: str = None) -> dict:
+        """Awaitable call(); gather several to pipeline them on one connection"""
+        future = self.request(cmd, client_id)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.metrics["request"].record(timeout, error=True)
+            raise TimeoutError(f"No reply from LabVIEW within {timeout}s") from None
+        finally:
+            self.pending.pop(getattr(future, "request_id", None), None)
+
+    def _resolve(self, request_id, reply):
+        try:
+            future, client = self.pending.pop(int(request_id))
+        except (KeyError, TypeError, ValueError):
+            logger.warning("⚠️ Reply to unknown RequestId", extra={"request_id": request_id})
+            return
+        latency = time.perf_counter() - future.sent_at
+        self.metrics["request"].record(latency)
+        self._debug("📥 Reply", client_id=client.client_id, request_id=future.request_id,
+                    latency_ms=round(latency * 1000, 3))
+        if not future.done():
+            future.set_result(reply)
+
+    def _fail_pending(self, client):
+        """Fail the requests still waiting on a client that disconnected"""
+        for request_id, (future, owner) in list(self.pending.items()):
+            if owner is client and self.pending.pop(request_id, None) and not future.done():
+                future.set_exception(ConnectionError(f"LabVIEW {client.client_id} disconnected"))
+
+    def write_value_to_labview(self, value_type: str, value: float, merge_last_command: bool = True,
+                               client_id: str = None) -> bool:
         """
         Inverse of read_value_from_labview:
         Sends a JSON message to LabVIEW where `value_type` is set to `value`.
 
-        If merge_last_command=True, start from the last received JSON (if any)
+        If merge_last_command=True, start from the last received message (if any)
         and overwrite/append the given key; otherwise send a minimal dict.
         """
         try:
             payload = {}
             if merge_last_command:
                 # reuse previous JSON if available
-                base = self._get_dict_from_last_received_parameters()
+                base = self._get_last_message(client_id)
                 if isinstance(base, dict):
                     payload.update(base)
             payload[value_type] = value
 
-            return self._send_to_labview(json.dumps(payload))
+            return self._send_to_labview(self.codec.encode(payload), client_id)
         except Exception as e:
-            print(f"❌ write_value_to_labview failed: {e}")
+            logger.error("❌ write_value_to_labview failed: %s", e)
             return False
     
 def main():
+    configure_logging()
     server = LabVIEWServerDevice(host='localhost', port=9999)
     if server.start_server():
         try:
@@ -252,10 +1311,10 @@ def main():
                 time.sleep(1)
                 server.write_value_to_labview("Input", 42)
         except KeyboardInterrupt:
-            print("\n🛑 Shutting down server...")
+            logger.info("🛑 Shutting down server...")
             server.stop_server()
     else:
-        print("❌ Could not start LabVIEW server.")
+        logger.error("❌ Could not start LabVIEW server.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
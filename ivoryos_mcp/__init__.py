@@ -0,0 +1,6 @@
+"""
+Helpers for the IvoryOS MCP server (`server.py`).
+"""
+from ivoryos_mcp.auth import AuthenticationError, SessionAuth
+
+__all__ = ["AuthenticationError", "SessionAuth"]
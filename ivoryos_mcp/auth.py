@@ -0,0 +1,140 @@
+"""
+Session-aware authentication for the IvoryOS web API.
+
+IvoryOS keeps a Flask-Login session cookie. Instead of probing `{url}/`
+before every call, requests are sent straight away and a login is only
+performed when IvoryOS rejects one (401, or a redirect to the login page),
+followed by a single transparent retry.
+"""
+import asyncio
+import contextlib
+import time
+from typing import Dict, Any, AsyncIterator, Optional
+
+import httpx
+
+from ivoryos_mcp.metrics import MetricsRegistry, endpoint_label
+
+LOGIN_PATH = "/auth/login"
+
+
+class AuthenticationError(Exception):
+    """Raised when IvoryOS refuses the configured credentials"""
+
+
+class SessionAuth:
+    """Send requests on a shared client and re-login only when the session expires"""
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str, login_data: Dict[str, str],
+                 metrics: Optional[MetricsRegistry] = None, name: str = ""):
+        self.client = client
+        # every round trip (including logins) is recorded as an "upstream" series,
+        # labelled "{name} GET /path" when several IvoryOS instances share `metrics`
+        self.metrics = metrics
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.login_data = login_data
+        self._lock = asyncio.Lock()
+        # bumped after every successful login, lets concurrent callers share one login
+        self._generation = 0
+        self.request_count = 0
+        self.retry_count = 0
+        self.auth_round_trips = 0
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send `method {base_url}{path}`, logging in and retrying once if required"""
+        generation = self._generation
+        self.request_count += 1
+        resp = await self._send(method, path, **kwargs)
+        if not self._needs_login(resp):
+            return resp
+
+        await self._login(generation)
+        self.retry_count += 1
+        return await self._send(method, path, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Streaming variant of `request`, the body is read by the caller"""
+        generation = self._generation
+        self.request_count += 1
+        async with self._stream(method, path, **kwargs) as resp:
+            if not self._needs_login(resp):
+                yield resp
+                return
+
+        await self._login(generation)
+        self.retry_count += 1
+        async with self._stream(method, path, **kwargs) as resp:
+            yield resp
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            resp = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+        except Exception:
+            self._observe(method, path, start, True)
+            raise
+        self._observe(method, path, start, resp.is_error, len(resp.content))
+        return resp
+
+    @contextlib.asynccontextmanager
+    async def _stream(self, method: str, path: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """client.stream, recorded once the caller is done with the body"""
+        start = time.perf_counter()
+        resp = None
+        try:
+            async with self.client.stream(method, f"{self.base_url}{path}", **kwargs) as resp:
+                yield resp
+        except Exception:
+            self._observe(method, path, start, True, resp.num_bytes_downloaded if resp is not None else 0)
+            raise
+        self._observe(method, path, start, resp.is_error, resp.num_bytes_downloaded)
+
+    def _observe(self, method: str, path: str, start: float, error: bool, nbytes: int = 0) -> None:
+        if self.metrics is not None:
+            label = endpoint_label(method, path)
+            self.metrics.observe("upstream", f"{self.name} {label}" if self.name else label,
+                                 time.perf_counter() - start, error, nbytes)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for requests sent and authentication round trips spent"""
+        return {
+            "requests": self.request_count,
+            "auth_round_trips": self.auth_round_trips,
+            "retries": self.retry_count,
+            "round_trips": self.request_count + self.retry_count + self.auth_round_trips,
+            # the former probe-first flow spent one extra GET per request (and the same logins),
+            # every retry after a rejected request gives one of them back
+            "round_trips_saved": self.request_count - self.retry_count,
+        }
+
+    @staticmethod
+    def _needs_login(resp: httpx.Response) -> bool:
+        """Whether IvoryOS answered with 401 or sent us to the login page"""
+        if resp.status_code == httpx.codes.UNAUTHORIZED:
+            return True
+        if resp.is_redirect:
+            return LOGIN_PATH in resp.headers.get("location", "")
+        return bool(resp.history) and resp.url.path.endswith(LOGIN_PATH)
+
+    async def _login(self, seen_generation: int) -> None:
+        """Log in once, unless another caller already did since `seen_generation`"""
+        async with self._lock:
+            if self._generation != seen_generation:
+                return
+            self.auth_round_trips += 1
+            try:
+                resp = await self._send("POST", LOGIN_PATH, data=self.login_data, follow_redirects=True)
+            except httpx.ConnectError as e:
+                raise AuthenticationError(f"Connection error during authentication: {e}") from e
+            # a rejected login re-renders the login form instead of redirecting away
+            if resp.status_code != httpx.codes.OK or resp.url.path.endswith(LOGIN_PATH):
+                raise AuthenticationError(f"Login failed with status {resp.status_code}")
+            self._generation += 1
@@ -0,0 +1,72 @@
+"""
+Run many `component.method(**kwargs)` tasks in one MCP call.
+
+IvoryOS runs single steps under its runner lock and answers `{"status": "busy"}`
+instead of queueing, so tasks cannot run in parallel: they are sent one after
+the other with `hidden_wait=True` (the reply carries the output), and busy
+replies (e.g. a workflow is running) are retried until the lock frees.
+"""
+import asyncio
+import time
+from typing import Dict, List, Any
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+
+BUSY_RETRY_DELAY = 0.25
+BUSY_TIMEOUT = 300.0
+
+
+async def run_task(auth: SessionAuth, index: int, task: Dict[str, Any],
+                   busy_timeout: float = BUSY_TIMEOUT) -> Dict[str, Any]:
+    """Run one task to completion and time it, retrying busy replies for up to `busy_timeout` seconds"""
+    component, method = task.get("component"), task.get("method")
+    kwargs = dict(task.get("kwargs") or {})
+    kwargs["hidden_name"] = method
+    kwargs["hidden_wait"] = True
+
+    item = {"index": index, "component": component, "method": method}
+    start = time.perf_counter()
+    try:
+        while True:
+            resp = await auth.post(f"/instruments/{component}", json=kwargs)
+            result = resp.json() if resp.status_code == httpx.codes.OK else None
+            busy = isinstance(result, dict) and result.get("status") == "busy"
+            if not busy or time.perf_counter() - start >= busy_timeout:
+                break
+            await asyncio.sleep(BUSY_RETRY_DELAY)
+
+        if resp.status_code != httpx.codes.OK:
+            item.update(success=False, error=f"Failed to execute task: {resp.status_code}")
+        elif busy:
+            item.update(success=False, busy=True, error=f"Runner still busy after {busy_timeout:.0f}s")
+        else:
+            success = result.get("success", True) if isinstance(result, dict) else True
+            item.update(success=bool(success), result=result)
+    except Exception as e:
+        item.update(success=False, error=str(e))
+    item["seconds"] = round(time.perf_counter() - start, 4)
+    return item
+
+
+async def run_batch(auth: SessionAuth, tasks: List[Dict[str, Any]], stop_on_error: bool = False) -> Dict[str, Any]:
+    """Run `tasks` in order, skipping the rest after a failure with stop_on_error"""
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    for index, task in enumerate(tasks):
+        if stop_on_error and any(not r["success"] for r in results):
+            results.append({"index": index, "component": task.get("component"), "method": task.get("method"),
+                            "success": False, "skipped": True})
+            continue
+        results.append(await run_task(auth, index, task))
+
+    skipped = sum(1 for r in results if r.get("skipped"))
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded - skipped,
+        "skipped": skipped,
+        "seconds": round(time.perf_counter() - start, 4),
+        "results": results,
+    }
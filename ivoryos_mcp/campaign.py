@@ -0,0 +1,276 @@
+"""
+Campaign helpers for `run-workflow-campaign`.
+
+Search-space pre-check: Ax-style `parameter_constraints` ("x1 + 2*x2 <= 10")
+are parsed into rows of `A x <= b` and checked against the parameter bounds
+before anything is sent to IvoryOS. Each constraint is tested on its own
+(its minimum over the bound box), then all of them together by
+Fourier-Motzkin elimination, which is exact and small for the handful of
+parameters a campaign has. A sampled feasible fraction tells how much of the
+box the optimizer can actually use.
+
+Early stopping: IvoryOS runs a campaign to its `repeat` count, so
+`CampaignWatcher` follows the running record and aborts at the next
+iteration once an objective target is reached, the best value has not
+improved for `patience` trials, or the time budget is spent.
+
+NumPy is optional for the MCP server: without it the pre-check is skipped.
+"""
+import ast
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.execution import STATUS_PATH, summarize_status
+from ivoryos_mcp.records import fetch_record_rows
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ABORT_PATH = "/executions/abort/next-iteration"
+TOLERANCE = 1e-9
+MAX_ROWS = 20000  # Fourier-Motzkin gives up (undecided) beyond this many inequalities
+SAMPLES = 4096
+
+
+# constraint parsing
+def _linear(node: ast.expr, names: List[str]) -> Dict[str, float]:
+    """{parameter: coefficient, "": constant} of a linear expression"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return {"": float(node.value)}
+    if isinstance(node, ast.Name):
+        if node.id not in names:
+            raise ValueError(f"unknown or non-numeric parameter {node.id}")
+        return {node.id: 1.0}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        sign = -1.0 if isinstance(node.op, ast.USub) else 1.0
+        return {k: sign * v for k, v in _linear(node.operand, names).items()}
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+        left, right = _linear(node.left, names), _linear(node.right, names)
+        sign = 1.0 if isinstance(node.op, ast.Add) else -1.0
+        for k, v in right.items():
+            left[k] = left.get(k, 0.0) + sign * v
+        return left
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+        left, right = _linear(node.left, names), _linear(node.right, names)
+        if isinstance(node.op, ast.Div):
+            if set(right) != {""} or right[""] == 0:
+                raise ValueError("division by a parameter or zero")
+            return {k: v / right[""] for k, v in left.items()}
+        if set(left) == {""}:
+            left, right = right, left
+        if set(right) != {""}:
+            raise ValueError("product of parameters")
+        return {k: v * right[""] for k, v in left.items()}
+    raise ValueError(f"unsupported expression {ast.unparse(node)}")
+
+
+def parse_constraint(expression: str, names: List[str]) -> List[Tuple[Dict[str, float], float]]:
+    """`lhs <= rhs` (or >=, chained comparisons) as rows (coefficients, bound) of a.x <= b"""
+    try:
+        node = ast.parse(expression.strip(), mode="eval").body
+    except SyntaxError:
+        raise ValueError("not a valid expression")
+    if not isinstance(node, ast.Compare):
+        raise ValueError("expected a comparison like 'x1 + x2 <= 1'")
+    rows = []
+    operands = [node.left] + node.comparators
+    for op, left, right in zip(node.ops, operands, operands[1:]):
+        if not isinstance(op, (ast.LtE, ast.Lt, ast.GtE, ast.Gt)):
+            raise ValueError("only <= and >= are supported")
+        difference = _linear(left, names)  # left - right <= 0
+        for k, v in _linear(right, names).items():
+            difference[k] = difference.get(k, 0.0) - v
+        if isinstance(op, (ast.GtE, ast.Gt)):
+            difference = {k: -v for k, v in difference.items()}
+        constant = difference.pop("", 0.0)
+        rows.append((difference, -constant))
+    return rows
+
+
+def parameter_bounds(parameters: List[Dict[str, Any]]) -> Tuple[Dict[str, Tuple[float, float]], List[str]]:
+    """{name: (lower, upper)} of numeric parameters (choices relaxed to their range), and bound errors"""
+    bounds, errors = {}, []
+    for parameter in parameters:
+        name, kind = parameter.get("name"), parameter.get("type", "range")
+        try:
+            if kind == "range":
+                low, high = parameter["bounds"] if "bounds" in parameter else (parameter["min"], parameter["max"])
+                low, high = float(low), float(high)
+                if low > high:
+                    errors.append(f"Parameter {name}: lower bound {low} is above upper bound {high}")
+                    continue
+            elif kind == "fixed":
+                low = high = float(parameter["value"])
+            elif kind == "choice":
+                values = [float(v) for v in parameter.get("values") or parameter.get("choices") or []]
+                if not values:
+                    errors.append(f"Parameter {name}: choice without values")
+                    continue
+                low, high = min(values), max(values)
+            else:
+                continue
+        except (TypeError, ValueError, KeyError):
+            continue  # non-numeric parameters cannot appear in linear constraints
+        bounds[name] = (low, high)
+    return bounds, errors
+
+
+def _feasible(A, b, lower, upper) -> Optional[bool]:
+    """Is {x : A x <= b, lower <= x <= upper} non-empty? None when elimination grows too large"""
+    n = A.shape[1]
+    identity = np.eye(n)
+    A = np.vstack([A, identity, -identity])
+    b = np.concatenate([b, upper, -lower])
+    remaining = list(range(n))
+    while remaining:
+        # eliminate the variable producing the fewest new rows
+        counts = [(int((A[:, k] > TOLERANCE).sum()) * int((A[:, k] < -TOLERANCE).sum()), k) for k in remaining]
+        k = min(counts)[1]
+        remaining.remove(k)
+        column = A[:, k]
+        pos, neg = column > TOLERANCE, column < -TOLERANCE
+        keep = ~(pos | neg)
+        P, bP = A[pos] / column[pos, None], b[pos] / column[pos]
+        N, bN = A[neg] / -column[neg, None], b[neg] / -column[neg]
+        combined = (P[:, None, :] + N[None, :, :]).reshape(-1, n)
+        A = np.vstack([A[keep], combined])
+        b = np.concatenate([b[keep], (bP[:, None] + bN[None, :]).ravel()])
+        A[:, k] = 0.0
+        if not len(A):
+            return True
+        # identical left sides: only the tightest bound matters
+        A, inverse = np.unique(np.round(A, 12), axis=0, return_inverse=True)
+        tightest = np.full(len(A), np.inf)
+        np.minimum.at(tightest, inverse.ravel(), b)
+        b = tightest
+        if len(A) > MAX_ROWS:
+            return None
+    return bool(np.all(b >= -TOLERANCE * (1 + np.abs(b))))
+
+
+def check_search_space(parameters: List[Dict[str, Any]], constraints: List[str]) -> Dict[str, Any]:
+    """{"errors": [...], "feasible_fraction": ...} for the parameter bounds and linear constraints"""
+    bounds, errors = parameter_bounds(parameters)
+    names = list(bounds)
+    rows = []
+    for expression in constraints:
+        try:
+            parsed = parse_constraint(expression, names)
+        except ValueError as e:
+            errors.append(f"Constraint '{expression}': {e}")
+            continue
+        rows += [(expression, coefficients, bound) for coefficients, bound in parsed]
+    if errors or not rows:
+        return {"errors": errors}
+
+    lower = np.array([bounds[name][0] for name in names])
+    upper = np.array([bounds[name][1] for name in names])
+    A = np.array([[coefficients.get(name, 0.0) for name in names] for _, coefficients, _ in rows])
+    b = np.array([bound for _, _, bound in rows])
+
+    # smallest value of each left side over the bound box
+    minimum = np.minimum(A * lower, A * upper).sum(axis=1)
+    for (expression, _, bound), low in zip(rows, minimum):
+        if low > bound + TOLERANCE * (1 + abs(bound)):
+            errors.append(f"Constraint '{expression}' cannot be met within the parameter bounds "
+                          f"(violated by at least {low - bound:g} everywhere)")
+    if not errors and _feasible(A, b, lower, upper) is False:
+        errors.append(f"Constraints {list(dict.fromkeys(expression for expression, _, _ in rows))} "
+                      f"cannot all be met together within the parameter bounds")
+
+    samples = lower + (upper - lower) * np.random.default_rng(0).random((SAMPLES, len(names)))
+    fraction = float(np.mean(np.all(samples @ A.T <= b + TOLERANCE, axis=1)))
+    return {"errors": errors, "feasible_fraction": round(fraction, 4)}
+
+
+# early stopping
+class CampaignWatcher:
+    """Follows one running campaign and aborts it at the next iteration once a stop rule fires"""
+
+    def __init__(self, auth: SessionAuth, poll: float = 5.0):
+        self.auth = auth
+        self.poll = poll
+        self.task: Optional[asyncio.Task] = None
+        self.state: Dict[str, Any] = {}
+
+    def start(self, objectives: List[Dict[str, Any]], early_stop: Optional[Dict[str, float]] = None,
+              patience: int = 0, max_minutes: float = 0.0) -> None:
+        """Watch the campaign that was just started (replacing any previous watch)"""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.state = {"state": "watching", "early_stop": early_stop or {}, "patience": patience,
+                      "max_minutes": max_minutes, "trials": 0}
+        self.task = asyncio.create_task(self._watch(objectives, early_stop or {}, patience, max_minutes))
+
+    async def wait(self) -> Dict[str, Any]:
+        if self.task is not None:
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.state)
+
+    def _check(self, rows: List[Dict[str, Any]], objectives: List[Dict[str, Any]],
+               early_stop: Dict[str, float], patience: int) -> Optional[str]:
+        """Why the campaign should stop after `rows`, or None"""
+        minimize = {o.get("name"): bool(o.get("minimize", o.get("goal") == "minimize")) for o in objectives}
+        first = objectives[0].get("name") if objectives else None
+        best, stale = None, 0
+        for row in rows:
+            for name, target in early_stop.items():
+                value = row.get(name)
+                if isinstance(value, (int, float)) and (value <= target if minimize.get(name) else value >= target):
+                    return f"{name} reached {value} (target {target}) at trial {row['repeat_index']}"
+            value = row.get(first)
+            if not isinstance(value, (int, float)):
+                continue
+            if best is None or (value < best if minimize.get(first) else value > best):
+                best, stale = value, 0
+            else:
+                stale += 1
+            self.state["best"] = {first: best}
+            if patience and stale >= patience:
+                return f"{first} did not improve on {best} for {patience} trials"
+        return None
+
+    async def _watch(self, objectives, early_stop, patience, max_minutes) -> None:
+        start = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(self.poll)
+                resp = await self.auth.get(STATUS_PATH)
+                if resp.status_code != httpx.codes.OK:
+                    raise Exception(f"Failed to get execution status: {resp.status_code}")
+                summary = summarize_status(resp.json())
+                if summary["state"] == "idle":
+                    self.state["state"] = "finished"
+                    return
+
+                reason = None
+                if max_minutes and time.monotonic() - start >= max_minutes * 60:
+                    reason = f"time budget of {max_minutes} minutes spent"
+                workflow_id = (summary.get("workflow") or {}).get("id")
+                if reason is None and workflow_id is not None and (early_stop or patience):
+                    _, _, rows = await fetch_record_rows(self.auth, workflow_id)
+                    self.state["trials"] = len(rows)
+                    reason = self._check(rows, objectives, early_stop, patience)
+                if reason:
+                    resp = await self.auth.post(ABORT_PATH)
+                    self.state.update(state="stopped", reason=reason,
+                                      elapsed=round(time.monotonic() - start, 1),
+                                      aborted=resp.status_code == httpx.codes.OK)
+                    return
+        except asyncio.CancelledError:
+            self.state["state"] = "cancelled"
+            raise
+        except Exception as e:
+            self.state.update(state="error", error=str(e))
@@ -0,0 +1,99 @@
+"""
+Registry of the IvoryOS instances (decks) one MCP server talks to.
+
+`IVORYOS_DECKS` is a JSON object, inline or the path of a JSON file:
+
+    {"synthesis": {"url": "http://10.0.0.5:8000/ivoryos"},
+     "analysis": {"url": "http://10.0.0.6:8000/ivoryos", "username": "bot", "password": "..."}}
+
+Decks without credentials use `IVORYOS_USERNAME`/`IVORYOS_PASSWORD`. The
+first deck is the default one, used by tools called without `deck`; without
+`IVORYOS_DECKS` there is a single deck named "default" at `IVORYOS_URL`.
+
+Every deck has its own pooled HTTP client (IvoryOS session cookies do not
+tell ports apart, so two decks on one host cannot share a cookie jar), login
+session, instrument snapshot, caches and background jobs. Decks are built on
+first use.
+"""
+import asyncio
+import json
+import os
+from typing import Dict, Any, Callable, List, Optional
+
+DEFAULT = "default"
+
+
+def load_deck_config(value: str, url: str, login_data: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """{name: {"url", "username", "password"}} from IVORYOS_DECKS (or the single IVORYOS_URL deck)"""
+    if not value or not value.strip():
+        return {DEFAULT: {"url": url.rstrip('/'), **login_data}}
+    if not value.lstrip().startswith("{"):
+        with open(os.path.expanduser(value)) as f:
+            value = f.read()
+    config = json.loads(value)
+    if not isinstance(config, dict) or not config:
+        raise ValueError("IVORYOS_DECKS must be a non-empty JSON object of {deck name: {\"url\": ...}}")
+    decks = {}
+    for name, entry in config.items():
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        if not isinstance(entry, dict) or not entry.get("url"):
+            raise ValueError(f"Deck {name} needs a url")
+        decks[name] = {**login_data, **entry, "url": entry["url"].rstrip('/')}
+    return decks
+
+
+class Deck:
+    """HTTP client, session, caches, background jobs and job queue of one IvoryOS instance"""
+
+    def __init__(self, name: str, url: str, client, auth, snapshots, record_cache, validator, script_index,
+                 sweeps, campaign_watcher, jobs, dispatch_lock=None):
+        self.name = name
+        self.url = url
+        self.client = client
+        self.auth = auth
+        self.snapshots = snapshots
+        self.record_cache = record_cache
+        self.validator = validator
+        self.script_index = script_index
+        self.sweeps = sweeps
+        self.campaign_watcher = campaign_watcher
+        self.jobs = jobs
+        # shared by the job queue, sweeps and the run tools, see server._start_run
+        self.dispatch_lock = dispatch_lock
+        self.held_run = None  # task keeping dispatch_lock until a run started by a tool has settled
+
+
+class DeckRegistry:
+    """Named decks, each built by `factory(name, config)` the first time it is used"""
+
+    def __init__(self, config: Dict[str, Dict[str, Any]], factory: Callable[[str, Dict[str, Any]], Any]):
+        self.config = config
+        self.factory = factory
+        self.default = next(iter(config))
+        self._decks: Dict[str, Any] = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.config)
+
+    def get(self, name: Optional[str] = None):
+        """The deck called `name` (the default deck when empty)"""
+        name = name or self.default
+        deck = self._decks.get(name)
+        if deck is None:
+            if name not in self.config:
+                raise ValueError(f"Unknown deck {name}, configured decks: {self.names}")
+            deck = self._decks[name] = self.factory(name, self.config[name])
+        return deck
+
+    def started(self) -> List[Any]:
+        """Decks built so far"""
+        return list(self._decks.values())
+
+    async def gather(self, fn: Callable, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """{deck name: await fn(deck)} for all (or the named) decks concurrently, failures as error strings"""
+        names = names or self.names
+        results = await asyncio.gather(*(fn(self.get(name)) for name in names), return_exceptions=True)
+        return {name: f"Error: {result}" if isinstance(result, Exception) else result
+                for name, result in zip(names, results)}
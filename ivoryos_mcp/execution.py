@@ -0,0 +1,88 @@
+"""
+Wait for an IvoryOS run inside the MCP server instead of agent-driven polling.
+
+IvoryOS exposes run state only through `GET /executions/status` (its
+Socket.IO channel is meant for the web UI), so the status is polled with
+exponential backoff and jitter until the runner is idle, paused, or the
+timeout passes. A run may not show as busy right after it was submitted, so
+after a submission "idle" only counts once the run was seen running (or
+paused), or START_GRACE seconds have passed.
+"""
+import asyncio
+import random
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+
+STATUS_PATH = "/executions/status"
+START_GRACE = 2.0
+
+
+def summarize_status(status: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact view of an `/executions/status` reply"""
+    workflow_status = status.get("workflow_status") or {}
+    runner_status = workflow_status.get("runner_status") or {}
+    workflow_info = workflow_status.get("workflow_info") or {}
+    current_task = status.get("current_task") or {}
+
+    if runner_status.get("paused"):
+        state = "paused"
+    elif status.get("busy"):
+        state = "running"
+    else:
+        state = "idle"
+
+    summary = {"state": state}
+    if workflow_info:
+        summary["workflow"] = {k: workflow_info[k] for k in ("id", "name", "start_time", "end_time")
+                               if workflow_info.get(k) is not None}
+    if current_task:
+        summary["current_task"] = {k: current_task.get(k) for k in
+                                   ("method_name", "step_index", "run_error", "start_time", "end_time")
+                                   if k in current_task}
+    return summary
+
+
+def run_settled(summary: Dict[str, Any], since_submit: Optional[float] = None, seen_running: bool = False) -> bool:
+    """Whether `summary` shows the run submitted `since_submit` seconds ago as finished or paused
+    (None: nothing was submitted, any idle state counts)"""
+    if summary["state"] == "running":
+        return False
+    if summary["state"] == "paused" or seen_running or since_submit is None:
+        return True
+    return since_submit >= START_GRACE
+
+
+async def wait_for_execution(auth: SessionAuth, timeout: float = 600.0, initial_delay: float = 0.5,
+                             max_delay: float = 10.0, jitter: float = 0.2,
+                             submitted_at: Optional[float] = None) -> Dict[str, Any]:
+    """Poll until the runner is idle or paused, or `timeout` seconds pass. `submitted_at` (time.monotonic())
+    of a run just submitted applies the start grace"""
+    start = time.monotonic()
+    delay = initial_delay
+    polls = 0
+    seen_running = False
+    while True:
+        resp = await auth.get(STATUS_PATH)
+        polls += 1
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to get execution status: {resp.status_code}")
+
+        summary = summarize_status(resp.json())
+        now = time.monotonic()
+        elapsed = now - start
+        since_submit = None if submitted_at is None else now - submitted_at
+        if run_settled(summary, since_submit, seen_running) or elapsed >= timeout:
+            summary.update(timed_out=summary["state"] == "running", elapsed=round(elapsed, 2), polls=polls)
+            return summary
+        seen_running = seen_running or summary["state"] == "running"
+
+        sleep = delay * random.uniform(1 - jitter, 1 + jitter)
+        if since_submit is not None and not seen_running:
+            # still in the start grace: check again once it is over at the latest
+            sleep = min(sleep, max(START_GRACE - since_submit, 0.05))
+        await asyncio.sleep(min(sleep, timeout - elapsed))
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,303 @@
+"""
+Persistent job queue in front of `/executions/config`.
+
+Jobs are `/executions/config` bodies (repeat, kwargs or campaign), optionally
+preceded by loading a library workflow, stored in SQLite under
+`{root}/{server}/jobs.sqlite3`. A dispatcher task polls `/executions/status`
+and, whenever IvoryOS is idle, marks the job it started last as finished and
+starts the next runnable one: highest priority first, then queue position.
+A job waits for its `depends_on` jobs to finish; with `require_success` (the
+default) it fails when one of them failed or was cancelled, without it it
+runs regardless (e.g. a cleanup workflow). Queue wait and run times are kept
+per job, from which utilization and wait-time stats are computed.
+
+The deck's dispatch lock (shared with the sweep runner and the run tools) is
+held from a job's start until it is seen finished, so a sweep never submits
+a chunk in between and a sweep's run is never taken for a job's.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.execution import STATUS_PATH, run_settled, summarize_status
+
+CONFIG_PATH = "/executions/config"
+FINISHED = ("done", "failed", "cancelled")
+CONFIG_KEYS = ("repeat", "kwargs", "parameters")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    position REAL NOT NULL,
+    workflow_name TEXT NOT NULL DEFAULT '',
+    config TEXT NOT NULL,
+    depends_on TEXT NOT NULL DEFAULT '[]',
+    require_success INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    workflow_id INTEGER,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, priority, position);
+"""
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _row(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["config"] = json.loads(job["config"])
+    job["depends_on"] = json.loads(job["depends_on"])
+    job["require_success"] = bool(job["require_success"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return {key: value for key, value in job.items() if value is not None}
+
+
+class JobQueue:
+    """SQLite-backed queue of IvoryOS runs, dispatched in the background whenever IvoryOS is idle"""
+
+    def __init__(self, auth: SessionAuth, root: str, namespace: str = "", poll: float = 5.0,
+                 load_script: Optional[Callable[[str], Awaitable[Any]]] = None,
+                 dispatch_lock: Optional[asyncio.Lock] = None):
+        self.auth = auth
+        self.poll = poll
+        # whoever holds it (this queue or a sweep) is the only one starting runs on the deck
+        self.dispatch_lock = dispatch_lock or asyncio.Lock()
+        self._holding = False
+        # loads a library workflow (making it the current one) before a job naming it is started
+        self.load_script = load_script
+        directory = os.path.join(root, hashlib.sha1(namespace.encode()).hexdigest()[:12])
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "jobs.sqlite3")
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.last_status: Dict[str, Any] = {}
+        self.last_error: Optional[str] = None
+
+    # queue operations
+    def enqueue(self, config: Dict[str, Any], workflow_name: str = "", priority: int = 0,
+                depends_on: Optional[List[int]] = None, require_success: bool = True) -> Dict[str, Any]:
+        """Add a run; `config` is an /executions/config body with repeat, kwargs or parameters/objectives"""
+        if not isinstance(config, dict) or not any(key in config for key in CONFIG_KEYS):
+            raise ValueError(f"config needs one of {list(CONFIG_KEYS)}")
+        depends_on = [int(job_id) for job_id in depends_on or []]
+        missing = [job_id for job_id in depends_on if self.get(job_id) is None]
+        if missing:
+            raise ValueError(f"Unknown jobs in depends_on: {missing}")
+        position = self.db.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM jobs").fetchone()[0]
+        cursor = self.db.execute(
+            "INSERT INTO jobs (state, priority, position, workflow_name, config, depends_on, require_success, "
+            "created_at) VALUES ('queued', ?, ?, ?, ?, ?, ?, ?)",
+            (priority, position, workflow_name, json.dumps(config), json.dumps(depends_on), int(require_success),
+             time.time()))
+        self.start()
+        return self.get(cursor.lastrowid)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row(row) if row else None
+
+    def jobs(self, state: str = "", limit: int = 50) -> List[Dict[str, Any]]:
+        """Queued and running jobs in dispatch order, then the most recently finished ones"""
+        rows = self.db.execute(
+            f"SELECT * FROM jobs {'WHERE state = :state' if state else ''} "
+            "ORDER BY state IN ('done', 'failed', 'cancelled'), state != 'running', "
+            "CASE WHEN state IN ('done', 'failed', 'cancelled') THEN -finished_at END, "
+            "priority DESC, position, id LIMIT :limit", {"state": state, "limit": limit}).fetchall()
+        return [_row(row) for row in rows]
+
+    def reorder(self, job_id: int, priority: Optional[int] = None, before: Optional[int] = None) -> Dict[str, Any]:
+        """Change the priority of a queued job and/or move it just ahead of job `before`"""
+        job = self.get(job_id)
+        if job is None or job["state"] != "queued":
+            raise ValueError(f"Job {job_id} is not queued")
+        if before is not None:
+            anchor = self.get(before)
+            if anchor is None or anchor["state"] != "queued":
+                raise ValueError(f"Job {before} is not queued")
+            previous = self.db.execute(
+                "SELECT MAX(position) FROM jobs WHERE state = 'queued' AND priority = ? AND position < ? AND id != ?",
+                (anchor["priority"], anchor["position"], job_id)).fetchone()[0]
+            position = (anchor["position"] + previous) / 2 if previous is not None else anchor["position"] - 1
+            self.db.execute("UPDATE jobs SET priority = ?, position = ? WHERE id = ?",
+                            (anchor["priority"] if priority is None else priority, position, job_id))
+        elif priority is not None:
+            self.db.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, job_id))
+        self._notify()
+        return self.get(job_id)
+
+    def cancel(self, job_id: int) -> Dict[str, Any]:
+        """Cancel a queued job (a running one is stopped with abort-pending-workflow/stop-current-workflow)"""
+        job = self.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job {job_id}")
+        if job["state"] == "running":
+            raise ValueError(f"Job {job_id} is running, stop it with abort-pending-workflow or stop-current-workflow")
+        if job["state"] == "queued":
+            self._finish(job_id, "cancelled")
+            self._notify()
+        return self.get(job_id)
+
+    def stats(self, hours: float = 24.0) -> Dict[str, Any]:
+        """Queue depth, utilization (share of the time a queued job was running) and wait times"""
+        now = time.time()
+        since = now - hours * 3600
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        rows = self.db.execute("SELECT workflow_name, created_at, started_at, finished_at FROM jobs "
+                               "WHERE started_at IS NOT NULL AND COALESCE(finished_at, ?) >= ?",
+                               (now, since)).fetchall()
+        first = self.db.execute("SELECT MIN(created_at) FROM jobs").fetchone()[0]
+        window = now - max(since, first) if first is not None else 0.0
+
+        busy, by_workflow, waits = 0.0, {}, []
+        for name, created, started, finished in rows:
+            seconds = max(0.0, min(finished or now, now) - max(started, since))
+            busy += seconds
+            entry = by_workflow.setdefault(name or "(current)", {"runs": 0, "busy_s": 0.0})
+            entry["runs"] += 1
+            entry["busy_s"] = round(entry["busy_s"] + seconds, 1)
+            if started >= since:
+                waits.append(started - created)
+        oldest = self.db.execute("SELECT MIN(created_at) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+        stats = {"path": self.path, "jobs": counts, "window_hours": hours,
+                 "utilization": round(busy / window, 4) if window > 0 else 0.0, "by_workflow": by_workflow,
+                 "oldest_queued_s": round(now - oldest, 1) if oldest is not None else None,
+                 "dispatcher": "running" if self.task is not None and not self.task.done() else "stopped"}
+        if waits:
+            waits.sort()
+            stats["wait_s"] = {"mean": round(sum(waits) / len(waits), 1), "p50": round(_percentile(waits, 0.5), 1),
+                               "p95": round(_percentile(waits, 0.95), 1), "max": round(waits[-1], 1)}
+        if self.last_error:
+            stats["last_error"] = self.last_error
+        return stats
+
+    # dispatching
+    def start(self) -> None:
+        """Start the dispatcher if there is work and an event loop to run it on"""
+        if self.task is not None and not self.task.done():
+            self._notify()
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self.db.execute("SELECT 1 FROM jobs WHERE state IN ('queued', 'running') LIMIT 1").fetchone():
+            self._wake = asyncio.Event()
+            self.task = asyncio.create_task(self._dispatch())
+
+    def _notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    def _finish(self, job_id: int, state: str, result: Any = None, error: Optional[str] = None) -> None:
+        self.db.execute("UPDATE jobs SET state = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                        (state, time.time(), json.dumps(result) if result is not None else None, error, job_id))
+
+    def _next_runnable(self) -> Optional[Dict[str, Any]]:
+        """First queued job whose dependencies are finished; jobs with failed required dependencies fail"""
+        for row in self.db.execute("SELECT * FROM jobs WHERE state = 'queued' ORDER BY priority DESC, position, id"):
+            job = _row(row)
+            dependencies = [self.get(job_id) for job_id in job["depends_on"]]
+            states = {dependency["id"]: dependency["state"] for dependency in dependencies if dependency}
+            if any(state not in FINISHED for state in states.values()):
+                continue
+            failed = [job_id for job_id, state in states.items() if state != "done"]
+            if failed and job["require_success"]:
+                self._finish(job["id"], "failed", error=f"Dependencies {failed} did not complete")
+                continue
+            return job
+        return None
+
+    async def _hold(self) -> None:
+        if not self._holding:
+            await self.dispatch_lock.acquire()
+            self._holding = True
+
+    def _release(self) -> None:
+        if self._holding:
+            self._holding = False
+            self.dispatch_lock.release()
+
+    async def _start_job(self, job: Dict[str, Any]) -> bool:
+        try:
+            if job.get("workflow_name"):
+                if self.load_script is None:
+                    raise Exception("Loading workflows is not supported here")
+                await self.load_script(job["workflow_name"])
+            resp = await self.auth.post(CONFIG_PATH, json=job["config"])
+            if resp.status_code != httpx.codes.OK:
+                raise Exception(f"Failed to start workflow execution: {resp.status_code}")
+            reply = resp.json()
+            if isinstance(reply, dict) and reply.get("error"):
+                raise Exception(f"IvoryOS rejected the run: {reply}")
+        except Exception as e:
+            self._finish(job["id"], "failed", error=str(e))
+            return False
+        self.db.execute("UPDATE jobs SET state = 'running', started_at = ? WHERE id = ?", (time.time(), job["id"]))
+        return True
+
+    async def _step(self) -> bool:
+        """One poll; False once nothing is queued or running"""
+        resp = await self.auth.get(STATUS_PATH)
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to get execution status: {resp.status_code}")
+        summary = self.last_status = summarize_status(resp.json())
+        running = self.db.execute("SELECT * FROM jobs WHERE state = 'running'").fetchone()
+        if summary["state"] != "idle":
+            workflow_id = (summary.get("workflow") or {}).get("id")
+            if running is not None and workflow_id is not None and running["workflow_id"] is None:
+                self.db.execute("UPDATE jobs SET workflow_id = ? WHERE id = ?", (workflow_id, running["id"]))
+            return True
+        if running is not None:
+            if not run_settled(summary, time.time() - running["started_at"], running["workflow_id"] is not None):
+                return True
+            task = summary.get("current_task") or {}
+            self._finish(running["id"], "failed" if task.get("run_error") else "done", summary)
+            self._release()
+            self._notify()  # next step right away, after a sweep waiting for the deck took the lock
+            return True
+
+        if self.dispatch_lock.locked() and not self._holding:
+            return True  # a sweep or a run tool is submitting runs
+        if self._next_runnable() is None:
+            return False
+        await self._hold()
+        job = self._next_runnable()  # the queue may have changed while waiting for the lock
+        if job is None or not await self._start_job(job):
+            self._release()
+        return True
+
+    async def _dispatch(self) -> None:
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    if not await self._step():
+                        return
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._release()
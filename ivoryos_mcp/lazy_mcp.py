@@ -0,0 +1,48 @@
+"""
+FastMCP with deferred tool registration.
+
+Registering a tool builds its pydantic argument model and JSON schema, which
+for every tool of `server.py` costs more than the rest of the server's
+import. Stdio clients spawn the server per session and only need the tools
+after the `initialize` handshake, so tools are collected with `defer_tool`
+and registered on the first `tools/list` or `tools/call`.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from mcp.server.fastmcp import FastMCP
+from mcp.types import ContentBlock, Tool
+
+
+class LazyFastMCP(FastMCP):
+    """FastMCP whose tools are registered when they are first listed or called"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._deferred: List[Tuple[Callable, str]] = []
+        # background task started after the handshake (see server.py), kept so it is not garbage collected
+        self.warm_up_task: Optional[asyncio.Task] = None
+
+    def defer_tool(self, fn: Callable, name: str) -> None:
+        self._deferred.append((fn, name))
+
+    def register_tools(self) -> None:
+        """Register the deferred tools (in definition order)"""
+        deferred, self._deferred = self._deferred, []
+        for fn, name in deferred:
+            self.add_tool(fn, name=name)
+
+    @property
+    def notification_handlers(self) -> Dict[type, Callable]:
+        """Handlers of client notifications, by notification type"""
+        return self._mcp_server.notification_handlers
+
+    async def list_tools(self) -> List[Tool]:
+        if self._deferred:
+            self.register_tools()
+        return await super().list_tools()
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Sequence[ContentBlock] | Dict[str, Any]:
+        if self._deferred:
+            self.register_tools()
+        return await super().call_tool(name, arguments)
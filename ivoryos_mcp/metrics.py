@@ -0,0 +1,204 @@
+"""
+In-process metrics for MCP tools and IvoryOS calls.
+
+Every series (kind + name, e.g. `tool`/`execute-task` or
+`upstream`/`GET /executions/status`) keeps call, error and payload byte
+counters plus an HDR-style latency histogram: log-linear buckets with 16
+sub-buckets per power of two (at most ~6% relative error), so recording is
+one `frexp` and a dict increment and p50/p95/p99 come from the bucket
+counts. `snapshot()` backs the `metrics` tool; `render()` is the Prometheus
+text format served by `serve_metrics` on an optional local port.
+"""
+import functools
+import inspect
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+_NUMERIC = re.compile(r"^\d+$")
+_NAMED = ("instruments", "library")  # /instruments/<component>, /library/<workflow name>
+
+
+class LatencyHistogram:
+    """Log-linear latency buckets over microseconds"""
+
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        mantissa, exponent = math.frexp(max(seconds * 1e6, 1.0))  # 0.5 <= mantissa < 1
+        index = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def _upper_bound(self, index: int) -> float:
+        exponent, sub = divmod(index, self.SUB_BUCKETS)
+        return (0.5 + (sub + 1) / (2 * self.SUB_BUCKETS)) * 2.0 ** exponent / 1e6
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (in seconds) of the bucket holding the q-th fraction of samples"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+
+class Series:
+    """Counters and latency histogram of one tool or endpoint"""
+
+    __slots__ = ("calls", "errors", "bytes", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.latency = LatencyHistogram()
+
+    def as_dict(self) -> Dict[str, Any]:
+        latency = self.latency
+        summary = {"calls": self.calls, "errors": self.errors, "bytes": self.bytes,
+                   "mean_ms": round(latency.total / latency.count * 1000, 3) if latency.count else 0.0}
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}_ms"] = round(latency.quantile(q) * 1000, 3)
+        summary["max_ms"] = round(latency.max * 1000, 3)
+        return summary
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """`GET /executions/records/{id}`: ids and instrument/workflow names are templated away"""
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    for i, segment in enumerate(segments):
+        if _NUMERIC.match(segment):
+            segments[i] = "{id}"
+        elif i == 1 and segments[0] in _NAMED:
+            segments[i] = "{name}"
+    return f"{method} /{'/'.join(segments)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Thread-safe collection of series keyed by (kind, name)"""
+
+    def __init__(self, prefix: str = "ivoryos_mcp"):
+        self.prefix = prefix
+        self.series: Dict[Tuple[str, str], Series] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool = False, nbytes: int = 0) -> None:
+        with self._lock:
+            series = self.series.get((kind, name))
+            if series is None:
+                series = self.series[(kind, name)] = Series()
+            series.calls += 1
+            series.errors += bool(error)
+            series.bytes += nbytes
+            series.latency.record(seconds)
+
+    def instrument(self, kind: str, name: str) -> Callable:
+        """Decorator timing a sync or async function; exceptions and "Error..."/"Failed..." strings count as errors"""
+        def decorator(fn):
+            def finish(start, result, error):
+                error = error or (isinstance(result, str) and result.startswith(("Error", "Failed")))
+                text = result if isinstance(result, bytes) else str(result).encode()
+                nbytes = len(text)  # bytes, as counted against the size budget of shaping.render
+                self.observe(kind, name, time.perf_counter() - start, error, nbytes)
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        result = await fn(*args, **kwargs)
+                    except BaseException:
+                        finish(start, "", True)
+                        raise
+                    finish(start, result, False)
+                    return result
+            else:
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        result = fn(*args, **kwargs)
+                    except BaseException:
+                        finish(start, "", True)
+                        raise
+                    finish(start, result, False)
+                    return result
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{kind: {name: counters and latency quantiles}}"""
+        with self._lock:
+            items = [(kind, name, series.as_dict()) for (kind, name), series in self.series.items()]
+        result: Dict[str, Any] = {"uptime_s": round(time.time() - self.started, 1)}
+        for kind, name, summary in sorted(items):
+            result.setdefault(kind, {})[name] = summary
+        return result
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        p = self.prefix
+        with self._lock:
+            items = sorted(((kind, name), series.as_dict(), series.latency.total)
+                           for (kind, name), series in self.series.items())
+        lines = []
+        for metric, key, help_text in (("calls_total", "calls", "Calls made"),
+                                       ("errors_total", "errors", "Calls that failed"),
+                                       ("payload_bytes_total", "bytes", "Payload bytes returned")):
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} counter"]
+            for (kind, name), summary, _ in items:
+                lines.append(f'{p}_{metric}{{kind="{kind}",name="{_escape(name)}"}} {summary[key]}')
+        lines += [f"# HELP {p}_latency_seconds Call latency", f"# TYPE {p}_latency_seconds summary"]
+        for (kind, name), summary, total in items:
+            labels = f'kind="{kind}",name="{_escape(name)}"'
+            for q in QUANTILES:
+                lines.append(f'{p}_latency_seconds{{{labels},quantile="{q}"}} '
+                             f'{summary[f"p{round(q * 100)}_ms"] / 1000}')
+            lines.append(f"{p}_latency_seconds_sum{{{labels}}} {total}")
+            lines.append(f"{p}_latency_seconds_count{{{labels}}} {summary['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `GET /metrics` in the Prometheus text format from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # stdout may be the MCP stdio transport
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
@@ -0,0 +1,243 @@
+"""
+On-disk columnar cache of completed IvoryOS workflow records.
+
+A finished run (`workflow_info.end_time` set) never changes, so its flat rows
+(see `records.py`) are stored once as one NumPy `.npy` file per column under
+`{root}/{server}/{workflow_id}/{phase}/` and memory-mapped on later reads.
+Aggregates (mean/std/min/max/argmin/argmax of an objective, optionally grouped
+by a parameter) run vectorised over the cached columns without touching
+IvoryOS again. Rows read back from the cache equal the streamed ones: a
+per-column state array marks missing keys, nulls and ints kept in float
+columns, and non-string values are stored as JSON text.
+
+NumPy is optional for the MCP server: without it `available` is False and
+callers fall back to streaming the record.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Any, Optional, Tuple
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.records import check_phase, fetch_record_rows, project, page
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+META_FILE = "meta.json"
+FORMAT = 2  # entries written in another layout are fetched again
+MISSING = object()
+# per-row states of a column (only stored when some row is not VALUE)
+VALUE, ABSENT, NULL, INT = 0, 1, 2, 3
+
+
+class CachedRecord:
+    """Columns of one workflow phase, either memory-mapped from disk or in memory"""
+
+    def __init__(self, workflow_info: Dict[str, Any], summary: Dict[str, Any], columns: Dict[str, Any],
+                 encodings: Optional[Dict[str, str]] = None, states: Optional[Dict[str, Any]] = None):
+        self.workflow_info = workflow_info
+        self.summary = summary
+        self.columns = columns
+        self.encodings = encodings or {}
+        self.states = states or {}
+        self.length = summary["rows"]
+
+    def value(self, name: str, index: int) -> Any:
+        """Value of column `name` in row `index` as it was received, MISSING when the row had no such key"""
+        states = self.states.get(name)
+        state = int(states[index]) if states is not None else VALUE
+        if state == ABSENT:
+            return MISSING
+        if state == NULL:
+            return None
+        value = self.columns[name][index].item()
+        if state == INT:
+            return int(value)
+        if self.encodings.get(name) == "json":
+            return json.loads(value)
+        return value
+
+    def row(self, index: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        row = {}
+        for name in self.columns:
+            value = self.value(name, index)
+            if value is not MISSING:
+                row[name] = value
+        return project(row, fields)
+
+    def page(self, offset: int = 0, limit: int = 50, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        offset = max(offset, 0)
+        rows = [self.row(i, fields) for i in range(offset, min(offset + max(limit, 0), self.length))]
+        return page(self.workflow_info, self.summary, rows, offset, self.length)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _to_column(values: List[Any]) -> Tuple[Any, str, Any]:
+    """(column, encoding, states or None): bool/int64 when every row has one, float64 (NaN where missing)
+    for other numeric columns, unicode for strings and JSON text for anything else"""
+    states = np.array([ABSENT if v is MISSING else NULL if v is None else VALUE for v in values], dtype=np.int8)
+    present = [v for v in values if v is not MISSING and v is not None]
+    complete = len(present) == len(values)
+    if complete and all(isinstance(v, bool) for v in present):
+        return np.array(values, dtype=bool), "bool", None
+    if complete and all(_is_number(v) and isinstance(v, int) for v in present) and \
+            all(-2 ** 63 <= v < 2 ** 63 for v in present):
+        return np.array(values, dtype=np.int64), "int", None
+    # ints above 2**53 would lose digits in a float column
+    if all(_is_number(v) and (isinstance(v, float) or abs(v) < 2 ** 53) for v in present):
+        states[[i for i, v in enumerate(values) if _is_number(v) and isinstance(v, int)]] = INT
+        column = np.array([v if _is_number(v) else np.nan for v in values], dtype=np.float64)
+        return column, "float", states if states.any() else None
+    if all(isinstance(v, str) for v in present):
+        column = np.array([v if isinstance(v, str) else "" for v in values], dtype=str)
+        return column, "str", states if states.any() else None
+    column = np.array(["" if v is MISSING or v is None else json.dumps(v) for v in values], dtype=str)
+    return column, "json", states if states.any() else None
+
+
+class RecordCache:
+    """Columnar cache keyed by IvoryOS server, workflow id and phase"""
+
+    def __init__(self, root: str, namespace: str = ""):
+        # records of different IvoryOS instances share ids, keep them apart
+        self.root = os.path.join(root, hashlib.sha1(namespace.encode()).hexdigest()[:12])
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    def _path(self, workflow_id: int, phase: str) -> str:
+        return os.path.join(self.root, str(int(workflow_id)), check_phase(phase))
+
+    def get(self, workflow_id: int, phase: str = "main") -> Optional[CachedRecord]:
+        path = self._path(workflow_id, phase)
+        try:
+            with open(os.path.join(path, META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        if meta.get("format") != FORMAT:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        columns, states = {}, {}
+        for i, name in enumerate(meta["columns"]):
+            columns[name] = np.load(os.path.join(path, f"c{i}.npy"), mmap_mode="r")
+            if name in meta["states"]:
+                states[name] = np.load(os.path.join(path, f"s{i}.npy"), mmap_mode="r")
+        return CachedRecord(meta["workflow_info"], meta["summary"], columns, meta["encodings"], states)
+
+    def put(self, workflow_id: int, phase: str, record: CachedRecord) -> None:
+        """Write the record atomically (temp dir + rename), existing entries are kept"""
+        path = self._path(workflow_id, phase)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(path))
+        try:
+            for i, (name, column) in enumerate(record.columns.items()):
+                np.save(os.path.join(tmp, f"c{i}.npy"), column)
+                if name in record.states:
+                    np.save(os.path.join(tmp, f"s{i}.npy"), record.states[name])
+            with open(os.path.join(tmp, META_FILE), "w") as f:
+                json.dump({"format": FORMAT, "workflow_info": record.workflow_info, "summary": record.summary,
+                           "columns": list(record.columns), "encodings": record.encodings,
+                           "states": list(record.states)}, f, default=str)
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.exists(path):
+                raise
+
+    async def load(self, auth: SessionAuth, workflow_id: int, phase: str = "main") -> CachedRecord:
+        """Cached record, fetched from IvoryOS (and stored once complete) on a miss"""
+        record = self.get(workflow_id, phase)
+        if record is not None:
+            self.hits += 1
+            return record
+
+        self.misses += 1
+        workflow_info, summary, rows = await fetch_record_rows(auth, workflow_id, phase)
+        summary = summary.as_dict()
+        columns, encodings, states = {}, {}, {}
+        for name in summary["columns"]:
+            columns[name], encodings[name], column_states = _to_column([row.get(name, MISSING) for row in rows])
+            if column_states is not None:
+                states[name] = column_states
+        record = CachedRecord(workflow_info, summary, columns, encodings, states)
+        if workflow_info.get("end_time"):
+            self.put(workflow_id, phase, record)
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "hits": self.hits, "misses": self.misses}
+
+
+def aggregate(record: CachedRecord, objective: str, group_by: Optional[str] = None) -> Dict[str, Any]:
+    """mean/std/min/max/argmin/argmax of `objective`, over all rows or per `group_by` value"""
+    if objective not in record.columns:
+        raise ValueError(f"Unknown objective {objective}. Columns: {list(record.columns)}")
+    y = np.asarray(record.columns[objective])
+    if y.dtype.kind not in "if":
+        raise ValueError(f"Objective {objective} is not numeric")
+    y = y.astype(np.float64, copy=False)
+    valid = np.flatnonzero(~np.isnan(y))
+    repeat_index = np.asarray(record.columns["repeat_index"])
+
+    def best(position):
+        return int(repeat_index[position])
+
+    def key(position):
+        value = record.value(group_by, int(position))
+        return None if value is MISSING else value
+
+    if group_by is None:
+        values = y[valid]
+        if not len(values):
+            return {"objective": objective, "count": 0}
+        return {
+            "objective": objective, "count": int(len(values)),
+            "mean": float(values.mean()), "std": float(values.std()),
+            "min": float(values.min()), "max": float(values.max()),
+            "argmin": record.row(int(valid[values.argmin()])),
+            "argmax": record.row(int(valid[values.argmax()])),
+        }
+
+    if group_by not in record.columns:
+        raise ValueError(f"Unknown group_by {group_by}. Columns: {list(record.columns)}")
+    if not len(valid):
+        return {"objective": objective, "group_by": group_by, "groups": []}
+    values = y[valid]
+    _, inverse = np.unique(np.asarray(record.columns[group_by])[valid], return_inverse=True)
+    states = record.states.get(group_by)
+    if states is not None:
+        # missing and null keys are stored as "" (or NaN): they form a group of their own, not the "" one
+        unset = np.isin(np.asarray(states)[valid], (ABSENT, NULL))
+        if unset.any():
+            _, inverse = np.unique(np.where(unset, -1, inverse), return_inverse=True)
+    counts = np.bincount(inverse)
+    sums = np.bincount(inverse, weights=values)
+    mean = sums / counts
+    std = np.sqrt(np.maximum(np.bincount(inverse, weights=values * values) / counts - mean * mean, 0.0))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    argmin = valid[np.lexsort((values, inverse))[starts]]
+    argmax = valid[np.lexsort((-values, inverse))[starts]]
+    return {
+        "objective": objective,
+        "group_by": group_by,
+        "groups": [
+            {group_by: key(argmin[g]), "count": int(counts[g]), "mean": float(mean[g]), "std": float(std[g]),
+             "min": float(y[argmin[g]]), "max": float(y[argmax[g]]),
+             "argmin_repeat_index": best(argmin[g]), "argmax_repeat_index": best(argmax[g])}
+            for g in range(len(counts))
+        ],
+    }
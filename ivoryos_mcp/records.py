@@ -0,0 +1,260 @@
+"""
+Paginated, projected access to IvoryOS workflow records.
+
+`GET /executions/records/{id}` returns every phase of a run with all of its
+steps. The body is streamed and scanned incrementally: only the phase objects
+are decoded, one at a time, and each is reduced to a flat row
+(`repeat_index`, parameters, outputs) before the next one is read. A summary
+header (row count, columns, min/max per numeric column) is accumulated on the
+way so the agent can page through only what it needs.
+"""
+import codecs
+import json
+import re
+from typing import Dict, List, Any, Optional, Callable, AsyncIterator, Iterable, Tuple
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+
+_SPECIAL = re.compile(r'["{}\[\],:]')
+_STRING_END = re.compile(r'["\\]')
+PHASES = ("prep", "main", "cleanup")
+
+
+class _Frame:
+    __slots__ = ("kind", "key", "expect_key")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.key = 0 if kind == "[" else None
+        self.expect_key = kind == "{"
+
+
+class JsonItemScanner:
+    """
+    Incremental JSON scanner that decodes only the objects/arrays whose path
+    (tuple of object keys and list indices) satisfies `want`. Everything else
+    is skipped without being materialised.
+    """
+
+    def __init__(self, want: Callable[[Tuple], bool]):
+        self.want = want
+        self.stack: List[_Frame] = []
+        self.in_string = False
+        self.escape_pending = False
+        self.key_chars: Optional[List[str]] = None
+        self.capture: Optional[List[str]] = None
+        self.capture_depth = 0
+        self.capture_path: Tuple = ()
+
+    def feed(self, text: str) -> List[Tuple[Tuple, Any]]:
+        """Scan the next piece of text, returning the (path, value) items it completed"""
+        items = []
+        pos = 0
+        capture_from = 0
+        if self.escape_pending and text:
+            if self.key_chars is not None:
+                self.key_chars.append(text[0])
+            self.escape_pending = False
+            pos = 1
+
+        while True:
+            if self.in_string:
+                m = _STRING_END.search(text, pos)
+                if m is None:
+                    if self.key_chars is not None:
+                        self.key_chars.append(text[pos:])
+                    break
+                start = m.start()
+                if self.key_chars is not None:
+                    self.key_chars.append(text[pos:start])
+                if m.group() == "\\":
+                    if start + 1 < len(text):
+                        if self.key_chars is not None:
+                            self.key_chars.append(text[start:start + 2])
+                        pos = start + 2
+                    else:
+                        if self.key_chars is not None:
+                            self.key_chars.append("\\")
+                        self.escape_pending = True
+                        break
+                    continue
+                self.in_string = False
+                if self.key_chars is not None:
+                    self.stack[-1].key = json.loads('"' + "".join(self.key_chars) + '"')
+                    self.key_chars = None
+                pos = m.end()
+                continue
+
+            m = _SPECIAL.search(text, pos)
+            if m is None:
+                break
+            char, index = m.group(), m.start()
+            top = self.stack[-1] if self.stack else None
+            if char == '"':
+                self.in_string = True
+                if top is not None and top.kind == "{" and top.expect_key:
+                    self.key_chars = []
+            elif char in "{[":
+                if self.capture is None:
+                    path = tuple(frame.key for frame in self.stack)
+                    if self.want(path):
+                        self.capture, self.capture_depth, self.capture_path = [], len(self.stack), path
+                        capture_from = index
+                self.stack.append(_Frame(char))
+            elif char in "}]":
+                self.stack.pop()
+                if self.capture is not None and len(self.stack) == self.capture_depth:
+                    self.capture.append(text[capture_from:index + 1])
+                    items.append((self.capture_path, json.loads("".join(self.capture))))
+                    self.capture = None
+            elif char == ":":
+                top.expect_key = False
+            elif char == ",":
+                if top.kind == "[":
+                    top.key += 1
+                else:
+                    top.expect_key = True
+            pos = m.end()
+
+        if self.capture is not None:
+            self.capture.append(text[capture_from:])
+        return items
+
+
+async def iter_json_items(chunks: AsyncIterator[bytes], want: Callable[[Tuple], bool]):
+    """Yield (path, value) for every selected object/array in a streamed JSON body"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    scanner = JsonItemScanner(want)
+    async for chunk in chunks:
+        for item in scanner.feed(decoder.decode(chunk)):
+            yield item
+
+
+def _is_record_item(path: Tuple) -> bool:
+    """workflow_info, phases.prep[i], phases.cleanup[i] and phases.script.<repeat>[i]"""
+    if path == ("workflow_info",):
+        return True
+    if len(path) == 3 and path[:2] in (("phases", "prep"), ("phases", "cleanup")):
+        return True
+    return len(path) == 4 and path[:2] == ("phases", "script")
+
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested dicts into dotted column names"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def phase_row(phase: Dict[str, Any]) -> Dict[str, Any]:
+    """One flat row per phase: repeat index, parameters, outputs and whether a step failed"""
+    row = {"repeat_index": phase.get("repeat_index", 0)}
+    row.update(flatten(phase.get("parameters") or {}))
+    outputs = phase.get("outputs") or {}
+    for key, value in flatten(outputs if isinstance(outputs, dict) else {"output": outputs}).items():
+        row[f"outputs.{key}" if key in row else key] = value
+    row["run_error"] = any(step.get("run_error") for step in phase.get("steps") or [])
+    return row
+
+
+def project(row: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Keep `repeat_index` plus the requested columns (a field also selects its dotted children)"""
+    if not fields:
+        return row
+    return {k: v for k, v in row.items()
+            if k == "repeat_index" or any(k == f or k.startswith(f"{f}.") for f in fields)}
+
+
+class ColumnSummary:
+    """Running row count, column names and numeric min/max"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, None] = {}
+        self.numeric: Dict[str, List[float]] = {}
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.rows += 1
+        for key, value in row.items():
+            self.columns.setdefault(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                bounds = self.numeric.get(key)
+                if bounds is None:
+                    self.numeric[key] = [value, value]
+                elif value < bounds[0]:
+                    bounds[0] = value
+                elif value > bounds[1]:
+                    bounds[1] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "columns": list(self.columns),
+            "numeric": {k: {"min": lo, "max": hi} for k, (lo, hi) in self.numeric.items()},
+        }
+
+
+def check_phase(phase: str) -> str:
+    if phase not in PHASES:
+        raise ValueError(f"Unknown phase {phase!r}, use one of {list(PHASES)}")
+    return phase
+
+
+async def stream_record_rows(auth: SessionAuth, workflow_id: int, phase: str = "main"):
+    """Yield ("workflow_info", dict) and ("row", dict) items of one workflow record"""
+    check_phase(phase)
+    async with auth.stream("GET", f"/executions/records/{workflow_id}") as resp:
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to load workflow data: {resp.status_code}")
+        async for path, value in iter_json_items(resp.aiter_bytes(), _is_record_item):
+            if path == ("workflow_info",):
+                yield "workflow_info", value
+            elif value.get("name") == phase:
+                yield "row", phase_row(value)
+
+
+async def fetch_record_rows(auth: SessionAuth, workflow_id: int,
+                            phase: str = "main") -> Tuple[Dict[str, Any], ColumnSummary, List[Dict[str, Any]]]:
+    """workflow_info, summary and every flat row ordered by repeat index"""
+    summary = ColumnSummary()
+    workflow_info = {}
+    rows = []
+    async for kind, value in stream_record_rows(auth, workflow_id, phase):
+        if kind == "workflow_info":
+            workflow_info = value
+            continue
+        summary.add(value)
+        rows.append(value)
+
+    # IvoryOS serialises repeat indices as (string-sorted) object keys
+    rows.sort(key=lambda r: r["repeat_index"])
+    return workflow_info, summary, rows
+
+
+async def load_record_page(auth: SessionAuth, workflow_id: int, offset: int = 0, limit: int = 50,
+                           fields: Optional[List[str]] = None, phase: str = "main") -> Dict[str, Any]:
+    """Summary header plus rows [offset, offset + limit) ordered by repeat index"""
+    workflow_info, summary, rows = await fetch_record_rows(auth, workflow_id, phase)
+    offset = max(offset, 0)
+    selected = [project(row, fields) for row in rows[offset:offset + max(limit, 0)]]
+    return page(workflow_info, summary.as_dict(), selected, offset, len(rows))
+
+
+def page(workflow_info: Dict[str, Any], summary: Dict[str, Any], rows: List[Dict[str, Any]],
+         offset: int, total: int) -> Dict[str, Any]:
+    """Response for one page of `rows` starting at `offset` out of `total`"""
+    end = offset + len(rows)
+    return {
+        "workflow_info": workflow_info,
+        "summary": summary,
+        "offset": offset,
+        "rows": rows,
+        "next_offset": end if end < total else None,
+    }
@@ -0,0 +1,336 @@
+"""
+Local, persisted index of the IvoryOS workflow script library.
+
+`GET /library` only returns script names (newest `last_modified` first), so a
+sync walks that list and fetches scripts (1, 2, 4, ... at a time) until it
+reaches one that is already indexed with the same `last_modified`: everything
+after it is older and unchanged, and an unchanged library costs one fetch.
+Those fetches send `If-None-Match` when IvoryOS gave the script an ETag, a
+304 counts as unchanged. Names missing from the listing are dropped, unknown
+names are always fetched. Loading a script also makes it the session's draft, so syncs
+run on their own session (`sync_auth`, a separate client and cookie jar) and
+never replace the draft of the deck's session or of a user editing in the UI.
+
+Each script is indexed under its name words, `deck.*`/`blocks.*` calls (the
+full path and every prefix, so `deck.sdl` finds `deck.sdl.dose`), workflow
+and keyword-argument parameters, and description words. Search is a dict
+lookup per query term scored by weight x idf. Script bodies are stored once
+per content hash under `{root}/{server}/scripts/bodies/`.
+"""
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Iterable
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+
+LIBRARY_PATH = "/library"
+INDEX_FILE = "index.json"
+FETCH_CONCURRENCY = 8
+
+_CALL = re.compile(r"\b(?:deck|blocks)(?:\.\w+)+")
+_SIGNATURE = re.compile(r"^\s*(?:async\s+)?def\s+\w+\s*\(([^)]*)\)", re.MULTILINE)
+_KEYWORD = re.compile(r"[(,]\s*(\w+)\s*=(?!=)")
+_WORD = re.compile(r"[a-z0-9]+")
+
+# weight of a term by where it appears in the script
+NAME, CALL, PARAMETER, TEXT = 3.0, 2.0, 2.0, 1.0
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def query_terms(query: str) -> List[str]:
+    """Call paths are kept whole (`deck.sdl.dose`), everything else is split into words"""
+    query = query.lower()
+    calls = _CALL.findall(query)
+    return calls + _words(_CALL.sub(" ", query))
+
+
+def _script_sources(script: Dict[str, Any]) -> List[str]:
+    python_script = script.get("python_script") or {}
+    if isinstance(python_script, str):
+        return [python_script]
+    return [source for source in python_script.values() if isinstance(source, str)]
+
+
+def workflow_parameters(source: str) -> Optional[List[str]]:
+    """Parameter names of the workflow function in a main script (None: not found, or it takes *args/**kwargs)"""
+    match = _SIGNATURE.search(source or "")
+    if match is None:
+        return None
+    names = [re.sub(r"[:=].*", "", part, flags=re.DOTALL).strip() for part in match.group(1).split(",")]
+    if any(name.startswith("*") for name in names):
+        return None
+    return [name for name in names if name and name != "/"]
+
+
+def extract_terms(script: Dict[str, Any]) -> Dict[str, float]:
+    """term -> weight for one `GET /library/<name>` response"""
+    info = script.get("script") or {}
+    terms: Dict[str, float] = {}
+
+    def add(words: Iterable[str], weight: float):
+        for word in words:
+            terms[word] = max(terms.get(word, 0.0), weight)
+
+    name = info.get("name") or ""
+    add([name.lower()] + _words(name), NAME)
+    add(_words(info.get("description") or ""), TEXT)
+
+    calls = []
+    for phase in (info.get("script_dict") or {}).values():
+        for action in phase if isinstance(phase, list) else []:
+            instrument, method = action.get("instrument") or "", action.get("action") or ""
+            if instrument.startswith(("deck", "blocks")) and method:
+                calls.append(f"{instrument}.{method}")
+            if isinstance(action.get("args"), dict):
+                add(_words(" ".join(action["args"])), PARAMETER)
+    for source in _script_sources(script):
+        calls += _CALL.findall(source)
+        for signature in _SIGNATURE.findall(source):
+            add(_words(re.sub(r"[:=][^,]*", "", signature)), PARAMETER)
+        add((keyword.lower() for keyword in _KEYWORD.findall(source)), PARAMETER)
+
+    for call in calls:
+        parts = call.lower().split(".")
+        add((".".join(parts[:i]) for i in range(2, len(parts) + 1)), CALL)
+        add(parts[1:], TEXT)
+    return terms
+
+
+class ScriptIndex:
+    """Inverted index over the script library, persisted as JSON next to the record cache"""
+
+    def __init__(self, auth: SessionAuth, root: str, namespace: str = "", ttl: float = 60.0,
+                 sync_auth: Optional[SessionAuth] = None):
+        self.auth = auth
+        # session used by syncs, apart from `auth` so fetching scripts does not change its draft
+        self.sync_auth = sync_auth or auth
+        self.ttl = ttl
+        self.root = os.path.join(root, hashlib.sha1(namespace.encode()).hexdigest()[:12], "scripts")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.synced_at: Optional[float] = None
+        # parameters of the deck session's current workflow, when it was loaded or submitted through this index
+        self.draft_parameters: Optional[List[str]] = None
+        self._lock = asyncio.Lock()
+        self.syncs = 0
+        self.fetches = 0
+        self.not_modified = 0
+        self.body_hits = 0
+        self._read()
+
+    # persistence
+    def _read(self) -> None:
+        try:
+            with open(os.path.join(self.root, INDEX_FILE)) as f:
+                self.entries = json.load(f)["entries"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.entries = {}
+        for name, entry in self.entries.items():
+            self._post(name, entry["terms"])
+
+    def _write(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"entries": self.entries}, f)
+        os.replace(tmp, os.path.join(self.root, INDEX_FILE))
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.root, "bodies", f"{digest}.json")
+
+    def _store_body(self, script: Dict[str, Any]) -> str:
+        """Content hash of `script`, written once per distinct body"""
+        text = json.dumps(script, sort_keys=True, default=str)
+        digest = hashlib.sha256(text.encode()).hexdigest()[:32]
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        return digest
+
+    # index maintenance
+    def _post(self, name: str, terms: Dict[str, float]) -> None:
+        for term, weight in terms.items():
+            self.postings.setdefault(term, {})[name] = weight
+
+    def _unpost(self, name: str) -> None:
+        for term in self.entries.get(name, {}).get("terms", ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(name, None)
+                if not posting:
+                    del self.postings[term]
+
+    def add(self, name: str, script: Dict[str, Any], etag: Optional[str] = None) -> Dict[str, Any]:
+        """(Re)index one fetched script and cache its body"""
+        info = script.get("script") or {}
+        self._unpost(name)
+        entry = {
+            "last_modified": info.get("last_modified") or "",
+            "deck": info.get("deck") or "",
+            "hash": self._store_body(script),
+            "etag": etag or "",
+            "terms": extract_terms(script),
+        }
+        self.entries[name] = entry
+        self._post(name, entry["terms"])
+        return entry
+
+    def remove(self, name: str) -> None:
+        self._unpost(name)
+        self.entries.pop(name, None)
+
+    def invalidate(self) -> None:
+        """Force a sync on the next search, e.g. after a script was submitted"""
+        self.synced_at = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.synced_at is not None and time.monotonic() - self.synced_at < self.ttl
+
+    # IvoryOS
+    async def fetch(self, name: str) -> Dict[str, Any]:
+        """`GET /library/<name>` on the deck's session (which also makes it the current draft there),
+        indexed on the way"""
+        script = await self._fetch(self.auth, name)
+        python_script = script.get("python_script") if isinstance(script, dict) else None
+        self.set_draft(python_script.get("script", "") if isinstance(python_script, dict) else python_script or "")
+        return script
+
+    def set_draft(self, main_script: str) -> None:
+        """Record the main script that just became the deck session's current workflow"""
+        self.draft_parameters = workflow_parameters(main_script)
+
+    async def _fetch(self, auth: SessionAuth, name: str, revalidate: bool = False) -> Optional[Dict[str, Any]]:
+        """Fetched script; with `revalidate`, None when IvoryOS answers 304 to the indexed ETag"""
+        headers = {}
+        entry = self.entries.get(name)
+        if revalidate and entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        self.fetches += 1
+        resp = await auth.get(f"{LIBRARY_PATH}/{name}", headers=headers)
+        if resp.status_code == httpx.codes.NOT_MODIFIED and headers:
+            self.not_modified += 1
+            return None
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to load workflow script: {resp.status_code}")
+        script = resp.json()
+        if isinstance(script, dict) and script.get("script"):
+            self.add(name, script, resp.headers.get("etag"))
+        return script
+
+    async def _fetch_many(self, names: List[str]) -> List[Optional[Dict[str, Any]]]:
+        semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+        async def one(name):
+            async with semaphore:
+                return await self._fetch(self.sync_auth, name, revalidate=True)
+        return await asyncio.gather(*(one(name) for name in names))
+
+    async def sync(self, force: bool = False) -> Dict[str, int]:
+        """Bring the index up to date with the library, fetching only changed scripts"""
+        if not force and self.fresh:
+            return {"fetched": 0, "removed": 0}
+        async with self._lock:
+            if not force and self.fresh:
+                return {"fetched": 0, "removed": 0}
+            self.syncs += 1
+            resp = await self.sync_auth.get(LIBRARY_PATH, params={"sort_by": "modified", "order": "desc"})
+            if resp.status_code != httpx.codes.OK:
+                raise Exception(f"Failed to list workflow scripts: {resp.status_code}")
+            names = resp.json().get("workflows", [])
+
+            fetched = 0
+            position = 0
+            size = 1
+            # newest first: stop at the first chunk holding an unchanged, already indexed script
+            while position < len(names):
+                chunk = names[position:position + size]
+                before = {name: self.entries.get(name, {}).get("last_modified") for name in chunk}
+                await self._fetch_many(chunk)
+                fetched += len(chunk)
+                position += len(chunk)
+                size = min(size * 2, FETCH_CONCURRENCY)
+                if any(before[name] is not None and self.entries.get(name, {}).get("last_modified") == before[name]
+                       for name in chunk):
+                    break
+            missing = [name for name in names[position:] if name not in self.entries]
+            if missing:
+                await self._fetch_many(missing)
+                fetched += len(missing)
+
+            listed = set(names)
+            removed = [name for name in self.entries if name not in listed]
+            for name in removed:
+                self.remove(name)
+            self._write()
+            self.synced_at = time.monotonic()
+            return {"fetched": fetched, "removed": len(removed)}
+
+    # queries
+    def body(self, name: str) -> Optional[Dict[str, Any]]:
+        """Cached `GET /library/<name>` response, without touching IvoryOS"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        try:
+            with open(self._body_path(entry["hash"])) as f:
+                script = json.load(f)
+        except FileNotFoundError:
+            return None
+        self.body_hits += 1
+        return script
+
+    def names(self, keyword: str = "", deck: str = "") -> List[str]:
+        """Names containing `keyword` (like `GET /library?keyword=`), newest first"""
+        keyword = keyword.lower()
+        matches = [(entry["last_modified"], name) for name, entry in self.entries.items()
+                   if keyword in name.lower() and (not deck or entry["deck"] == deck)]
+        return [name for _, name in sorted(matches, reverse=True)]
+
+    def search(self, query: str, deck: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+        """Scripts ranked by the summed weight x idf of the query terms they contain"""
+        total = len(self.entries)
+        scores: Dict[str, float] = {}
+        matched: Dict[str, List[str]] = {}
+        for term in dict.fromkeys(query_terms(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + total / len(posting))
+            for name, weight in posting.items():
+                scores[name] = scores.get(name, 0.0) + weight * idf
+                matched.setdefault(name, []).append(term)
+        ranked = heapq.nsmallest(max(limit, 0), (name for name in scores
+                                                 if not deck or self.entries[name]["deck"] == deck),
+                                 key=lambda name: (-scores[name], name))
+        return [{"name": name, "score": round(scores[name], 3), "matched": matched[name],
+                 "deck": self.entries[name]["deck"], "last_modified": self.entries[name]["last_modified"]}
+                for name in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "scripts": len(self.entries),
+            "terms": len(self.postings),
+            "age": round(time.monotonic() - self.synced_at, 3) if self.synced_at is not None else None,
+            "syncs": self.syncs,
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "body_hits": self.body_hits,
+        }
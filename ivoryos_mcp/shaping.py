@@ -0,0 +1,204 @@
+"""
+Size budget for MCP tool results.
+
+Tool results go to the model verbatim, so they are sent as compact JSON
+(FastMCP would indent them) and a result larger than `max_bytes` is cut:
+the largest list or mapping in it is returned one page at a time, and
+`truncated.next_cursor` is passed back as `cursor` for the next page. Long
+strings are cut the same way. A cut result is kept (for PAGE_TTL seconds)
+under the opaque token that starts its cursors, and later pages are served
+from it without running the tool again: paging never repeats an action and
+every page comes from the same result. Every tool registered with `shaped`
+gets the `max_bytes` and `cursor` arguments; `max_bytes=0` uses the server
+default and `max_bytes=-1` turns the budget off for one call.
+
+Instrument summaries with only the method signatures are rendered once per
+snapshot version (kept on the Snapshot object).
+"""
+import functools
+import inspect
+import json
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Tuple
+
+from ivoryos_mcp.snapshot import Snapshot
+
+RESERVE = 200  # bytes kept free for the "truncated" block
+PAGE_TTL = 600.0
+MAX_PAGED_RESULTS = 32
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _size(value: Any) -> int:
+    return len(_dumps(value).encode())
+
+
+class PagedResults:
+    """Results that did not fit the budget, by token, until PAGE_TTL passes (oldest dropped first)"""
+
+    def __init__(self, ttl: float = PAGE_TTL, max_entries: int = MAX_PAGED_RESULTS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def put(self, result: Any) -> str:
+        token = secrets.token_hex(6)
+        self._results[token] = (time.monotonic() + self.ttl, result)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return token
+
+    def get(self, token: str) -> Any:
+        now = time.monotonic()
+        for expired in [t for t, (expires, _) in self._results.items() if expires < now]:
+            del self._results[expired]
+        entry = self._results.get(token)
+        if entry is None:
+            raise ValueError("Cursor expired, call the tool again (without cursor) for a fresh result")
+        return entry[1]
+
+
+pages = PagedResults()
+
+
+def parse_cursor(cursor: str) -> Tuple[str, str, int]:
+    """"a1b2c3:rows@50" -> ("a1b2c3", "rows", 50); an empty key pages a plain list or string"""
+    token, _, rest = cursor.partition(":")
+    key, _, offset = rest.rpartition("@")
+    if not token or not offset.isdigit():
+        raise ValueError(f"Invalid cursor {cursor!r}, pass the next_cursor of the previous result")
+    return token, key, int(offset)
+
+
+def _largest_key(result: Dict[str, Any]) -> str:
+    sizes = [(_size(value), key) for key, value in result.items() if isinstance(value, (list, dict))]
+    return max(sizes)[1] if sizes else ""
+
+
+def _page(items: List[Any], offset: int, budget: int) -> int:
+    """End index of the page starting at `offset` that fits in `budget` bytes (at least one item)"""
+    end, used = offset, 0
+    while end < len(items):
+        used += _size(items[end]) + 2
+        if used > budget and end > offset:
+            break
+        end += 1
+    return end
+
+
+def _page_string(text: str, token: str, offset: int, budget: int) -> Dict[str, Any]:
+    data = text.encode()
+    end = min(len(data), offset + budget)
+    while end > offset + 1 and end < len(data) and data[end] & 0xC0 == 0x80:  # not inside a UTF-8 character
+        end -= 1
+    return {"text": data[offset:end].decode(),
+            "truncated": {"offset": offset, "returned_bytes": end - offset, "total_bytes": len(data),
+                          "next_cursor": f"{token}:@{end}" if end < len(data) else None}}
+
+
+def _page_collection(result: Any, token: str, key: str, offset: int, budget: int) -> Any:
+    """Page of the largest (or `key`) list/mapping of `result`, with the rest of `result` kept as is"""
+    if isinstance(result, list):
+        rest, items, as_dict = {}, result, False
+    else:
+        key = key or _largest_key(result)
+        if key not in result or not isinstance(result[key], (list, dict)):
+            return result
+        rest = {k: v for k, v in result.items() if k != key}
+        as_dict = isinstance(result[key], dict)
+        items = list(result[key].items()) if as_dict else result[key]
+        budget -= _size(rest)
+
+    end = _page(items, offset, budget)
+    page = items[offset:end]
+    info = {"key": key, "offset": offset, "returned": len(page), "total": len(items),
+            "next_cursor": f"{token}:{key}@{end}" if end < len(items) else None}
+    if not key:
+        return {"items": page, "truncated": info}
+    return {**rest, key: dict(page) if as_dict else page, "truncated": info}
+
+
+def _budget(max_bytes: int) -> int:
+    return max(max_bytes, RESERVE * 2) - RESERVE if max_bytes > 0 else 2 ** 62
+
+
+def render(result: Any, max_bytes: int) -> Any:
+    """`result` as compact JSON text, its first page (the rest kept in `pages`) if larger than `max_bytes`
+    (0 or less: no budget)"""
+    if isinstance(result, str):
+        if max_bytes <= 0 or len(result.encode()) <= max_bytes:
+            return result
+        return _dumps(_page_string(result, pages.put(result), 0, _budget(max_bytes)))
+    if not isinstance(result, (list, dict)):
+        return result
+    text = _dumps(result)
+    if max_bytes <= 0 or len(text.encode()) <= max_bytes:
+        return text
+    return _dumps(_page_collection(result, pages.put(result), "", 0, _budget(max_bytes)))
+
+
+def render_page(cursor: str, max_bytes: int) -> str:
+    """The page of a kept result that `cursor` points at"""
+    token, key, offset = parse_cursor(cursor)
+    result = pages.get(token)
+    if isinstance(result, str):
+        return _dumps(_page_string(result, token, offset, _budget(max_bytes)))
+    return _dumps(_page_collection(result, token, key, offset, _budget(max_bytes)))
+
+
+def shaped(fn: Callable, default_max_bytes: int) -> Callable:
+    """Wrap a sync or async tool so that it takes `max_bytes` and `cursor` and returns rendered results;
+    with `cursor` the page comes from the kept result and the tool itself is not called"""
+    def apply(result, max_bytes):
+        return render(result, default_max_bytes if max_bytes == 0 else max_bytes)
+
+    def page(cursor, max_bytes):
+        try:
+            return render_page(cursor, default_max_bytes if max_bytes == 0 else max_bytes)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, max_bytes: int = 0, cursor: str = "", **kwargs):
+            if cursor:
+                return page(cursor, max_bytes)
+            return apply(await fn(*args, **kwargs), max_bytes)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, max_bytes: int = 0, cursor: str = "", **kwargs):
+            if cursor:
+                return page(cursor, max_bytes)
+            return apply(fn(*args, **kwargs), max_bytes)
+
+    signature = inspect.signature(fn)
+    extra = [inspect.Parameter("max_bytes", inspect.Parameter.KEYWORD_ONLY, default=0, annotation=int),
+             inspect.Parameter("cursor", inspect.Parameter.KEYWORD_ONLY, default="", annotation=str)]
+    # the result is always sent as text, whatever the tool declares
+    wrapper.__signature__ = signature.replace(parameters=list(signature.parameters.values()) + extra,
+                                              return_annotation=inspect.Signature.empty)
+    return wrapper
+
+
+def signature_summary(snapshot: Snapshot, prefix: str = "") -> Dict[str, List[str]]:
+    """{component: ["method(signature)", ...]} of the components starting with `prefix`, memoized per snapshot"""
+    key = ("signatures", prefix)
+    summary = snapshot.rendered.get(key)
+    if summary is None:
+        summary = {}
+        for component, methods in snapshot.data.items():
+            if not component.startswith(prefix):
+                continue
+            if not isinstance(methods, dict):
+                summary[component] = []
+                continue
+            summary[component] = [
+                f"{method}{entry.get('signature') or '()'}" if isinstance(entry, dict) else method
+                for method, entry in methods.items()]
+        snapshot.rendered[key] = summary
+    return summary
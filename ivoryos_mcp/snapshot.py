@@ -0,0 +1,113 @@
+"""
+Cached copy of the IvoryOS `/instruments` snapshot.
+
+The snapshot (every component and its callable methods) changes only when
+the deck is reloaded, so it is kept for a configurable TTL and revalidated
+with `If-None-Match` when IvoryOS sends an ETag. A component -> methods index
+is built once per snapshot version so task validation is a dict lookup.
+"""
+import asyncio
+import time
+from typing import Dict, Any, Optional, FrozenSet
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+
+INSTRUMENTS_PATH = "/instruments"
+
+
+class Snapshot:
+    """One fetched version of the instrument snapshot"""
+
+    def __init__(self, data: Dict[str, Any], etag: Optional[str], version: int):
+        self.data = data
+        self.etag = etag
+        self.version = version
+        self.fetched_at = time.monotonic()
+        # summaries rendered from this version (see shaping.signature_summary)
+        self.rendered: Dict[Any, Any] = {}
+        self.index: Dict[str, FrozenSet[str]] = {
+            component: frozenset(methods) if isinstance(methods, dict) else frozenset()
+            for component, methods in data.items()
+        }
+
+    def has_component(self, component: str) -> bool:
+        return component in self.index
+
+    def has_method(self, component: str, method: str) -> bool:
+        """Unknown method lists (non-dict entries) are not rejected"""
+        methods = self.index.get(component)
+        if methods is None:
+            return False
+        return not methods or method in methods
+
+    def task_error(self, component: str, method: str) -> Optional[str]:
+        """Why `component.method` cannot be run, or None if it looks valid"""
+        if not self.has_component(component):
+            return f"Component {component} does not exist. Available: {list(self.index.keys())}"
+        if not self.has_method(component, method):
+            return f"Method {method} does not exist on {component}. Available: {sorted(self.index[component])}"
+        return None
+
+
+class SnapshotCache:
+    """TTL cache with ETag revalidation and explicit invalidation"""
+
+    def __init__(self, auth: SessionAuth, ttl: float = 60.0):
+        self.auth = auth
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self.hits = 0
+        self.fetches = 0
+        self.not_modified = 0
+
+    async def get(self, force: bool = False) -> Snapshot:
+        """Return the cached snapshot, refetching or revalidating it once expired"""
+        snapshot = self._snapshot
+        if not force and snapshot is not None and time.monotonic() - snapshot.fetched_at < self.ttl:
+            self.hits += 1
+            return snapshot
+
+        async with self._lock:
+            # another caller may have refreshed while we waited for the lock
+            snapshot = self._snapshot
+            if not force and snapshot is not None and time.monotonic() - snapshot.fetched_at < self.ttl:
+                self.hits += 1
+                return snapshot
+            return await self._refresh(snapshot)
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next call refetches it"""
+        self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "ttl": self.ttl,
+            "version": snapshot.version if snapshot else None,
+            "age": round(time.monotonic() - snapshot.fetched_at, 3) if snapshot else None,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+        }
+
+    async def _refresh(self, current: Optional[Snapshot]) -> Snapshot:
+        headers = {}
+        if current is not None and current.etag:
+            headers["If-None-Match"] = current.etag
+
+        self.fetches += 1
+        resp = await self.auth.get(INSTRUMENTS_PATH, headers=headers)
+        if resp.status_code == httpx.codes.NOT_MODIFIED and current is not None:
+            self.not_modified += 1
+            current.fetched_at = time.monotonic()
+            return current
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to get instruments: {resp.status_code}")
+
+        self._version += 1
+        self._snapshot = Snapshot(resp.json(), resp.headers.get("etag"), self._version)
+        return self._snapshot
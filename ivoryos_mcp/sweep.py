@@ -0,0 +1,340 @@
+"""
+Chunked, resumable kwargs sweeps for `run-workflow-kwargs`.
+
+A sweep spec is expanded lazily into kwargs rows:
+
+    {"grid": {"x": [1, 2, 3], "y": {"start": 0, "stop": 1, "num": 11}}}   cartesian product
+    {"lhs": {"x": [0, 1], "y": [10, 20]}, "samples": 1000, "seed": 0}    Latin hypercube
+    {"csv": "/path/rows.csv"}                                            one row per line
+    {"npy": "/path/rows.npy", "columns": ["x", "y"]}                     2-D array, memory-mapped
+    {"rows": [{...}, ...]}                                               an explicit list
+
+plus an optional `"fixed": {...}` merged into every row. A spec is checked
+before anything runs: a CSV file is read once in full (a header of parameter
+names, the same number of values on every line), an npy file's shape is
+checked, and the columns must be parameters of the workflow when those are
+known. The rows are sent to
+`/executions/config` in chunks of `chunk_size`: the next chunk is built while
+the current one runs and submitted as soon as the runner is idle again.
+Progress is written to `{root}/{server}/sweeps/{job id}.json` after every
+chunk, and the job id is derived from the spec, so starting the same sweep
+again resumes after the last completed chunk (a chunk interrupted mid-run
+is run again). A sweep holds the deck's dispatch lock (shared with the job
+queue and the run tools) from its first chunk to its last, and is "waiting"
+while a queued job or a run started by a tool holds it.
+"""
+import asyncio
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Iterator
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.execution import wait_for_execution
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CONFIG_PATH = "/executions/config"
+BUSY_POLL = 2.0
+
+
+def _axis(values: Any) -> List[Any]:
+    """Grid axis: a list, or {"start", "stop", "num"} (inclusive) / {"start", "stop", "step"}"""
+    if isinstance(values, list):
+        return values
+    start, stop = float(values["start"]), float(values["stop"])
+    if "num" in values:
+        num = int(values["num"])
+        return [start + (stop - start) * i / (num - 1) for i in range(num)] if num > 1 else [start]
+    step = float(values["step"])
+    return [start + step * i for i in range(int((stop - start) / step + 1e-9) + 1)]
+
+
+def _number(text: str) -> Any:
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield {key: _number(value) for key, value in row.items()}
+
+
+def _check_csv(path: str) -> Dict[str, Any]:
+    """{"columns", "rows"} of a CSV sweep file, ValueError for a missing header or a ragged line"""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise ValueError(f"{path} is empty, expected a header row of parameter names")
+        if not all(name.strip() for name in header):
+            raise ValueError(f"{path} has a column without a name in its header {header}")
+        duplicates = sorted({name for name in header if header.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"{path} repeats the columns {duplicates}")
+        rows = 0
+        for row in reader:
+            if not row:
+                continue  # blank lines are skipped, as csv.DictReader does
+            if len(row) != len(header):
+                raise ValueError(f"{path} line {reader.line_num} has {len(row)} values, the header has {len(header)}")
+            rows += 1
+    return {"columns": header, "rows": rows}
+
+
+def _npy_rows(path: str, columns: List[str]) -> Iterator[Dict[str, Any]]:
+    if np is None:
+        raise Exception("npy sweeps need numpy")
+    array = np.load(path, mmap_mode="r")
+    if array.ndim != 2 or array.shape[1] != len(columns):
+        raise ValueError(f"{path} has shape {array.shape}, expected (rows, {len(columns)})")
+    for start in range(0, len(array), 1024):
+        for values in np.asarray(array[start:start + 1024]).tolist():
+            yield dict(zip(columns, values))
+
+
+def _lhs_rows(ranges: Dict[str, List[float]], samples: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """One sample per stratum along every axis, strata paired by seeded permutations"""
+    rng = random.Random(seed)
+    permutations = {}
+    for name in ranges:
+        permutation = list(range(samples))
+        rng.shuffle(permutation)
+        permutations[name] = permutation
+    for i in range(samples):
+        yield {name: low + (high - low) * (permutations[name][i] + rng.random()) / samples
+               for name, (low, high) in ranges.items()}
+
+
+def expand(spec: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Lazily generated kwargs rows of a sweep spec"""
+    if "grid" in spec:
+        names = list(spec["grid"])
+        axes = [_axis(spec["grid"][name]) for name in names]
+        rows = (dict(zip(names, values)) for values in itertools.product(*axes))
+    elif "lhs" in spec:
+        rows = _lhs_rows(spec["lhs"], int(spec["samples"]), int(spec.get("seed", 0)))
+    elif "csv" in spec:
+        rows = _csv_rows(spec["csv"])
+    elif "npy" in spec:
+        rows = _npy_rows(spec["npy"], list(spec["columns"]))
+    elif "rows" in spec:
+        rows = iter(spec["rows"])
+    else:
+        raise ValueError("Sweep spec needs one of grid, lhs, csv, npy or rows")
+    fixed = spec.get("fixed")
+    return ({**fixed, **row} for row in rows) if fixed else rows
+
+
+def check(spec: Dict[str, Any], parameters: Optional[List[str]] = None) -> Optional[int]:
+    """Raise ValueError for a spec that would fail mid-sweep (None `parameters`: the workflow's are unknown);
+    returns the number of rows of a CSV spec"""
+    rows = expand(spec)
+    total = None
+    if "grid" in spec:
+        columns = list(spec["grid"])
+    elif "lhs" in spec:
+        columns = list(spec["lhs"])
+    elif "csv" in spec:
+        checked = _check_csv(spec["csv"])
+        columns, total = checked["columns"], checked["rows"]
+    elif "npy" in spec:
+        next(rows, None)  # checks the array's shape
+        columns = list(spec["columns"])
+    else:
+        if not all(isinstance(row, dict) for row in spec["rows"]):
+            raise ValueError("Sweep rows must be objects of keyword arguments")
+        columns = list(dict.fromkeys(name for row in spec["rows"] for name in row))
+    columns += [name for name in spec.get("fixed") or {} if name not in columns]
+    if parameters is not None:
+        unknown = [name for name in columns if name not in parameters]
+        if unknown:
+            raise ValueError(f"Unknown parameters {unknown}, the workflow takes {list(parameters)}")
+    return total
+
+
+def count(spec: Dict[str, Any]) -> Optional[int]:
+    """Number of rows, when known without reading a file"""
+    if "grid" in spec:
+        total = 1
+        for values in spec["grid"].values():
+            total *= len(_axis(values))
+        return total
+    if "lhs" in spec:
+        return int(spec["samples"])
+    if "rows" in spec:
+        return len(spec["rows"])
+    return None
+
+
+def chunks(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class SweepJob:
+    """Progress of one sweep, persisted after every completed chunk"""
+
+    def __init__(self, job_id: str, spec: Dict[str, Any], chunk_size: int, path: str):
+        self.id = job_id
+        self.spec = spec
+        self.chunk_size = chunk_size
+        self.path = path
+        self.total = count(spec)
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.chunks: List[Dict[str, Any]] = []
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"spec": self.spec, "chunk_size": self.chunk_size, "chunks_done": self.chunks_done,
+                       "rows_done": self.rows_done, "chunks": self.chunks, "state": self.state}, f)
+        os.replace(tmp, self.path)
+
+    def load(self) -> bool:
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.chunks_done, self.rows_done = saved["chunks_done"], saved["rows_done"]
+        self.chunks, self.state = saved["chunks"], saved["state"]
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        status = {"job_id": self.id, "state": self.state, "chunk_size": self.chunk_size,
+                  "chunks_done": self.chunks_done, "rows_done": self.rows_done, "rows_total": self.total}
+        if self.total:
+            status["progress"] = round(self.rows_done / self.total, 4)
+        if self.chunks:
+            status["last_chunk"] = self.chunks[-1]
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class SweepRunner:
+    """Runs sweeps in the background, one chunk (one IvoryOS run) at a time"""
+
+    def __init__(self, auth: SessionAuth, root: str, namespace: str = "", chunk_timeout: float = 86400.0,
+                 dispatch_lock: Optional[asyncio.Lock] = None):
+        self.auth = auth
+        # shared with the job queue, so only one of them starts runs on the deck
+        self.dispatch_lock = dispatch_lock or asyncio.Lock()
+        self.root = os.path.join(root, hashlib.sha1(namespace.encode()).hexdigest()[:12], "sweeps")
+        self.chunk_timeout = chunk_timeout
+        self.jobs: Dict[str, SweepJob] = {}
+
+    def start(self, spec: Dict[str, Any], chunk_size: int = 500, restart: bool = False,
+              parameters: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Start (or resume) the sweep described by `spec` for a workflow taking `parameters` (None: unknown)"""
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        total = check(spec, parameters)  # reject malformed specs before anything runs
+        key = json.dumps({"spec": spec, "chunk_size": chunk_size}, sort_keys=True, default=str)
+        job_id = hashlib.sha1(key.encode()).hexdigest()[:12]
+        job = self.jobs.get(job_id)
+        if job is not None and job.task is not None and not job.task.done():
+            return job.status()
+
+        job = self.jobs[job_id] = SweepJob(job_id, spec, chunk_size, os.path.join(self.root, f"{job_id}.json"))
+        if job.total is None:
+            job.total = total
+        if not restart:
+            job.load()
+        if job.state == "done":
+            return job.status()
+        job.state = "running"
+        job.error = None
+        job.task = asyncio.create_task(self._run(job))
+        return job.status()
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Stop submitting chunks (the chunk already running is left to finish)"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return f"Unknown sweep {job_id}"
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        return job.status()
+
+    def status(self, job_id: str = "") -> Any:
+        if job_id:
+            job = self.jobs.get(job_id)
+            return job.status() if job else f"Unknown sweep {job_id}"
+        return [job.status() for job in self.jobs.values()]
+
+    async def wait(self, job_id: str) -> Dict[str, Any]:
+        job = self.jobs[job_id]
+        if job.task is not None:
+            try:
+                await job.task
+            except asyncio.CancelledError:
+                pass
+        return job.status()
+
+    async def _wait_idle(self, submitted_at: Optional[float] = None) -> None:
+        """Wait until IvoryOS is neither running nor paused (and the run submitted at `submitted_at` is over)"""
+        while True:
+            summary = await wait_for_execution(self.auth, timeout=self.chunk_timeout, submitted_at=submitted_at)
+            if summary["state"] == "idle":
+                return
+            await asyncio.sleep(BUSY_POLL)
+
+    async def _run(self, job: SweepJob) -> None:
+        pending = chunks(itertools.islice(expand(job.spec), job.rows_done, None), job.chunk_size)
+        try:
+            if self.dispatch_lock.locked():
+                job.state = "waiting"  # for a queued job or a tool's run to finish
+            async with self.dispatch_lock:
+                job.state = "running"
+                chunk = next(pending, None)
+                while chunk is not None:
+                    await self._wait_idle()
+                    start = time.monotonic()
+                    resp = await self.auth.post(CONFIG_PATH, json={"kwargs": chunk})
+                    if resp.status_code != httpx.codes.OK:
+                        raise Exception(f"Failed to start chunk {job.chunks_done}: {resp.status_code}")
+                    reply = resp.json()
+                    if isinstance(reply, dict) and reply.get("error"):
+                        raise Exception(f"Chunk {job.chunks_done} was rejected: {reply}")
+                    chunk_rows = len(chunk)
+                    chunk = next(pending, None)  # built while the submitted chunk runs
+                    await self._wait_idle(submitted_at=start)
+
+                    job.chunks.append({"index": job.chunks_done, "rows": chunk_rows, "reply": reply,
+                                       "seconds": round(time.monotonic() - start, 2)})
+                    job.chunks_done += 1
+                    job.rows_done += chunk_rows
+                    job.save()
+            job.state = "done"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            job.state, job.error = "failed", str(e)
+        finally:
+            job.save()
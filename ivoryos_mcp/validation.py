@@ -0,0 +1,231 @@
+"""
+Static checks of workflow scripts against the instrument snapshot.
+
+Every `deck.*`/`blocks.*` call in a script is resolved to a snapshot
+component and method, and its arguments are bound against the method's
+`signature` string (as sent by `/instruments`): unknown keywords, too many
+positional arguments and missing required parameters are reported with
+their line and column. `**{...}` with literal keys (the form IvoryOS
+generates) is checked like plain keywords; other `*`/`**` unpacking turns
+off the checks it could satisfy. Results are memoized per snapshot version
+and script hash, so resubmitting the same script costs a dict lookup.
+"""
+import ast
+import difflib
+import functools
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from ivoryos_mcp.snapshot import Snapshot
+
+ROOTS = ("deck", "blocks")
+
+
+class Signature:
+    """Parameter names of one method, parsed from its signature string"""
+
+    def __init__(self, positional: List[str], required: List[str], keyword_only: List[str],
+                 var_positional: bool, var_keyword: bool):
+        self.positional = positional
+        self.required = required
+        self.keyword_only = keyword_only
+        self.var_positional = var_positional
+        self.var_keyword = var_keyword
+
+    @property
+    def names(self) -> List[str]:
+        return self.positional + self.keyword_only
+
+
+def _split_parameters(text: str) -> List[str]:
+    """Split on top-level commas, for signatures whose defaults are reprs (`<Mode.A: 1>`)"""
+    parts, depth, current, quote = [], 0, [], None
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "([{<":
+            depth += 1
+        elif char in ")]}>":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_signature(signature: Any) -> Optional[Signature]:
+    """`(x: float = 1.0, *, y=2) -> dict` as a Signature, None when it cannot be read"""
+    if not isinstance(signature, str):
+        return None
+    text = signature.strip().split(" -> ")[0]
+    try:
+        arguments = ast.parse(f"def _{text}: pass").body[0].args
+    except SyntaxError:
+        arguments = None
+    if arguments is not None:
+        positional = [a.arg for a in arguments.posonlyargs + arguments.args]
+        required = positional[:len(positional) - len(arguments.defaults)]
+        required += [a.arg for a, default in zip(arguments.kwonlyargs, arguments.kw_defaults) if default is None]
+        return Signature(positional, required, [a.arg for a in arguments.kwonlyargs],
+                         arguments.vararg is not None, arguments.kwarg is not None)
+
+    # fallback: names only, anything with "=" is optional
+    inner = text[text.find("(") + 1:text.rfind(")")] if "(" in text else text
+    positional, required, keyword_only = [], [], []
+    var_positional = var_keyword = keyword_section = False
+    for part in _split_parameters(inner):
+        name = part.split(":", 1)[0].split("=", 1)[0].strip()
+        if name == "/":
+            continue
+        if name == "*":
+            keyword_section = True
+        elif name.startswith("**"):
+            var_keyword = True
+        elif name.startswith("*"):
+            var_positional = keyword_section = True
+        else:
+            (keyword_only if keyword_section else positional).append(name)
+            if "=" not in part:
+                required.append(name)
+    return Signature(positional, required, keyword_only, var_positional, var_keyword)
+
+
+def _call_path(node: ast.expr) -> Optional[List[str]]:
+    """["deck", "sdl", "dose"] for `deck.sdl.dose`, None for anything not rooted at deck/blocks"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name) and node.id in ROOTS and parts:
+        return [node.id] + parts[::-1]
+    return None
+
+
+def _signature(snapshot: Snapshot, component: str, method: str) -> Optional[Signature]:
+    methods = snapshot.data.get(component)
+    entry = methods.get(method) if isinstance(methods, dict) else None
+    return parse_signature(entry.get("signature") if isinstance(entry, dict) else None)
+
+
+def _suggest(name: str, options) -> str:
+    close = difflib.get_close_matches(name, list(options), n=1)
+    return f" Did you mean {close[0]}?" if close else ""
+
+
+def _bind(target: str, signature: Signature, positional: int, keywords: List[str],
+          unpacked_positional: bool = False, unpacked_keywords: bool = False) -> List[str]:
+    errors = []
+    if not signature.var_positional and not unpacked_positional and positional > len(signature.positional):
+        errors.append(f"{target}() takes {len(signature.positional)} positional arguments but {positional} were given")
+    bound = set(signature.positional[:positional])
+    for keyword in keywords:
+        if keyword not in signature.names and not signature.var_keyword:
+            errors.append(f"{target}() got an unexpected keyword argument '{keyword}'."
+                          f"{_suggest(keyword, signature.names)} Parameters: {signature.names}")
+        elif keyword in bound:
+            errors.append(f"{target}() got multiple values for argument '{keyword}'")
+    if not unpacked_positional and not unpacked_keywords:
+        missing = [name for name in signature.required if name not in bound and name not in keywords]
+        if missing:
+            errors.append(f"{target}() missing required arguments: {missing}")
+    return errors
+
+
+def _check_arguments(call: ast.Call, target: str, signature: Signature) -> List[str]:
+    keywords = []
+    unpacked_keywords = False
+    for keyword in call.keywords:
+        if keyword.arg is not None:
+            keywords.append(keyword.arg)
+        elif isinstance(keyword.value, ast.Dict) and all(
+                isinstance(key, ast.Constant) and isinstance(key.value, str) for key in keyword.value.keys):
+            keywords += [key.value for key in keyword.value.keys]
+        else:
+            unpacked_keywords = True
+    unpacked_positional = any(isinstance(arg, ast.Starred) for arg in call.args)
+    return _bind(target, signature, len(call.args), keywords, unpacked_positional, unpacked_keywords)
+
+
+def validate_source(source: str, snapshot: Snapshot) -> List[Dict[str, Any]]:
+    """[{"line", "col", "error"}] for every problem found in one script"""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        return [{"line": e.lineno, "col": e.offset, "error": f"SyntaxError: {e.msg}"}]
+
+    errors = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        path = _call_path(node.func)
+        if path is None:
+            continue
+        component, method, target = ".".join(path[:-1]), path[-1], ".".join(path)
+
+        def report(message):
+            errors.append({"line": node.lineno, "col": node.col_offset, "error": message})
+
+        if not snapshot.has_component(component):
+            # `deck.sdl()` (a call on the component itself) or an unknown component
+            if not snapshot.has_component(target):
+                report(f"Component {component} does not exist.{_suggest(component, snapshot.index)}")
+            continue
+        if not snapshot.has_method(component, method):
+            report(f"Method {method} does not exist on {component}.{_suggest(method, snapshot.index[component])}")
+            continue
+        signature = _signature(snapshot, component, method)
+        if signature is not None:
+            for message in _check_arguments(node, target, signature):
+                report(message)
+    return sorted(errors, key=lambda error: (error["line"] or 0, error["col"] or 0))
+
+
+def task_errors(snapshot: Snapshot, component: str, method: str, kwargs: Optional[Dict[str, Any]]) -> List[str]:
+    """Problems of one `component.method(**kwargs)` task (as sent by execute-task), empty when it looks valid"""
+    error = snapshot.task_error(component, method)
+    if error:
+        return [error]
+    signature = _signature(snapshot, component, method)
+    if signature is None:
+        return []
+    return _bind(f"{component}.{method}", signature, 0, list(kwargs or {}))
+
+
+class ScriptValidator:
+    """validate_source memoized by (snapshot version, script hash), least recently used dropped first"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[Tuple[int, str], List[Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def validate(self, source: str, snapshot: Snapshot) -> List[Dict[str, Any]]:
+        if not source or not source.strip():
+            return []
+        key = (snapshot.version, hashlib.sha256(source.encode()).hexdigest())
+        errors = self._results.get(key)
+        if errors is not None:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return errors
+        self.misses += 1
+        errors = self._results[key] = validate_source(source, snapshot)
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return errors
+
+    def validate_scripts(self, scripts: Dict[str, str], snapshot: Snapshot) -> List[Dict[str, Any]]:
+        """Errors of several phases ({"script": ..., "prep": ...}), tagged with their phase"""
+        return [{"phase": phase, **error} for phase, source in scripts.items()
+                for error in self.validate(source, snapshot)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._results), "hits": self.hits, "misses": self.misses}
@@ -6,66 +6,218 @@ less convoluted, easier to debug and work with)
 
 """
 # ivoryos_mcp_server.py
+import asyncio
 import os
+import time
 from typing import Optional, Dict, List, Any
 
-from mcp.server.fastmcp import FastMCP
 import httpx
 from dotenv import load_dotenv
+from mcp import types
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.batch import run_batch, run_task
+from ivoryos_mcp.decks import Deck, DeckRegistry, load_deck_config
+from ivoryos_mcp.execution import STATUS_PATH, summarize_status, wait_for_execution
+from ivoryos_mcp.jobs import JobQueue
+from ivoryos_mcp.lazy_mcp import LazyFastMCP
+from ivoryos_mcp.metrics import MetricsRegistry, serve_metrics
+from ivoryos_mcp.records import load_record_page
+from ivoryos_mcp.script_index import ScriptIndex
+from ivoryos_mcp.shaping import shaped, signature_summary
+from ivoryos_mcp.snapshot import SnapshotCache
+from ivoryos_mcp.validation import ScriptValidator, task_errors
+# campaign, record_cache and sweep load numpy; they are imported when the first deck is built
 
 
 # Configuration - Modify these defaults for your setup
 load_dotenv()
-mcp = FastMCP("IvoryOS MCP")
+# tools are registered on the first tools/list or tools/call, not at import
+mcp = LazyFastMCP("IvoryOS MCP")
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 
-# Global HTTP client and configuration
-client = httpx.Client(follow_redirects=True)
-url = os.getenv("IVORYOS_URL", "http://127.0.0.1:8000/ivoryos").rstrip('/')
 login_data = {
     "username": os.getenv("IVORYOS_USERNAME", "admin"),
     "password": os.getenv("IVORYOS_PASSWORD", "admin")
 }
-
-
-def _check_authentication() -> None:
-    """Check and handle authentication"""
+# Call counts, errors, payload bytes and latency histograms per tool and per IvoryOS endpoint
+metrics = MetricsRegistry()
+if os.getenv("IVORYOS_METRICS_PORT"):
+    serve_metrics(metrics, int(os.getenv("IVORYOS_METRICS_PORT")))
+cache_dir = os.getenv("IVORYOS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ivoryos-mcp"))
+
+
+def _make_deck(name: str, config: Dict[str, Any]) -> Deck:
+    """HTTP client, session, caches, background jobs and job queue of one IvoryOS instance"""
+    from ivoryos_mcp import campaign
+    from ivoryos_mcp.record_cache import RecordCache
+    from ivoryos_mcp.sweep import SweepRunner
+
+    url = config["url"]
+    # HTTP client shared by all (async) tools addressing this deck
+    client = httpx.AsyncClient(
+        follow_redirects=True,
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("IVORYOS_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("IVORYOS_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("IVORYOS_KEEPALIVE_EXPIRY", "30")),
+        ),
+        timeout=float(os.getenv("IVORYOS_TIMEOUT", "30")),
+    )
+    credentials = {"username": config["username"], "password": config["password"]}
+    # Keeps the session cookie, logs in only when IvoryOS rejects a request
+    auth = SessionAuth(client, url, credentials, metrics=metrics, name=name if len(decks.config) > 1 else "")
+    # Workflow script library index, re-synced at most every IVORYOS_LIBRARY_TTL seconds. Fetching a
+    # script makes it the session's draft, so syncs log in on a client (cookie jar) of their own
+    sync_client = httpx.AsyncClient(follow_redirects=True, timeout=float(os.getenv("IVORYOS_TIMEOUT", "30")))
+    sync_auth = SessionAuth(sync_client, url, credentials, metrics=metrics,
+                            name=f"{name} library" if len(decks.config) > 1 else "library")
+    script_index = ScriptIndex(auth, cache_dir, namespace=url, ttl=float(os.getenv("IVORYOS_LIBRARY_TTL", "60")),
+                               sync_auth=sync_auth)
+
+    # held by the job queue, a sweep or a run tool while it starts runs, so they never interleave on the deck
+    dispatch_lock = asyncio.Lock()
+    ivoryos = Deck(
+        name, url, client, auth,
+        # Instrument snapshot is reused for IVORYOS_SNAPSHOT_TTL seconds
+        snapshots=SnapshotCache(auth, ttl=float(os.getenv("IVORYOS_SNAPSHOT_TTL", "60"))),
+        # Completed workflow records are kept as NumPy columns (when numpy is installed)
+        record_cache=RecordCache(cache_dir, namespace=url),
+        # Static checks of submitted scripts, memoized per snapshot version and script hash
+        validator=ScriptValidator(),
+        script_index=script_index,
+        # Chunked kwargs sweeps, progress kept next to the caches so they can be resumed
+        sweeps=SweepRunner(auth, cache_dir, namespace=url, dispatch_lock=dispatch_lock),
+        # Early stopping of the running campaign (target reached, no improvement, time budget)
+        campaign_watcher=campaign.CampaignWatcher(auth, poll=float(os.getenv("IVORYOS_CAMPAIGN_POLL", "5"))),
+        # Queued runs, started whenever IvoryOS is idle (status polled every IVORYOS_JOB_POLL seconds)
+        jobs=JobQueue(auth, cache_dir, namespace=url, poll=float(os.getenv("IVORYOS_JOB_POLL", "5")),
+                      load_script=script_index.fetch, dispatch_lock=dispatch_lock),
+        dispatch_lock=dispatch_lock,
+    )
+    # jobs left queued by a previous run of the server are picked up again
+    ivoryos.jobs.start()
+    return ivoryos
+
+
+# IvoryOS instances from IVORYOS_DECKS (or the single one at IVORYOS_URL), addressed by the `deck` argument
+decks = DeckRegistry(load_deck_config(os.getenv("IVORYOS_DECKS", ""),
+                                      os.getenv("IVORYOS_URL", "http://127.0.0.1:8000/ivoryos"), login_data),
+                     _make_deck)
+# Upper bound for tools called with wait=True
+wait_timeout = float(os.getenv("IVORYOS_WAIT_TIMEOUT", "600"))
+# Default size budget of a tool result in bytes of JSON (0: unlimited), overridable per call
+max_bytes = int(os.getenv("IVORYOS_MAX_BYTES", "24000"))
+
+
+async def _start_run(ivoryos: Deck, body: Dict[str, Any]) -> httpx.Response:
+    """POST `body` to /executions/config holding the deck's dispatch lock, which is kept (by a background task)
+    until the run has settled, so the job queue and sweeps do not start a run in between"""
+    if ivoryos.dispatch_lock.locked():
+        raise RuntimeError("another run (a queued job, a sweep or an earlier run-workflow call) is in progress "
+                           "on this deck, queue the run with enqueue-job or try again once it has finished")
+    await ivoryos.dispatch_lock.acquire()
     try:
-        resp = client.get(f"{url}/", follow_redirects=False)
-        if resp.status_code == httpx.codes.OK:
-            return
-
-        login_resp = client.post(f"{url}/auth/login", data=login_data)
-        if login_resp.status_code != 200:
-            raise Exception(f"Login failed with status {login_resp.status_code}")
-    except httpx.ConnectError as e:
-        raise Exception(f"Connection error during authentication: {e}") from e
+        resp = await ivoryos.auth.post("/executions/config", json=body)
+    except BaseException:
+        ivoryos.dispatch_lock.release()
+        raise
+    if resp.status_code != httpx.codes.OK:
+        ivoryos.dispatch_lock.release()
+        return resp
+    ivoryos.held_run = asyncio.create_task(_hold_until_settled(ivoryos, time.monotonic()))
+    return resp
+
+
+async def _hold_until_settled(ivoryos: Deck, submitted_at: float) -> Dict[str, Any]:
+    """Final execution summary of the run submitted at `submitted_at`, then let jobs and sweeps go on"""
+    try:
+        return await wait_for_execution(ivoryos.auth, timeout=float("inf"), submitted_at=submitted_at)
+    except Exception as e:
+        return {"state": "unknown", "error": str(e)}  # IvoryOS unreachable, nothing left to protect
+    finally:
+        ivoryos.dispatch_lock.release()
+        ivoryos.jobs.start()  # queued jobs go next
+
+
+async def _wait_if_requested(ivoryos: Deck, result, wait: bool, held: Optional[asyncio.Task] = None):
+    """Attach the final execution summary to `result` (of a run just submitted) when the caller asked to wait;
+    `held` is the task holding the dispatch lock for a run started by `_start_run`"""
+    if not wait:
+        return result
+    if held is None:
+        execution = await wait_for_execution(ivoryos.auth, timeout=wait_timeout, submitted_at=time.monotonic())
+    else:
+        try:
+            execution = await asyncio.wait_for(asyncio.shield(held), wait_timeout)
+        except asyncio.TimeoutError:
+            execution = await wait_for_execution(ivoryos.auth, timeout=0)
+    return {"result": result, "execution": execution}
+
+
+def tool(name: str):
+    """`mcp.tool(name)` recording the tool's calls in `metrics`, results cut to `max_bytes` (pages via `cursor`)"""
+    def decorator(fn):
+        mcp.defer_tool(metrics.instrument("tool", name)(shaped(fn, max_bytes)), name)
+        return fn
+    return decorator
 
 
 # Direct MCP tool implementations
-@mcp.tool("platform-info")
-def get_platform_info() -> str:
-    """Get platform information and available functions"""
-    try:
-        _check_authentication()
-        snapshot = client.get(f"{url}/instruments").json()
-        return (
-            "workflow execution has 3 blocks, prep, main (iterate) and cleanup.\n"
-            "one can execute the workflow using one of the 3 options:\n"
-            "1. simple repeat for static workflow with `run_workflow_repeat`\n"
-            "2. repeat with kwargs `run_workflow_kwargs`\n"
-            "3. campaign `run_workflow_campaign`\n"
-            f"Available functions: {snapshot}"
-        )
+@tool("platform-info")
+async def get_platform_info(component: str = "", detail: str = "signatures", deck: str = ""):
+    """Get platform information and available functions: the method signatures of every component
+    (starting with `component`, e.g. "deck.sdl"), or with detail="full" everything IvoryOS reports
+    (docstrings included). Every tool takes an optional `deck` naming the IvoryOS instance to use
+    (see `list-decks`), and `max_bytes`/`cursor` to page through results larger than the size budget (later
+    pages come from the first call's result, the tool is not run again)"""
+    try:
+        ivoryos = decks.get(deck)
+        snapshot = await ivoryos.snapshots.get()
+        if detail == "full":
+            functions = {name: methods for name, methods in snapshot.data.items() if name.startswith(component)}
+        else:
+            functions = signature_summary(snapshot, component)
+        return {
+            "usage": "workflow execution has 3 blocks, prep, main (iterate) and cleanup. "
+                     "one can execute the workflow using one of the 3 options: "
+                     "1. simple repeat for static workflow with `run_workflow_repeat` "
+                     "2. repeat with kwargs `run_workflow_kwargs` "
+                     "3. campaign `run_workflow_campaign`",
+            "available_functions": functions,
+        }
     except Exception as e:
         return f"Error getting platform info: {str(e)}"
 
 
-@mcp.tool("execution-status")
-def get_execution_status():
+@tool("refresh-platform-info")
+async def refresh_platform_info(deck: str = ""):
+    """Invalidate the cached instrument snapshot, e.g. after the deck was reloaded"""
+    try:
+        ivoryos = decks.get(deck)
+        ivoryos.snapshots.invalidate()
+        snapshot = await ivoryos.snapshots.get()
+        return f"Instrument snapshot refreshed (version {snapshot.version}, {len(snapshot.index)} components)"
+    except Exception as e:
+        return f"Error refreshing platform info: {str(e)}"
+
+
+@tool("execution-status")
+async def get_execution_status(deck: str = ""):
     """Get workflow execution status"""
     try:
-        _check_authentication()
-        resp = client.get(f"{url}/executions/status")
+        ivoryos = decks.get(deck)
+        resp = await ivoryos.auth.get("/executions/status")
         if resp.status_code == httpx.codes.OK:
             return resp.json()
         else:
@@ -74,76 +226,197 @@ def get_execution_status():
         return f"Error getting workflow status: {str(e)}"
 
 
-@mcp.tool("execute-task")
-def execute_task(component: str, method: str, kwargs: Optional[Dict[str, Any]] = None):
-    """Execute a robot task"""
+@tool("await-execution")
+async def await_execution(timeout: float = 600, deck: str = ""):
+    """Wait until the current workflow or task finishes or pauses (or `timeout` seconds pass),
+    then return a compact status summary. Use this instead of repeatedly calling `execution-status`"""
+    try:
+        # the run may have been submitted just before, so an idle deck is reported after the start grace
+        return await wait_for_execution(decks.get(deck).auth, timeout=timeout, submitted_at=time.monotonic())
+    except Exception as e:
+        return f"Error waiting for execution: {str(e)}"
+
+
+@tool("list-decks")
+def list_decks():
+    """Names and URLs of the IvoryOS decks this server manages, pass one as `deck` to any tool"""
+    return {"default": decks.default,
+            "decks": {name: config["url"] for name, config in decks.config.items()}}
+
+
+@tool("fleet-status")
+async def get_fleet_status(deck_names: Optional[List[str]] = None):
+    """Compact execution status of every deck (or `deck_names`), queried concurrently,
+    with the decks grouped by state (idle, running, paused) to pick where to run next"""
+    async def status(ivoryos):
+        resp = await ivoryos.auth.get(STATUS_PATH)
+        if resp.status_code != httpx.codes.OK:
+            raise Exception(f"Failed to get execution status: {resp.status_code}")
+        return summarize_status(resp.json())
+
+    try:
+        per_deck = await decks.gather(status, deck_names)
+        by_state = {"idle": [], "running": [], "paused": [], "unreachable": []}
+        for name, summary in per_deck.items():
+            by_state[summary["state"] if isinstance(summary, dict) else "unreachable"].append(name)
+        return {**by_state, "decks": per_deck}
+    except Exception as e:
+        return f"Error getting fleet status: {str(e)}"
+
+
+@tool("fleet-platform-info")
+async def get_fleet_platform_info(deck_names: Optional[List[str]] = None):
+    """Components and methods of every deck (or `deck_names`), fetched concurrently, plus which decks
+    provide each component. Use `platform-info` with `deck` for the full signatures of one deck"""
+    async def components(ivoryos):
+        snapshot = await ivoryos.snapshots.get()
+        return {component: sorted(methods) for component, methods in snapshot.index.items()}
+
     try:
-        _check_authentication()
+        per_deck = await decks.gather(components, deck_names)
+        providers: Dict[str, List[str]] = {}
+        for name, deck_components in per_deck.items():
+            for component in deck_components if isinstance(deck_components, dict) else ():
+                providers.setdefault(component, []).append(name)
+        return {"components": providers, "decks": per_deck}
+    except Exception as e:
+        return f"Error getting fleet platform info: {str(e)}"
+
+
+@tool("execute-task")
+async def execute_task(component: str, method: str, kwargs: Optional[Dict[str, Any]] = None,
+                       wait: bool = False, deck: str = ""):
+    """Execute a robot task, with wait=True return only once the task has finished"""
+    try:
+        ivoryos = decks.get(deck)
         if kwargs is None:
             kwargs = {}
 
-        snapshot = client.get(f"{url}/instruments").json()
+        snapshot = await ivoryos.snapshots.get()
+        if not snapshot.has_method(component, method):
+            # the deck may have changed since the snapshot was cached
+            snapshot = await ivoryos.snapshots.get(force=True)
 
-        if component not in snapshot:
-            return f"Component {component} does not exist. Available: {list(snapshot.keys())}"
+        errors = task_errors(snapshot, component, method, kwargs)
+        if errors:
+            return " ".join(errors)
 
         kwargs["hidden_name"] = method
         kwargs["hidden_wait"] = False
 
-        resp = client.post(f"{url}/instruments/{component}", json=kwargs)
+        resp = await ivoryos.auth.post(f"/instruments/{component}", json=kwargs)
         if resp.status_code == httpx.codes.OK:
             result = resp.json()
-            return f"{result}. Use `get-execution-status` to monitor."
+            if wait:
+                return await _wait_if_requested(ivoryos, result, wait)
+            return f"{result}. Use `get-execution-status` or `await-execution` to monitor."
         else:
             return f"Failed to execute task: {resp.status_code}"
     except Exception as e:
         return f"Error executing task: {str(e)}"
 
 
-@mcp.tool("list-workflow-scripts")
-def list_workflow_scripts(search_key: str = '', deck_name: str = ''):
-    """List workflow scripts"""
+@tool("execute-task-batch")
+async def execute_task_batch(tasks: List[Dict[str, Any]], stop_on_error: bool = False, deck: str = ""):
+    """Execute many robot tasks in one call, each task is {"component": ..., "method": ..., "kwargs": {...}}.
+    All tasks (and their kwargs) are validated before any of them runs. IvoryOS runs one task at a time,
+    so tasks run to completion in order; stop_on_error skips the rest after a failure.
+    Returns per-task results and timings."""
     try:
-        _check_authentication()
-        params = {}
-        if deck_name:
-            params['deck'] = deck_name
-        if search_key:
-            params['keyword'] = search_key
-        resp = client.get(
-            f"{url}/library/{deck_name}",
-            params=params
-        )
-        if resp.status_code == httpx.codes.OK:
-            return resp.json()
-        else:
-            return f"Failed to list workflow scripts: {resp.status_code}"
+        ivoryos = decks.get(deck)
+        snapshot = await ivoryos.snapshots.get()
+        if not all(snapshot.has_method(t.get("component"), t.get("method")) for t in tasks):
+            snapshot = await ivoryos.snapshots.get(force=True)
+
+        errors = [{"index": index, "error": error} for index, task in enumerate(tasks)
+                  for error in task_errors(snapshot, task.get("component"), task.get("method"), task.get("kwargs"))]
+        if errors:
+            return {"success": False, "validation_errors": errors}
+
+        return await run_batch(ivoryos.auth, tasks, stop_on_error=stop_on_error)
+    except Exception as e:
+        return f"Error executing task batch: {str(e)}"
+
+
+@tool("list-workflow-scripts")
+async def list_workflow_scripts(search_key: str = '', deck_name: str = '', deck: str = ""):
+    """List workflow scripts whose name contains search_key (from the local script index)"""
+    try:
+        ivoryos = decks.get(deck)
+        await ivoryos.script_index.sync()
+        return {"workflows": ivoryos.script_index.names(search_key, deck_name)}
     except Exception as e:
         return f"Error listing workflow scripts: {str(e)}"
 
 
-@mcp.tool("load-workflow-script")
-def load_workflow_script(workflow_name: str):
-    """Load a workflow script"""
+@tool("search-workflow-scripts")
+async def search_workflow_scripts(query: str, deck_name: str = '', limit: int = 20, deck: str = ""):
+    """Ranked search over workflow script names, deck.*/blocks.* calls (e.g. deck.sdl.dose),
+    parameters and descriptions. Uses the local script index, which is synced incrementally"""
     try:
-        _check_authentication()
-        resp = client.get(f"{url}/library/{workflow_name}")
-        if resp.status_code == httpx.codes.OK:
-            return resp.json()
-        else:
-            return f"Failed to load workflow script: {resp.status_code}"
+        ivoryos = decks.get(deck)
+        await ivoryos.script_index.sync()
+        return ivoryos.script_index.search(query, deck_name, limit)
+    except Exception as e:
+        return f"Error searching workflow scripts: {str(e)}"
+
+
+@tool("load-workflow-script")
+async def load_workflow_script(workflow_name: str, activate: bool = True, deck: str = ""):
+    """Load a workflow script, making it the current workflow.
+    With activate=False the locally cached copy is returned (when there is one) and IvoryOS is not touched"""
+    try:
+        ivoryos = decks.get(deck)
+        if not activate:
+            script = ivoryos.script_index.body(workflow_name)
+            if script is not None:
+                return script
+        script = await ivoryos.script_index.fetch(workflow_name)
+        return script
     except Exception as e:
         return f"Error loading workflow script: {str(e)}"
 
 
-@mcp.tool("submit-workflow-script")
-def submit_workflow_script(workflow_name: str, main_script: str = "",
-                           cleanup_script: str = "", prep_script: str = ""):
-    """Submit a workflow script"""
+async def _validate_scripts(ivoryos: Deck, scripts: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Validation errors of each phase, rechecked against a fresh snapshot before being reported"""
+    snapshot = await ivoryos.snapshots.get()
+    errors = ivoryos.validator.validate_scripts(scripts, snapshot)
+    if errors:
+        # the deck may have changed since the snapshot was cached
+        snapshot = await ivoryos.snapshots.get(force=True)
+        errors = ivoryos.validator.validate_scripts(scripts, snapshot)
+    return errors
+
+
+@tool("validate-workflow-script")
+async def validate_workflow_script(main_script: str = "", cleanup_script: str = "", prep_script: str = "",
+                                   deck: str = ""):
+    """Check deck.*/blocks.* calls and their arguments in workflow scripts against the instrument
+    signatures, without submitting anything. Returns the errors with their line numbers"""
+    try:
+        ivoryos = decks.get(deck)
+        errors = await _validate_scripts(ivoryos, {"script": main_script, "prep": prep_script,
+                                                   "cleanup": cleanup_script})
+        return {"success": not errors, "validation_errors": errors}
+    except Exception as e:
+        return f"Error validating workflow script: {str(e)}"
+
+
+@tool("submit-workflow-script")
+async def submit_workflow_script(workflow_name: str, main_script: str = "",
+                                 cleanup_script: str = "", prep_script: str = "", validate: bool = True,
+                                 deck: str = ""):
+    """Submit a workflow script. Scripts are checked against the instrument signatures first (validate=True)
+    and not submitted when a deck.*/blocks.* call or its arguments are invalid"""
     try:
-        _check_authentication()
-        resp = client.post(
-            url=f"{url}/draft/submit_python",
+        ivoryos = decks.get(deck)
+        if validate:
+            errors = await _validate_scripts(ivoryos, {"script": main_script, "prep": prep_script,
+                                                       "cleanup": cleanup_script})
+            if errors:
+                return {"success": False, "validation_errors": errors}
+        resp = await ivoryos.auth.post(
+            "/draft/submit_python",
             json={
                 "workflow_name": workflow_name,
                 "script": main_script,
@@ -152,6 +425,8 @@ def submit_workflow_script(workflow_name: str, main_script: str = "",
             }
         )
         if resp.status_code == httpx.codes.OK:
+            ivoryos.script_index.invalidate()
+            ivoryos.script_index.set_draft(main_script)
             return "Workflow script submitted successfully"
         else:
             return f"Failed to submit workflow script: {resp.status_code}"
@@ -159,12 +434,12 @@ def submit_workflow_script(workflow_name: str, main_script: str = "",
         return f"Error submitting workflow script: {str(e)}"
 
 
-@mcp.tool("pause-and-resume")
-def pause_and_resume():
+@tool("pause-and-resume")
+async def pause_and_resume(deck: str = ""):
     """Toggle pause and resume for workflow execution"""
     try:
-        _check_authentication()
-        resp = client.post(f"{url}/executions/pause-resume")
+        ivoryos = decks.get(deck)
+        resp = await ivoryos.auth.post("/executions/pause-resume")
         if resp.status_code == httpx.codes.OK:
             return resp.json()
         else:
@@ -173,12 +448,12 @@ def pause_and_resume():
         return f"Error toggling workflow pause/resume: {str(e)}"
 
 
-@mcp.tool("abort-pending-workflow")
-def abort_pending_workflow():
+@tool("abort-pending-workflow")
+async def abort_pending_workflow(deck: str = ""):
     """Abort pending workflow execution"""
     try:
-        _check_authentication()
-        resp = client.post(f"{url}/executions/abort/next-iteration")
+        ivoryos = decks.get(deck)
+        resp = await ivoryos.auth.post("/executions/abort/next-iteration")
         if resp.status_code == httpx.codes.OK:
             return resp.json()
         else:
@@ -187,12 +462,12 @@ def abort_pending_workflow():
         return f"Error aborting pending workflow: {str(e)}"
 
 
-@mcp.tool("stop-current-workflow")
-def stop_current_workflow():
+@tool("stop-current-workflow")
+async def stop_current_workflow(deck: str = ""):
     """Stop workflow execution after the current step"""
     try:
-        _check_authentication()
-        resp = client.post(f"{url}/executions/abort/next-task")
+        ivoryos = decks.get(deck)
+        resp = await ivoryos.auth.post("/executions/abort/next-task")
         if resp.status_code == httpx.codes.OK:
             return resp.json()
         else:
@@ -201,99 +476,291 @@ def stop_current_workflow():
         return f"Error stopping current workflow: {str(e)}"
 
 
-@mcp.tool("run-workflow-repeat")
-def run_workflow_repeat(repeat_time: Optional[int] = None):
-    """Run the loaded workflow with repeat times"""
+@tool("run-workflow-repeat")
+async def run_workflow_repeat(repeat_time: Optional[int] = None, wait: bool = False, deck: str = ""):
+    """Run the loaded workflow with repeat times, with wait=True return only once the run has finished"""
     try:
-        _check_authentication()
-        resp = client.post(
-            f"{url}/executions/config",
-            json={"repeat": repeat_time if repeat_time is not None else None}
-        )
+        ivoryos = decks.get(deck)
+        resp = await _start_run(ivoryos, {"repeat": repeat_time if repeat_time is not None else None})
         if resp.status_code == httpx.codes.OK:
-            return resp.json()
+            return await _wait_if_requested(ivoryos, resp.json(), wait, ivoryos.held_run)
         else:
             return f"Failed to start workflow execution: {resp.status_code}"
     except Exception as e:
         return f"Error starting workflow execution: {str(e)}"
 
 
-@mcp.tool("run-workflow-kwargs")
-def run_workflow_kwargs(kwargs_list: Optional[List[Dict[str, Any]]] = None):
-    """Run the loaded workflow with a list of keyword arguments"""
+@tool("run-workflow-kwargs")
+async def run_workflow_kwargs(kwargs_list: Optional[List[Dict[str, Any]]] = None, wait: bool = False,
+                              spec: Optional[Dict[str, Any]] = None, chunk_size: int = 0, restart: bool = False,
+                              deck: str = ""):
+    """Run the loaded workflow with a list of keyword arguments, with wait=True return only once the run has finished.
+    Large sweeps: pass `spec` ({"grid": {"x": [..], "y": {"start", "stop", "num"}}}, {"lhs": {"x": [lo, hi]},
+    "samples": n, "seed": 0}, {"csv": path}, {"npy": path, "columns": [..]}, optional "fixed": {..}) and/or
+    `chunk_size`; rows are generated lazily and run chunk by chunk in the background. The spec is checked first
+    (a CSV file in full; columns against the workflow's parameters when it was loaded here). Returns a job id for
+    `sweep-status`; calling again with the same spec resumes after the last completed chunk (restart=True starts over)"""
     try:
-        _check_authentication()
-        resp = client.post(
-            f"{url}/executions/config",
-            json={"kwargs": kwargs_list}
-        )
+        ivoryos = decks.get(deck)
+        if spec is not None or chunk_size > 0:
+            job = ivoryos.sweeps.start(spec if spec is not None else {"rows": kwargs_list or []},
+                                       chunk_size=chunk_size or 500, restart=restart,
+                                       parameters=ivoryos.script_index.draft_parameters)
+            if wait:
+                return await ivoryos.sweeps.wait(job["job_id"])
+            return job
+
+        resp = await _start_run(ivoryos, {"kwargs": kwargs_list})
         if resp.status_code == httpx.codes.OK:
-            return resp.json()
+            return await _wait_if_requested(ivoryos, resp.json(), wait, ivoryos.held_run)
         else:
             return f"Failed to start workflow execution: {resp.status_code}"
     except Exception as e:
         return f"Error starting workflow execution: {str(e)}"
 
 
-@mcp.tool("run-workflow-campaign")
-def run_workflow_campaign(parameters: List[Dict[str, Any]],
-                          objectives: List[Dict[str, Any]],
-                          repeat: int = 25,
-                          parameter_constraints: Optional[List[str]] = None):
-    """Run the loaded workflow with ax-platform (credit: Honegumi)"""
+@tool("sweep-status")
+def get_sweep_status(job_id: str = "", cancel: bool = False, deck: str = ""):
+    """Per-chunk progress of kwargs sweeps started by run-workflow-kwargs (all of them without job_id).
+    cancel=True stops submitting further chunks of job_id"""
     try:
-        _check_authentication()
+        ivoryos = decks.get(deck)
+        if cancel:
+            return ivoryos.sweeps.cancel(job_id)
+        return ivoryos.sweeps.status(job_id)
+    except Exception as e:
+        return f"Error getting sweep status: {str(e)}"
+
+
+@tool("run-workflow-campaign")
+async def run_workflow_campaign(parameters: List[Dict[str, Any]],
+                                objectives: List[Dict[str, Any]],
+                                repeat: int = 25,
+                                parameter_constraints: Optional[List[str]] = None,
+                                batch_size: int = 1,
+                                slots_from: str = "",
+                                early_stop: Optional[Dict[str, float]] = None,
+                                patience: int = 0,
+                                max_minutes: float = 0.0,
+                                wait: bool = False,
+                                deck: str = ""):
+    """Run the loaded workflow with ax-platform (credit: Honegumi), with wait=True return only once the campaign has finished.
+    batch_size: trials suggested per iteration (q). slots_from: component prefix (e.g. "deck.pump") whose
+    instruments each run one trial of a batch, batch_size defaults to their count.
+    early_stop ({objective: target}), patience (trials without improvement of the first objective) and
+    max_minutes stop the campaign at the next iteration, see `campaign-status`.
+    Linear parameter_constraints are checked against the bounds first; an infeasible space is not started."""
+    try:
+        from ivoryos_mcp import campaign
+        ivoryos = decks.get(deck)
         if parameter_constraints is None:
             parameter_constraints = []
 
-        resp = client.post(
-            f"{url}/executions/config",
-            json={
-                "parameters": parameters,
-                "objectives": objectives,
-                "parameter_constraints": parameter_constraints,
-                "repeat": repeat,
-            }
-        )
+        if campaign.np is not None:
+            check = campaign.check_search_space(parameters, parameter_constraints)
+            if check["errors"]:
+                return {"success": False, "validation_errors": check["errors"]}
+
+        if slots_from:
+            snapshot = await ivoryos.snapshots.get()
+            slots = [c for c in snapshot.index if c.startswith(slots_from)]
+            if not slots:
+                return f"Failed to start workflow campaign: no component matches {slots_from}"
+            if batch_size > len(slots):
+                return f"Failed to start workflow campaign: batch_size {batch_size} exceeds the {len(slots)} {slots_from} slots"
+            if batch_size <= 1:
+                batch_size = len(slots)
+
+        resp = await _start_run(ivoryos, {
+            "parameters": parameters,
+            "objectives": objectives,
+            "parameter_constraints": parameter_constraints,
+            "repeat": repeat,
+            "batch_size": batch_size,
+        })
         if resp.status_code == httpx.codes.OK:
-            return resp.json()
+            watched = bool(early_stop or patience or max_minutes)
+            if watched:
+                ivoryos.campaign_watcher.start(objectives, early_stop, patience, max_minutes)
+            result = await _wait_if_requested(ivoryos, resp.json(), wait, ivoryos.held_run)
+            if wait and watched:
+                result["campaign"] = await ivoryos.campaign_watcher.wait()
+            return result
         else:
             return f"Failed to start workflow campaign: {resp.status_code}"
     except Exception as e:
         return f"Error starting workflow campaign: {str(e)}"
 
 
-@mcp.tool("list-workflow-data")
-def list_workflow_data(workflow_name: str = ""):
-    """List workflow data"""
+@tool("campaign-status")
+def get_campaign_status(deck: str = ""):
+    """Early-stopping state of the last campaign started with early_stop, patience or max_minutes"""
+    try:
+        return decks.get(deck).campaign_watcher.status() or "No campaign is being watched"
+    except Exception as e:
+        return f"Error getting campaign status: {str(e)}"
+
+
+@tool("enqueue-job")
+async def enqueue_job(config: Dict[str, Any], workflow_name: str = "", priority: int = 0,
+                      depends_on: Optional[List[int]] = None, require_success: bool = True, deck: str = ""):
+    """Queue a run instead of starting it now; it starts automatically once IvoryOS is idle.
+    config is what run-workflow-* would send: {"repeat": n}, {"kwargs": [{...}, ...]} or a campaign
+    {"parameters": [...], "objectives": [...], "parameter_constraints": [...], "repeat": n, "batch_size": q}.
+    workflow_name loads that library workflow first. Higher priority runs first. depends_on: job ids that
+    must finish first; with require_success=False the job runs even if they failed (e.g. a cleanup workflow)"""
+    try:
+        from ivoryos_mcp import campaign
+        ivoryos = decks.get(deck)
+        if "parameters" in config and campaign.np is not None:
+            check = campaign.check_search_space(config["parameters"], config.get("parameter_constraints") or [])
+            if check["errors"]:
+                return {"success": False, "validation_errors": check["errors"]}
+        return ivoryos.jobs.enqueue(config, workflow_name, priority, depends_on, require_success)
+    except Exception as e:
+        return f"Error queueing job: {str(e)}"
+
+
+@tool("job-queue")
+def get_job_queue(state: str = "", limit: int = 50, hours: float = 24.0, deck: str = ""):
+    """Jobs in dispatch order (running, then queued by priority, then recently finished; or only `state`:
+    queued, running, done, failed, cancelled), with utilization and queue wait times over the last `hours`"""
+    try:
+        ivoryos = decks.get(deck)
+        ivoryos.jobs.start()
+        return {"jobs": ivoryos.jobs.jobs(state, limit), "stats": ivoryos.jobs.stats(hours)}
+    except Exception as e:
+        return f"Error getting job queue: {str(e)}"
+
+
+@tool("reorder-job")
+def reorder_job(job_id: int, priority: Optional[int] = None, before: Optional[int] = None, deck: str = ""):
+    """Change the priority of a queued job and/or move it just ahead of the queued job `before`"""
+    try:
+        return decks.get(deck).jobs.reorder(job_id, priority, before)
+    except Exception as e:
+        return f"Error reordering job: {str(e)}"
+
+
+@tool("cancel-job")
+def cancel_job(job_id: int, deck: str = ""):
+    """Cancel a queued job"""
+    try:
+        return decks.get(deck).jobs.cancel(job_id)
+    except Exception as e:
+        return f"Error cancelling job: {str(e)}"
+
+
+@tool("list-workflow-data")
+async def list_workflow_data(workflow_name: str = "", offset: int = 0, limit: int = 50, deck: str = ""):
+    """List workflow data (newest first), `offset`/`limit` page through long histories"""
     try:
-        _check_authentication()
-        resp = client.get(
-            f"{url}/executions/records",
+        ivoryos = decks.get(deck)
+        resp = await ivoryos.auth.get(
+            "/executions/records",
             params={"keyword": workflow_name}
         )
         if resp.status_code == httpx.codes.OK:
-            return resp.json()
+            workflow_data = list(resp.json().get("workflow_data", {}).items())
+            end = max(offset, 0) + max(limit, 0)
+            return {
+                "total": len(workflow_data),
+                "workflow_data": dict(workflow_data[max(offset, 0):end]),
+                "next_offset": end if end < len(workflow_data) else None,
+            }
         else:
             return f"Failed to list workflow data: {resp.status_code}"
     except Exception as e:
         return f"Error listing workflow data: {str(e)}"
 
 
-@mcp.tool("load-workflow-data")
-def load_workflow_data(workflow_id: int):
-    """Load workflow data"""
+@tool("load-workflow-data")
+async def load_workflow_data(workflow_id: int, offset: int = 0, limit: int = 50,
+                             fields: Optional[List[str]] = None, phase: str = "main", deck: str = ""):
+    """Load workflow data as one row per iteration (repeat_index, parameters, outputs).
+    The summary lists the row count, columns and min/max of numeric columns. Use `fields`
+    to keep only some columns (e.g. ["results"]) and `offset`/`limit` to page through rows.
+    `phase` is one of main, prep or cleanup"""
     try:
-        _check_authentication()
-        resp = client.get(f"{url}/executions/records/{workflow_id}")
-        if resp.status_code == httpx.codes.OK:
-            return resp.json()
-        else:
-            return f"Failed to load workflow data: {resp.status_code}"
+        ivoryos = decks.get(deck)
+        if ivoryos.record_cache.available:
+            record = await ivoryos.record_cache.load(ivoryos.auth, workflow_id, phase)
+            return record.page(offset, limit, fields)
+        return await load_record_page(ivoryos.auth, workflow_id, offset=offset, limit=limit, fields=fields,
+                                      phase=phase)
     except Exception as e:
         return f"Error loading workflow data: {str(e)}"
 
 
+@tool("analyze-workflow-data")
+async def analyze_workflow_data(workflow_id: int, objective: str, group_by: Optional[str] = None,
+                                phase: str = "main", deck: str = ""):
+    """Mean/std/min/max and the best (argmin/argmax) iterations of an `objective` column of a workflow,
+    optionally grouped by a parameter column. Completed workflows are cached locally, so repeated
+    analysis does not contact IvoryOS again"""
+    try:
+        from ivoryos_mcp.record_cache import aggregate
+        ivoryos = decks.get(deck)
+        if not ivoryos.record_cache.available:
+            return "Error analyzing workflow data: numpy is required (`uv add numpy`)"
+        record = await ivoryos.record_cache.load(ivoryos.auth, workflow_id, phase)
+        return aggregate(record, objective, group_by)
+    except Exception as e:
+        return f"Error analyzing workflow data: {str(e)}"
+
+
+@tool("labview-telemetry")
+async def get_labview_telemetry(seconds: float = 10.0, component: str = "deck.chamber", deck: str = ""):
+    """Summary (count, last, mean, std, min, max per numeric field) of the last `seconds`
+    of telemetry streamed by a LabVIEWServerDevice on the deck. IvoryOS runs instrument calls under
+    its runner lock, so this fails at once (instead of waiting) while a workflow step is running"""
+    try:
+        ivoryos = decks.get(deck)
+        item = await run_task(ivoryos.auth, 0, {"component": component, "method": "get_telemetry_summary",
+                                                "kwargs": {"seconds": seconds}}, busy_timeout=0)
+        if item.get("busy"):
+            return "Failed to get telemetry: the IvoryOS runner is busy (a workflow step is running), try again later"
+        if not item["success"]:
+            return f"Failed to get telemetry: {item.get('error') or item.get('result')}"
+        return item["result"].get("output")
+    except Exception as e:
+        return f"Error getting telemetry: {str(e)}"
+
+
+@tool("metrics")
+def get_metrics():
+    """Call counts, errors, payload bytes and p50/p95/p99 latency per MCP tool and per IvoryOS endpoint"""
+    return metrics.snapshot()
+
+
+@tool("auth-stats")
+def get_auth_stats(deck: str = ""):
+    """Get request, authentication and snapshot cache counters. No authentication required"""
+    try:
+        ivoryos = decks.get(deck)
+        return {**ivoryos.auth.stats(), "snapshot_cache": ivoryos.snapshots.stats(),
+                "record_cache": ivoryos.record_cache.stats(), "script_index": ivoryos.script_index.stats(),
+                "validator": ivoryos.validator.stats()}
+    except Exception as e:
+        return f"Error getting auth stats: {str(e)}"
+
+
+async def _warm_up() -> None:
+    """Build the default deck and log in (by fetching the instrument snapshot) while the client starts up"""
+    try:
+        await decks.get().snapshots.get()
+    except Exception:
+        pass  # the first tool call reports the problem
+
+
+async def _on_initialized(_: types.InitializedNotification) -> None:
+    mcp.warm_up_task = asyncio.create_task(_warm_up())
+
+
+if os.getenv("IVORYOS_WARM_UP", "1") != "0":
+    mcp.notification_handlers[types.InitializedNotification] = _on_initialized
+
+
 # Prompts
 @mcp.prompt("generate-workflow-script")
 def generate_custom_script() -> str:
@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth, LOGIN_PATH
+
+
+def ivoryos_app():
+    """httpx transport answering 401 until the login sets the session cookie"""
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        if request.url.path == LOGIN_PATH:
+            return httpx.Response(302, headers={"location": "/", "set-cookie": "session=ok; Path=/"})
+        if request.url.path != "/" and request.headers.get("cookie") != "session=ok":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"path": request.url.path})
+    return httpx.MockTransport(handle)
+
+
+class SessionAuthTest(unittest.TestCase):
+    def run_calls(self, rounds):
+        async def main():
+            async with httpx.AsyncClient(transport=ivoryos_app()) as client:
+                auth = SessionAuth(client, "http://ivoryos", {"username": "u", "password": "p"})
+                for calls in rounds:
+                    responses = await asyncio.gather(*(auth.get(f"/api/{i}") for i in range(calls)))
+                    self.assertTrue(all(r.status_code == 200 for r in responses))
+                return auth.stats()
+        return asyncio.run(main())
+
+    def test_concurrent_first_calls_share_one_login(self):
+        stats = self.run_calls([20])
+        self.assertEqual(stats["auth_round_trips"], 1)
+        self.assertEqual(stats["retries"], 20)
+        self.assertEqual(stats["round_trips"], 41)
+        # a probe before each call would have spent the same 41 round trips
+        self.assertEqual(stats["round_trips_saved"], 0)
+
+    def test_calls_on_a_live_session_save_the_probe(self):
+        stats = self.run_calls([1, 10])
+        self.assertEqual(stats["auth_round_trips"], 1)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["round_trips_saved"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+from ivoryos_mcp.record_cache import CachedRecord, MISSING, _to_column, aggregate, np
+
+
+def record(rows):
+    names = sorted({name for row in rows for name in row})
+    columns, encodings, states = {}, {}, {}
+    for name in names:
+        columns[name], encodings[name], column_states = _to_column([row.get(name, MISSING) for row in rows])
+        if column_states is not None:
+            states[name] = column_states
+    return CachedRecord({"id": 1}, {"rows": len(rows), "columns": names}, columns, encodings, states)
+
+
+@unittest.skipIf(np is None, "the record cache needs numpy")
+class AggregateTest(unittest.TestCase):
+    def test_missing_and_empty_string_keys_are_separate_groups(self):
+        rows = [{"repeat_index": 0, "yield": 1.0, "solvent": ""},
+                {"repeat_index": 1, "yield": 2.0},
+                {"repeat_index": 2, "yield": 3.0, "solvent": "water"},
+                {"repeat_index": 3, "yield": 5.0, "solvent": None},
+                {"repeat_index": 4, "yield": 4.0, "solvent": ""}]
+        groups = {g["solvent"]: g for g in aggregate(record(rows), "yield", "solvent")["groups"]}
+        self.assertEqual(set(groups), {None, "", "water"})
+        self.assertEqual((groups[""]["count"], groups[""]["mean"]), (2, 2.5))
+        self.assertEqual((groups[None]["count"], groups[None]["argmax_repeat_index"]), (2, 3))
+        self.assertEqual(groups["water"]["count"], 1)
+
+    def test_numeric_keys_with_gaps(self):
+        rows = [{"repeat_index": i, "yield": float(i), **({"x": i % 2} if i % 3 else {})} for i in range(6)]
+        groups = {g["x"]: g["count"] for g in aggregate(record(rows), "yield", "x")["groups"]}
+        self.assertEqual(groups, {None: 2, 0: 2, 1: 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
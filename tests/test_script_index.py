@@ -0,0 +1,82 @@
+import asyncio
+import tempfile
+import unittest
+
+import httpx
+
+from ivoryos_mcp.auth import SessionAuth
+from ivoryos_mcp.script_index import ScriptIndex
+
+
+class Library:
+    """IvoryOS /library endpoints over an httpx mock transport, counting script requests"""
+
+    def __init__(self, count: int, etags: bool = False):
+        self.scripts = {}
+        self.clock = 0
+        self.etags = etags
+        self.bodies = 0
+        self.not_modified = 0
+        for i in range(count):
+            self.save(f"workflow_{i}")
+
+    def save(self, name: str, description: str = "") -> None:
+        self.clock += 1
+        self.scripts[name] = {"script": {"name": name, "deck": "deck", "description": description,
+                                         "last_modified": f"2025-01-01 00:00:{self.clock:02d}"},
+                              "python_script": {"main": f"def {name}(x):\n    deck.sdl.dose(amount=x)\n"}}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/library":
+            names = sorted(self.scripts, key=lambda n: self.scripts[n]["script"]["last_modified"], reverse=True)
+            return httpx.Response(200, json={"workflows": names})
+        script = self.scripts[path.rsplit("/", 1)[1]]
+        etag = f'"{script["script"]["last_modified"]}"'
+        if self.etags and request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return httpx.Response(304)
+        self.bodies += 1
+        return httpx.Response(200, json=script, headers={"etag": etag} if self.etags else {})
+
+
+class SyncTest(unittest.TestCase):
+    def run_syncs(self, library, *changes):
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(library.handle)) as client:
+                auth = SessionAuth(client, "http://ivoryos", {})
+                with tempfile.TemporaryDirectory() as root:
+                    index = ScriptIndex(auth, root)
+                    await index.sync()
+                    counts = []
+                    for change in changes:
+                        change()
+                        before = library.bodies
+                        await index.sync(force=True)
+                        counts.append(library.bodies - before)
+                    return index, counts
+        return asyncio.run(main())
+
+    def test_unchanged_library_fetches_one_script(self):
+        library = Library(20)
+        _, counts = self.run_syncs(library, lambda: None, lambda: None)
+        self.assertEqual(library.bodies - sum(counts), 20)
+        self.assertEqual(counts, [1, 1])
+
+    def test_modified_scripts_are_reindexed(self):
+        library = Library(20)
+        index, counts = self.run_syncs(library, lambda: library.save("workflow_3", "titration"),
+                                       lambda: (library.save("workflow_7", "rinse"), library.save("workflow_19")))
+        self.assertEqual(counts, [3, 3])  # 1, then 2 at a time until an unchanged one
+        self.assertEqual([hit["name"] for hit in index.search("titration")], ["workflow_3"])
+        self.assertEqual([hit["name"] for hit in index.search("rinse")], ["workflow_7"])
+
+    def test_etags_revalidate_without_bodies(self):
+        library = Library(20, etags=True)
+        _, counts = self.run_syncs(library, lambda: None)
+        self.assertEqual(counts, [0])
+        self.assertEqual(library.not_modified, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import asyncio
+import json
+import unittest
+
+from ivoryos_mcp.shaping import shaped
+
+
+class PagingTest(unittest.TestCase):
+    def test_non_ascii_text_pages_reassemble(self):
+        text = "é" * 5000 + "日本語" * 300 + "🙂" * 200
+        tool = shaped(lambda: text, 1001)
+        page = json.loads(tool())
+        parts = [page["text"]]
+        while page["truncated"]["next_cursor"]:
+            page = json.loads(tool(cursor=page["truncated"]["next_cursor"]))
+            parts.append(page["text"])
+        self.assertGreater(len(parts), 1)
+        self.assertEqual("".join(parts), text)
+
+    def test_later_pages_do_not_call_the_tool(self):
+        calls = []
+
+        async def tool(n: int):
+            calls.append(n)
+            return {"results": [{"i": i, "pad": "x" * 50} for i in range(n)]}
+
+        wrapped = shaped(tool, 1000)
+        page = json.loads(asyncio.run(wrapped(100)))
+        results = page["results"]
+        while page["truncated"]["next_cursor"]:
+            page = json.loads(asyncio.run(wrapped(100, cursor=page["truncated"]["next_cursor"])))
+            results += page["results"]
+        self.assertEqual(calls, [100])
+        self.assertEqual([r["i"] for r in results], list(range(100)))
+
+    def test_unknown_cursor(self):
+        tool = shaped(lambda: "x" * 5000, 1000)
+        self.assertTrue(tool(cursor="0123abcd:@800").startswith("Error: Cursor expired"))
+
+
+if __name__ == "__main__":
+    unittest.main()
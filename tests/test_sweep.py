@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from ivoryos_mcp.script_index import workflow_parameters
+from ivoryos_mcp.sweep import check, expand
+
+
+class CheckTest(unittest.TestCase):
+    def csv(self, text):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_csv_is_read_in_full(self):
+        path = self.csv("x,y\n1,2\n\n3,4\n")
+        self.assertEqual(check({"csv": path}, ["x", "y"]), 2)
+        self.assertEqual(list(expand({"csv": path})), [{"x": 1, "y": 2}, {"x": 3, "y": 4}])
+
+    def test_ragged_csv_line(self):
+        path = self.csv("x,y\n" + "1,2\n" * 1000 + "3\n")
+        with self.assertRaisesRegex(ValueError, "line 1002 has 1 values"):
+            check({"csv": path})
+
+    def test_unknown_parameter_columns(self):
+        path = self.csv("x,z\n1,2\n")
+        with self.assertRaisesRegex(ValueError, r"Unknown parameters \['z'\]"):
+            check({"csv": path}, ["x", "y"])
+        with self.assertRaisesRegex(ValueError, r"Unknown parameters \['w'\]"):
+            check({"grid": {"x": [1, 2]}, "fixed": {"w": 0}}, ["x", "y"])
+        self.assertEqual(check({"csv": path}), 1)  # parameters unknown: only the file is checked
+
+    def test_workflow_parameters(self):
+        self.assertEqual(workflow_parameters("def run(x, y: float = 1.0):\n    pass\n"), ["x", "y"])
+        self.assertEqual(workflow_parameters("def run():\n    pass\n"), [])
+        self.assertIsNone(workflow_parameters("def run(x, **kwargs):\n    pass\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()